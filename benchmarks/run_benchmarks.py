@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""bust benchmarks
+
+Times every stage of the generation of synthetic modules, and measures its peak
+memory use with tracemalloc.
+
+Usage:
+  run_benchmarks.py [-n SIZES] [-b BUS] [-r N] [-o FILE] [--check FILE] [--tolerance T] [--memory-tolerance T]
+  run_benchmarks.py -h | --help
+
+Options:
+  -n SIZES              Comma separated numbers of registers [default: 10,100,1000,10000]
+  -b BUS                Comma separated bus types [default: axi,ipbus]
+  -r N                  Number of timed runs of each stage, the fastest is kept [default: 5]
+  -o FILE               Save the results as JSON, e.g. as a new baseline
+  --check FILE          Compare the results with the baseline in FILE, exit 1 on regressions
+  --tolerance T         Allowed relative increase of time [default: 1.0]
+  --memory-tolerance T  Allowed relative increase of peak memory [default: 0.1]
+  -h --help             HELP!
+
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from docopt import docopt
+
+# Benchmark the working tree, not an installed bust
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bust._version import __VERSION__  # noqa: E402
+from bust.generation import (  # noqa: E402
+    generate_output,
+    get_gen_settings,
+    load_generators,
+)
+from bust.utils import json_parser  # noqa: E402
+from synthetic import synthetic_module  # noqa: E402
+
+# Differences in time below this many seconds are never reported as regressions
+MIN_TIME_DELTA = 0.005
+# Fast stages are called repeatedly in each timed run, until it takes this long
+MIN_RUN_TIME = 0.1
+
+
+def _run_time(func, loops):
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - start
+
+
+def measure(func, repeat):
+    """! @brief Returns the time of func, and its peak memory use
+
+    Like timeit, each timed run calls func as many times as needed to take at
+    least MIN_RUN_TIME, so that timer resolution and short hiccups do not decide
+    the result of fast stages. The time per call of the fastest of repeat runs is
+    kept. The peak is measured in an extra call, since tracing slows func down.
+    """
+    loops = 1
+    elapsed = _run_time(func, loops)
+    while elapsed < MIN_RUN_TIME:
+        loops *= 2
+        elapsed = _run_time(func, loops)
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        best = min(best, _run_time(func, loops) / loops)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time": best, "peak": peak}
+
+
+def generator_stages(bus, module, header, documentation, testbench):
+    """! @brief Returns the generator methods to benchmark, by stage name"""
+    bus_gen = bus.get_VHDL_generator()
+    stages = {}
+    if bus.bus_type == "axi":
+        stages["return_bus_pkg_VHDL"] = bus.return_bus_pkg_VHDL
+    stages["return_bus_pif_VHDL"] = lambda: bus_gen.return_bus_pif_VHDL(module)
+    stages["return_module_pkg_VHDL"] = module.return_module_pkg_VHDL
+    stages["return_module_VHDL"] = module.return_module_VHDL
+    stages["return_c_header"] = header.return_c_header
+    stages["return_cpp_header"] = header.return_cpp_header
+    stages["return_python_header"] = header.return_python_header
+    if bus.bus_type == "ipbus":
+        stages["return_ipbus_addr_table"] = header.return_ipbus_addr_table
+    stages["return_vhdl_tb"] = testbench.return_vhdl_tb
+    stages["return_uvvm_component_list"] = testbench.return_uvvm_component_list
+    stages["return_tcl_script"] = testbench.return_tcl_script
+    stages["return_tex_documentation"] = documentation.return_tex_documentation
+    return stages
+
+
+def benchmark_module(n_registers, bus_type, repeat, tmp):
+    """! @brief Returns the measurements of all stages for one synthetic module"""
+    json_file = os.path.join(tmp, "{}_{}.json".format(bus_type, n_registers))
+    with open(json_file, "w") as f:
+        json.dump(synthetic_module(n_registers, bus_type), f)
+
+    results = {}
+    results["json_parser"] = measure(lambda: json_parser(json_file), repeat)
+    results["load_generators"] = measure(lambda: load_generators(json_file), repeat)
+
+    settings, bus, module, header, documentation, testbench = load_generators(json_file)
+    stages = generator_stages(bus, module, header, documentation, testbench)
+    for name, func in stages.items():
+        results[name] = measure(func, repeat)
+
+    args = {"-o": os.path.join(tmp, "out"), "-F": True, "-p": True, "-r": True}
+    gs = get_gen_settings(args, settings, bus)
+    results["generate_output"] = measure(
+        lambda: generate_output(
+            settings, bus, module, header, documentation, testbench, gs
+        ),
+        repeat,
+    )
+    return results
+
+
+def run(sizes, bus_types, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for bus_type in bus_types:
+            for n_registers in sizes:
+                key = "{}/{}".format(bus_type, n_registers)
+                print("Benchmarking {}...".format(key), file=sys.stderr)
+                results[key] = benchmark_module(n_registers, bus_type, repeat, tmp)
+    return {
+        "bust": __VERSION__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """! @brief Print the results next to the baseline
+
+    Returns the number of stages that are slower or use more memory than allowed.
+    """
+    regressions = 0
+    row = "{:<12} {:<28} {:>10} {:>10} {:>7} {:>12} {:>12} {:>7}"
+    print(
+        row.format(
+            "module", "stage", "time", "baseline", "ratio", "peak", "baseline", "ratio"
+        )
+    )
+    for key, stages in results["results"].items():
+        base_stages = baseline["results"].get(key, {})
+        for name, result in stages.items():
+            base = base_stages.get(name)
+            if base is None:
+                continue
+            time_ratio = result["time"] / max(base["time"], 1e-9)
+            peak_ratio = result["peak"] / max(base["peak"], 1)
+            slower = (
+                time_ratio > 1 + tolerance
+                and result["time"] - base["time"] > MIN_TIME_DELTA
+            )
+            larger = peak_ratio > 1 + memory_tolerance
+            flag = ""
+            if slower or larger:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(
+                row.format(
+                    key,
+                    name,
+                    "{:.4f}".format(result["time"]),
+                    "{:.4f}".format(base["time"]),
+                    "{:.2f}".format(time_ratio),
+                    result["peak"],
+                    base["peak"],
+                    "{:.2f}".format(peak_ratio),
+                )
+                + flag
+            )
+    return regressions
+
+
+def main():
+    args = docopt(__doc__, help=True)
+    sizes = [int(n) for n in args["-n"].split(",")]
+    bus_types = args["-b"].split(",")
+    results = run(sizes, bus_types, int(args["-r"]))
+
+    if args["-o"] is not None:
+        with open(args["-o"], "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+            f.write("\n")
+
+    if args["--check"] is not None:
+        with open(args["--check"]) as f:
+            baseline = json.load(f)
+        regressions = compare(
+            results,
+            baseline,
+            float(args["--tolerance"]),
+            float(args["--memory-tolerance"]),
+        )
+        if regressions:
+            print("{} regressions".format(regressions))
+            sys.exit(1)
+    elif args["-o"] is None:
+        json.dump(results, sys.stdout, indent=1, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
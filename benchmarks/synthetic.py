@@ -0,0 +1,87 @@
+"""! @package synthetic
+Generates synthetic module configurations for the benchmarks
+
+"""
+import random
+
+
+def synthetic_register(rng, index, bus_type="axi", data_width=32):
+    """! @brief Returns the JSON dictionary of a random register named r<index>"""
+    reg = {"name": "r{}".format(index)}
+    reg["mode"] = rng.choices(["rw", "ro", "pulse"], [4, 4, 2])[0]
+    reg["type"] = rng.choice(["sl", "slv", "default", "fields"])
+    reg["address"] = hex(index * data_width // 8)
+
+    if reg["type"] == "slv":
+        reg["width"] = rng.randint(2, data_width)
+        width = reg["width"]
+    elif reg["type"] == "sl":
+        width = 1
+    elif reg["type"] == "default":
+        width = data_width
+    else:
+        fields = []
+        remaining = data_width
+        for i in range(rng.randint(1, 8)):
+            if remaining == 0:
+                break
+            field = {"name": "f{}".format(i), "type": rng.choice(["sl", "slv"])}
+            if field["type"] == "slv" and remaining > 1:
+                field["width"] = rng.randint(2, min(remaining, 16))
+            else:
+                field["type"] = "sl"
+            field_width = field.get("width", 1)
+            if reg["mode"] != "ro":
+                field["reset"] = hex(rng.getrandbits(field_width))
+            field["description"] = "Field {} of register {}".format(i, index)
+            fields.append(field)
+            remaining -= field_width
+        reg["fields"] = fields
+
+    if reg["mode"] == "pulse":
+        reg["pulse_cycles"] = rng.randint(1, 50)
+    if reg["mode"] != "ro" and reg["type"] != "fields":
+        reg["reset"] = hex(rng.getrandbits(width))
+    if bus_type == "ipbus" and reg["mode"] != "pulse" and rng.random() < 0.05:
+        reg["stall_cycles"] = rng.randint(2, 255)
+
+    reg["description"] = "Synthetic {} {} register number {}".format(
+        reg["mode"], reg["type"], index
+    )
+    return reg
+
+
+def synthetic_module(n_registers, bus_type="axi", seed=0):
+    """! @brief Returns the JSON dictionary of a module with n_registers registers
+
+    The registers mix all modes and types, with up to 8 fields, and some stall
+    registers on IPBus. The same seed always gives the same module.
+    """
+    rng = random.Random(seed)
+    settings = {
+        "mod_subdir": True,
+        "uvvm_rel_path": "../../../UVVM",
+        "coverage": True,
+    }
+    bus = {"type": bus_type, "addr_width": 32, "data_width": 32}
+    if bus_type == "axi":
+        settings["bus_subdir"] = False
+        bus["comp_library"] = "bust"
+    else:
+        settings["ipbus_rel_path"] = "../../../ipbus-firmware"
+        settings["vip_ipbus_rel_path"] = "../../../vip_ipbus"
+
+    registers = [
+        synthetic_register(rng, i, bus_type, bus["data_width"])
+        for i in range(n_registers)
+    ]
+    return {
+        "settings": settings,
+        "bus": bus,
+        "module": {
+            "name": "synthetic_{}".format(n_registers),
+            "version": "1.0",
+            "description": "Synthetic module with {} registers".format(n_registers),
+            "register": registers,
+        },
+    }
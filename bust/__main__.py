@@ -2,21 +2,30 @@
 """bust register tool
 
 Usage:
-  bust.py FILE [-o DIR] [[[-F | -f] [-u] [-d | -p] [-b] [-t] [-i] [-m]] | [-a] | [-c | -e]]
+  bust.py FILE [-o DIR] [--no-cache] [[[-F | -f] [--overwrite=POLICY] [-u] [-r] [--if-changed] [-d | -p] [-b] [-t] [-i] [-m] [-j N] [--profile] [--profile-json OUT]] | [-a [--overwrite=POLICY]] | [-c | -e]]
   bust.py --version
   bust.py -h | --help
 
 Options:
   -o DIR         Specify output directory. Overrides settings (either JSON dir, or specified project dir in JSON)
+  --no-cache     Parse FILE, instead of loading the model from the cache of earlier runs
   -f             Force overwrite of existing files except module top level VHDL file
   -F             Force overwrite of ALL existing files
+  --overwrite=POLICY  What to do with existing files that are not forced by -f or -F:
+                 ask, always, never, if-changed or fail. ask fails when not run
+                 from a terminal [default: ask]
   -u             Try to update top-level file - MAY OVERWRITE USER EDITS!
+  -r             Regenerate all files, also those that are up to date
+  --if-changed   Leave existing files with unchanged content untouched
   -d             Do not generate documentation (neither LaTeX nor PDF)
   -p             Do not generate PDF from LaTeX
   -b             Do not generate the bus VHDL package file
   -t             Do not generate the testbench VHDL file and the simulation scripts
   -i             Do not generate the include header files (.h, .hpp & .py)
   -m             Do not generate the module VHDL files
+  -j N --jobs=N  Render the output files on N processes, 0 uses all CPUs [default: 1]
+  --profile      Print the time and memory used by each stage
+  --profile-json OUT  Write the time and memory used by each stage to OUT as JSON
   -a             Update register addresses and save JSON file
   -e             Edit the JSON file
   -c             Create a new JSON file
@@ -26,28 +35,32 @@ Options:
 Arguments:
   FILE         Module configuration file, JSON format
   DIR          Output directory for VHDL, header files and documentation
+  N            Number of worker processes
+  OUT          Output file of the profile
 
 """
 from docopt import docopt
 import sys
 import logging
 
-from bust.utils import json_parser, write_string_to_file
-from bust.module import Module
-from bust.bus import Bus
-from bust.header import Header
-from bust.documentation import Documentation
-from bust.settings import Settings
-from bust.testbench import Testbench
-from bust.generation import generate_output
+from bust.utils import write_string_to_file
+from bust.generation import (
+    generate_output,
+    get_gen_settings,
+    get_jobs,
+    load_generators,
+)
+from bust.cache import ModelCache
+from bust.profiling import Profiler
 from bust.exceptions import (
     FormatError,
     InvalidAddress,
     InvalidRegister,
+    InvalidBusOption,
     InvalidBusType,
     InvalidResetMode,
 )
-from bust.editor import Editor
+from bust.vhdl import InvalidVHDLIdentifier, NonUniqueIdentifer
 from bust._version import __VERSION__
 
 
@@ -73,27 +86,36 @@ def main():
 
         if args["FILE"] is not None:
             json_file = args["FILE"]
+            cache = None
+            if not args["--no-cache"]:
+                cache = ModelCache()
+
+            if (args["-c"] or args["-e"]) and json_file is not None:
+                # The editor and its menu libraries are only loaded when used
+                from bust.editor import Editor
 
             if args["-c"] and json_file is not None:
-                e = Editor(False, json_file)
+                e = Editor(False, json_file, cache=cache)
                 e.show_menu()
                 exit()
 
             if args["-e"] and json_file is not None:
-                e = Editor(True, json_file)
+                e = Editor(True, json_file, cache=cache)
                 e.show_menu()
                 exit()
 
             logger.info("Parsing file: " + json_file + "...")
+            profiler = Profiler(bool(args["--profile"] or args["--profile-json"]))
 
             try:
-                json_dict = json_parser(json_file)
-                settings = Settings(json_file, json_dict["settings"])
-                bus = Bus(json_dict["bus"])
-                module = Module(json_dict["module"], bus, settings)
-                header = Header(module)
-                documentation = Documentation(module)
-                testbench = Testbench(module, bus.get_VHDL_generator(), settings)
+                (
+                    settings,
+                    bus,
+                    module,
+                    header,
+                    documentation,
+                    testbench,
+                ) = load_generators(json_file, profiler, cache)
 
             except (
                 FormatError,
@@ -101,6 +123,9 @@ def main():
                 InvalidRegister,
                 InvalidResetMode,
                 InvalidBusType,
+                InvalidBusOption,
+                InvalidVHDLIdentifier,
+                NonUniqueIdentifer,
                 NotImplementedError,
             ) as e:
                 logger.error(str(e))
@@ -111,69 +136,33 @@ def main():
                 logger.debug(str(e))
                 exit(1)
 
-            # File generation settings
-            gs = {}
-
-            if args["-o"] is None:
-                gs["dir"] = settings.project_path
-            else:
-                gs["dir"] = args["-o"]
-
-            # Check if force overwrite is set
-            gs["force_ow"] = False
-            gs["force_ow_top"] = False
-            if args["-F"]:
-                gs["force_ow"] = True
-                gs["force_ow_top"] = True
-            elif args["-f"]:
-                gs["force_ow"] = True
-
-            # Check if top-level are to be updated
-            gs["update_top"] = False
-            if args["-u"]:
-                gs["update_top"] = True
-                gs["force_ow_top"] = True
-
-            if bus.bus_type == "axi":
-                gs["gen_bus"] = True
-            else:
-                gs["gen_bus"] = False
-            if args["-b"]:
-                gs["gen_bus"] = False
-
-            gs["gen_doc"] = True
-            gs["gen_pdf"] = True
-            if args["-d"]:
-                gs["gen_doc"] = False
-                gs["gen_pdf"] = False
-            elif args["-p"]:
-                gs["gen_pdf"] = False
-
-            gs["gen_tb"] = True
-            if args["-t"]:
-                gs["gen_tb"] = False
-
-            gs["gen_header"] = True
-            if args["-i"]:
-                gs["gen_header"] = False
-
-            gs["gen_mod"] = True
-            if args["-m"]:
-                gs["gen_mod"] = False
+            try:
+                # File generation settings
+                gs = get_gen_settings(args, settings, bus)
+                gs["profiler"] = profiler
+                gs["jobs"] = get_jobs(args["--jobs"])
+            except ValueError as e:
+                logger.error(str(e))
+                exit(1)
 
             if args["-a"]:
                 module.update_addresses()
                 json = module.return_JSON(True)
                 try:
-                    write_string_to_file(json, json_file, ".")
+                    write_string_to_file(json, json_file, ".", policy=gs["overwrite"])
                 except Exception as e:
                     print("Saving failed...")
                     print(e)
-                    return
+                    exit(1)
             else:
                 generate_output(
                     settings, bus, module, header, documentation, testbench, gs
                 )
+                profiler.stop()
+                if args["--profile"]:
+                    print(profiler.table())
+                if args["--profile-json"]:
+                    profiler.save(args["--profile-json"], module.name)
 
     except Exception:
         logger.exception("An unresolvable error has occurred...")
@@ -0,0 +1,319 @@
+"""bust batch mode
+
+Generates the output files of many modules on a pool of worker processes. Existing
+files are only overwritten when forced or as given by --overwrite, nothing is asked
+interactively.
+
+Usage:
+  bust-batch FILE... [-o DIR] [--no-cache] [-F | -f] [--overwrite=POLICY] [-r] [--if-changed] [-d | -p] [-b] [-t] [-i] [-m] [-j N] [--latex-jobs=N] [-v] [--profile] [--profile-json OUT]
+  bust-batch --version
+  bust-batch -h | --help
+
+Options:
+  -o DIR         Specify output directory. Overrides settings (either JSON dir, or specified project dir in JSON)
+  --no-cache     Parse FILE, instead of loading the model from the cache of earlier runs
+  -f             Force overwrite of existing files except module top level VHDL file
+  -F             Force overwrite of ALL existing files
+  --overwrite=POLICY  What to do with existing files that are not forced by -f or -F:
+                 always, never, if-changed or fail [default: never]
+  -r             Regenerate all files, also those that are up to date
+  --if-changed   Leave existing files with unchanged content untouched
+  -d             Do not generate documentation (neither LaTeX nor PDF)
+  -p             Do not generate PDF from LaTeX
+  -b             Do not generate the bus VHDL package files
+  -t             Do not generate the testbench VHDL file and the simulation scripts
+  -i             Do not generate the include header files (.h, .hpp & .py)
+  -m             Do not generate the module VHDL files
+  -j N --jobs=N  Number of worker processes, 0 uses all CPUs [default: 0]
+  --latex-jobs=N  Number of pdflatex processes at a time, 0 uses all CPUs [default: 0]
+  -v             Log the progress of every module
+  --profile      Print the time and memory used by each stage of every module
+  --profile-json OUT  Write the time and memory used by each stage of every module to OUT as JSON
+  -h --help      HELP!
+  --version      Show version info
+
+Arguments:
+  FILE         Module configuration files in JSON format, or glob patterns matching them
+  DIR          Output directory for VHDL, header files and documentation
+  N            Number of worker processes
+  OUT          Output file of the profiles
+
+"""
+from docopt import docopt
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import json
+import logging
+import os
+import sys
+
+from bust.generation import (
+    generate_output,
+    get_gen_settings,
+    get_jobs,
+    get_manifest,
+    get_output_dirs,
+    load_generators,
+    pdf_up_to_date,
+    record_pdf,
+    write_emitted_to_file,
+)
+from bust.cache import ModelCache
+from bust.profiling import Profiler
+from bust._version import __VERSION__
+
+logger = logging.getLogger(__name__)
+
+## Outcome of generating the output files of one module
+#
+# bus_pkg is a (directory, bus) tuple for the bus package the module needs, or None.
+# pdf is a (tex_file, tex_hash, manifest path) tuple for the PDF to generate, or None
+# if it is not wanted or up to date.
+# profile is the Profiler report of the module, if profiling was asked for.
+Result = namedtuple(
+    "Result",
+    [
+        "json_file",
+        "error",
+        "written",
+        "skipped",
+        "unchanged",
+        "bus_pkg",
+        "pdf",
+        "profile",
+    ],
+    defaults=(None, None),
+)
+
+
+def expand_files(patterns):
+    """! @brief Returns the files matched by patterns, in order and without duplicates
+
+    A pattern that matches nothing is kept as it is, so that the missing file is
+    reported.
+    """
+    files = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def _init_worker(level):
+    # Only has an effect when the worker does not inherit the parent's logging
+    logging.basicConfig(level=level, format="%(message)s")
+
+
+def generate_module(json_file, args):
+    """! @brief Generate the output files of one module without asking anything
+
+    The bus package is not written, but returned in the Result so that it is
+    only written once per directory. Neither is the PDF generated, so that the
+    pdflatex processes of all modules can share one limit.
+    """
+    args = dict(args, **{"--overwrite": args.get("--overwrite") or "never"})
+    profiler = Profiler(bool(args.get("--profile") or args.get("--profile-json")))
+    try:
+        logger.info("Parsing file: " + json_file + "...")
+        cache = None if args.get("--no-cache") else ModelCache()
+        settings, bus, module, header, documentation, testbench = load_generators(
+            json_file, profiler, cache
+        )
+        gs = get_gen_settings(args, settings, bus)
+        if gs["overwrite"] == "ask":
+            raise ValueError("Cannot ask before overwriting files in batch mode")
+        gs["profiler"] = profiler
+        dirs = get_output_dirs(settings, bus, module, gs)
+        bus_pkg = None
+        if gs["gen_bus"]:
+            bus_pkg = (dirs["bus_hdl"], bus)
+            gs["gen_bus"] = False
+        gen_pdf = gs["gen_pdf"]
+        gs["gen_pdf"] = False
+        summary = generate_output(
+            settings, bus, module, header, documentation, testbench, gs
+        )
+        pdf = None
+        if gen_pdf:
+            tex_file = os.path.join(dirs["mod_doc"], module.name + ".tex")
+            manifest = get_manifest(module, dirs)
+            up_to_date, tex_hash = pdf_up_to_date(tex_file, manifest)
+            if not up_to_date:
+                pdf = (tex_file, tex_hash, manifest.path)
+    except SystemExit:
+        # generate_output has logged the reason
+        return Result(json_file, "Generation failed", [], [], [], None)
+    except Exception as e:
+        return Result(json_file, str(e) or type(e).__name__, [], [], [], None)
+    finally:
+        profiler.stop()
+    profile = None
+    if profiler.enabled:
+        profile = profiler.report(module.name)
+        profile["file"] = json_file
+    return Result(
+        json_file,
+        None,
+        summary.written,
+        summary.skipped,
+        summary.unchanged,
+        bus_pkg,
+        pdf,
+        profile,
+    )
+
+
+def write_bus_packages(results, force_overwrite, if_changed=False, policy="never"):
+    """! @brief Write the bus package of every output directory once
+
+    Returns a Result for each package written or kept.
+    """
+    packages = []
+    done = {}
+    for result in results:
+        if result.bus_pkg is None:
+            continue
+        output_dir, bus = result.bus_pkg
+        key = os.path.abspath(output_dir)
+        pkg = bus.return_bus_pkg_VHDL()
+        if key in done:
+            if done[key] != pkg:
+                logger.warning(
+                    "{}: bus package differs from the one already written to {}".format(
+                        result.json_file, output_dir
+                    )
+                )
+            continue
+        done[key] = pkg
+
+        filename = "{}_pkg.vhd".format(bus.bus_type)
+        path = os.path.join(output_dir, filename)
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            written = write_emitted_to_file(
+                lambda e: e.write(pkg),
+                filename,
+                output_dir,
+                force_overwrite,
+                policy,
+                if_changed=if_changed,
+            )
+        except Exception as e:
+            packages.append(Result(path, str(e), [], [], [], None))
+            continue
+        if written:
+            packages.append(Result(path, None, [path], [], [], None))
+        else:
+            packages.append(Result(path, None, [], [path], [], None))
+    return packages
+
+
+def print_summary(results, packages):
+    failed = [r for r in results + packages if r.error is not None]
+    n_written = sum(len(r.written) for r in results + packages)
+    n_skipped = sum(len(r.skipped) for r in results + packages)
+    n_unchanged = sum(len(r.unchanged) for r in results)
+    print(
+        "{} modules: {} succeeded, {} failed. {} files written, {} up to date, "
+        "{} existing files kept.".format(
+            len(results),
+            len([r for r in results if r.error is None]),
+            len([r for r in results if r.error is not None]),
+            n_written,
+            n_unchanged,
+            n_skipped,
+        )
+    )
+    for result in failed:
+        print("FAILED {}: {}".format(result.json_file, result.error))
+
+
+def generate_pdfs(futures, max_jobs):
+    """! @brief Generate the PDFs of the modules as their results come in
+
+    Returns the results, with the modules whose PDF failed marked as failed.
+    """
+    from bust.latex import LatexRunner
+    from bust.manifest import Manifest
+
+    latex = LatexRunner(max_jobs)
+    results = []
+    for future in futures:
+        result = future.result()
+        if result.pdf is not None:
+            latex.start(result.pdf[0])
+        results.append(result)
+    errors = {}
+    for tex_file, message in latex.wait():
+        errors[tex_file] = "PDF generation failed: " + message
+
+    for i, result in enumerate(results):
+        if result.pdf is None:
+            continue
+        tex_file, tex_hash, manifest_path = result.pdf
+        record_pdf(Manifest(manifest_path), tex_file, tex_hash, tex_file not in errors)
+        if result.error is None and tex_file in errors:
+            results[i] = result._replace(error=errors[tex_file])
+    return results
+
+
+def print_profiles(results):
+    for result in results:
+        if result.profile is None:
+            continue
+        profiler = Profiler()
+        profiler.add(result.profile["stages"])
+        print("\n" + result.json_file)
+        print(profiler.table())
+
+
+def main():
+    args = docopt(__doc__, help=True, version="bust " + __VERSION__)
+    level = logging.INFO if args["-v"] else logging.WARNING
+    logging.basicConfig(level=level, format="%(message)s")
+
+    try:
+        jobs = get_jobs(args["--jobs"])
+        latex_jobs = get_jobs(args["--latex-jobs"])
+        if args["--overwrite"] not in ["always", "never", "if-changed", "fail"]:
+            raise ValueError(
+                "Overwrite policy must be one of: always, never, if-changed, fail"
+            )
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    files = expand_files(args["FILE"])
+    workers = min(jobs, len(files)) or 1
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(level,)
+    ) as executor:
+        futures = [executor.submit(generate_module, f, args) for f in files]
+        results = generate_pdfs(futures, latex_jobs)
+
+    packages = write_bus_packages(
+        results, args["-F"] or args["-f"], args["--if-changed"], args["--overwrite"]
+    )
+
+    if args["--profile"]:
+        print_profiles(results)
+    if args["--profile-json"]:
+        with open(args["--profile-json"], "w") as f:
+            profiles = [r.profile for r in results if r.profile is not None]
+            json.dump(profiles, f, indent=1)
+            f.write("\n")
+
+    print_summary(results, packages)
+    if any(r.error is not None for r in results + packages):
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 from collections import OrderedDict
 
 from bust.bus_vhdl_gen import BusVHDLGen
-from bust.exceptions import InvalidBusType
+from bust.exceptions import InvalidBusOption, InvalidBusType
 
 
 class Bus(object):
     """! @brief Managing bus information"""
 
     supported_bus = ["axi", "ipbus"]
+    supported_read_decodes = ["auto", "priority", "onehot"]
+    supported_read_pipeline_stages = list(range(9))
+    supported_write_modes = {"axi": ["standard", "throughput"], "ipbus": ["standard"]}
+    supported_read_modes = {
+        "axi": ["standard", "streaming", "low_latency"],
+        "ipbus": ["standard", "low_latency"],
+    }
     default_comp_library = "work"
     default_comp_library_ipbus = "ipbus"
 
@@ -27,6 +34,39 @@ class Bus(object):
         else:
             self.comp_library = Bus.default_comp_library
 
+        self.read_decode = bus.get("read_decode", "auto")
+        if self.read_decode not in Bus.supported_read_decodes:
+            raise InvalidBusOption(
+                "read_decode", self.read_decode, Bus.supported_read_decodes
+            )
+
+        self.read_mode = bus.get("read_mode", "standard")
+        if self.read_mode not in Bus.supported_read_modes[self.bus_type]:
+            raise InvalidBusOption(
+                "read_mode", self.read_mode, Bus.supported_read_modes[self.bus_type]
+            )
+
+        self.read_pipeline_stages = bus.get("read_pipeline_stages", 0)
+        if self.read_mode == "standard":
+            supported_stages = Bus.supported_read_pipeline_stages
+        else:
+            # The read path of the other read modes is not pipelined
+            supported_stages = [0]
+        if self.read_pipeline_stages not in supported_stages:
+            raise InvalidBusOption(
+                "read_pipeline_stages", self.read_pipeline_stages, supported_stages
+            )
+
+        self.write_mode = bus.get("write_mode", "standard")
+        if self.write_mode not in Bus.supported_write_modes[self.bus_type]:
+            raise InvalidBusOption(
+                "write_mode",
+                self.write_mode,
+                Bus.supported_write_modes[self.bus_type],
+            )
+
+        self._vhdl_gen = None
+
         # Set reset type and short name based on bus
         if self.bus_type == "axi":
             self.short_name = "axi"
@@ -43,15 +83,30 @@ class Bus(object):
         json["reset"] = self.bus_reset
         if self.comp_library != Bus.default_comp_library:
             json["comp_library"] = self.comp_library
+        if self.read_decode != "auto":
+            json["read_decode"] = self.read_decode
+        if self.read_mode != "standard":
+            json["read_mode"] = self.read_mode
+        if self.read_pipeline_stages != 0:
+            json["read_pipeline_stages"] = self.read_pipeline_stages
+        if self.write_mode != "standard":
+            json["write_mode"] = self.write_mode
         return json
 
     def get_VHDL_generator(self):
-        return BusVHDLGen(
-            bus_type=self.bus_type,
-            comp_library=self.comp_library,
-            data_width=self.data_width,
-            addr_width=self.addr_width,
-        )
+        """! @brief Returns the BusVHDLGen of the bus, created on the first call"""
+        if self._vhdl_gen is None:
+            self._vhdl_gen = BusVHDLGen(
+                bus_type=self.bus_type,
+                comp_library=self.comp_library,
+                data_width=self.data_width,
+                addr_width=self.addr_width,
+                read_decode=self.read_decode,
+                read_pipeline_stages=self.read_pipeline_stages,
+                write_mode=self.write_mode,
+                read_mode=self.read_mode,
+            )
+        return self._vhdl_gen
 
     def return_bus_pkg_VHDL(self):
         v_gen = self.get_VHDL_generator()
@@ -60,3 +115,7 @@ class Bus(object):
     def return_bus_pif_VHDL(self, mod):
         v_gen = self.get_VHDL_generator()
         return v_gen.return_bus_pif_VHDL(mod=mod)
+
+    def emit_bus_pif_VHDL(self, e, mod):
+        v_gen = self.get_VHDL_generator()
+        v_gen.emit_bus_pif_VHDL(e, mod=mod)
@@ -1,5 +1,17 @@
+from bust.emitter import Emitter
 from bust.utils import indent_string
-from bust.vhdl import async_process, sync_process, comb_process, comb_process_with_reset
+from bust.vhdl import (
+    async_process_block,
+    sync_process_block,
+    comb_process_block,
+    comb_process_with_reset_block,
+    sync_process,
+)
+
+
+# With read_decode "auto", modules with more readable registers than this get the
+# one-hot read decode
+ONEHOT_READ_THRESHOLD = 32
 
 
 class BusVHDLGen:
@@ -9,10 +21,18 @@ class BusVHDLGen:
         comp_library,
         data_width,
         addr_width,
+        read_decode="auto",
+        read_pipeline_stages=0,
+        write_mode="standard",
+        read_mode="standard",
     ):
         """Code generator for the Bus module."""
         self.bus_type = bus_type
         self.comp_library = comp_library
+        self.read_decode = read_decode
+        self.read_pipeline_stages = read_pipeline_stages
+        self.write_mode = write_mode
+        self.read_mode = read_mode
         self.clk_name = "clk"
         self.data_width = data_width
         self.addr_width = addr_width
@@ -106,23 +126,28 @@ class BusVHDLGen:
         return s
 
     def return_bus_pif_VHDL(self, mod):
+        e = Emitter()
+        self.emit_bus_pif_VHDL(e, mod)
+        return e.getvalue()
+
+    def emit_bus_pif_VHDL(self, e, mod):
         clk_name = self.clk_name
         reset_name = self.reset_name
 
-        s = "library ieee;\n"
-        s += "use ieee.std_logic_1164.all;\n"
-        s += "use ieee.numeric_std.all;\n"
-        s += "\n"
+        e.write("library ieee;\n")
+        e.write("use ieee.std_logic_1164.all;\n")
+        e.write("use ieee.numeric_std.all;\n")
+        e.write("\n")
         if self.comp_library != "work":
-            s += "library " + self.comp_library + ";\n"
+            e.write("library " + self.comp_library + ";\n")
         if self.bus_type == "ipbus":
-            s += "use " + self.comp_library + "." + self.bus_type + ".all;\n"
+            e.write("use " + self.comp_library + "." + self.bus_type + ".all;\n")
         else:
-            s += "use " + self.comp_library + "." + self.bus_type + "_pkg.all;\n"
-        s += "use work." + mod.name + "_pif_pkg.all;\n\n"
+            e.write("use " + self.comp_library + "." + self.bus_type + "_pkg.all;\n")
+        e.write("use work." + mod.name + "_pif_pkg.all;\n\n")
 
-        s += "entity " + mod.name + "_" + self.short_name + "_pif is\n\n"
-        s += indent_string("generic (\n")
+        e.write("entity " + mod.name + "_" + self.short_name + "_pif is\n\n")
+        e.write("generic (\n", 1)
         par = "-- " + self.bus_type.upper() + " Bus Interface Generics\n"
         par += (
             "g_"
@@ -134,9 +159,9 @@ class BusVHDLGen:
         par += "g_check_baseaddr      : boolean := true;\n"
         par += "g_module_addr_width   : integer := 0\n"
         par += ");\n"
-        s += indent_string(par, 2)
+        e.write(par, 2)
 
-        s += indent_string("port (")
+        e.write("port (", 1)
 
         par = ""
         if mod.count_rw_regs() + mod.count_ro_regs() + mod.count_pulse_regs() > 0:
@@ -190,11 +215,15 @@ class BusVHDLGen:
             par += "{}_out        : out {}\n".format(self.short_name, self.out_type)
 
         par += ");\n"
-        s += indent_string(par, 2)
-        s += "end " + mod.name + "_" + self.short_name + "_pif;\n\n"
-
-        s += "architecture behavior of {}_{}_pif is\n\n".format(
-            mod.name, self.short_name
+        # The port list continues the "port (" line, so it cannot be indented as a
+        # whole like the generic list above
+        e.write(par, 2)
+        e.write("end " + mod.name + "_" + self.short_name + "_pif;\n\n")
+
+        e.write(
+            "architecture behavior of {}_{}_pif is\n\n".format(
+                mod.name, self.short_name
+            )
         )
 
         if self.bus_type == "ipbus":
@@ -211,38 +240,56 @@ class BusVHDLGen:
                 + self.short_name
                 + "_baseaddr;\n"
             )
-        s += indent_string(par)
+        e.write(par, 1)
 
-        s += "\n"
+        e.write("\n")
 
         if mod.count_rw_regs() + mod.count_pulse_regs() > 0:
-            par = ""
-            par += "-- internal signal for readback" + "\n"
-            s += indent_string(par)
+            e.write("-- internal signal for readback" + "\n", 1)
             if mod.count_rw_regs() > 0:
                 par = "signal " + self.short_name + "_rw_regs_i    : t_"
                 par += mod.name + "_rw_regs := c_" + mod.name + "_rw_regs;\n"
-                s += indent_string(par)
+                e.write(par, 1)
             if mod.count_pulse_regs() > 0:
                 par = "signal " + self.short_name + "_pulse_regs_i : t_"
                 par += mod.name + "_pulse_regs := c_" + mod.name + "_pulse_regs;\n"
-                s += indent_string(par)
+                e.write(par, 1)
                 par = "signal " + self.short_name + "_pulse_regs_cycle : t_"
                 par += mod.name + "_pulse_regs := c_" + mod.name + "_pulse_regs;\n"
-                s += indent_string(par)
+                e.write(par, 1)
 
-        s += "\n"
+        e.write("\n")
 
         # Add bus-specific logic
         if self.bus_type == "axi":
-            s += self.return_axi_pif_VHDL(mod, clk_name, str.strip(reset_name))
+            self.emit_axi_pif_VHDL(e, mod)
         elif self.bus_type == "ipbus":
-            s += self.return_ipbus_pif_VHDL(mod, clk_name, str.strip(reset_name))
+            self.emit_ipbus_pif_VHDL(e, mod)
 
-        return s
+    def _process_block(self, e, process_name, reset_string, variables=None):
+        """! @brief Writes a clocked process using the reset scheme of the bus
 
-    def return_axi_pif_VHDL(self, mod, clk_name, reset_name):
-        s = ""
+        The process logic is written inside the with-block.
+        """
+        if self.bus_reset == "async":
+            process_block = async_process_block
+        else:
+            process_block = sync_process_block
+        return process_block(
+            e,
+            self.clk_name,
+            str.strip(self.reset_name),
+            process_name,
+            reset_string,
+            self.reset_active_low,
+            variables,
+        )
+
+    def _process(self, e, process_name, reset_string, logic_string, variables=None):
+        with self._process_block(e, process_name, reset_string, variables):
+            e.write(logic_string)
+
+    def emit_axi_pif_VHDL(self, e, mod):
         par = "-- internal bus signals for readback\n"
         par += "signal awaddr_i      : t_" + mod.name + "_addr;\n"
         par += "signal awready_i     : std_logic;\n"
@@ -267,16 +314,47 @@ class BusVHDLGen:
         par += "signal valid_baseaddr_wr : std_logic := '0';\n"
         par += "signal valid_baseaddr_rd : std_logic := '0';\n\n"
 
-        s += indent_string(par)
-
-        s += "begin\n\n"
+        throughput = self.write_mode == "throughput"
+        if throughput:
+            par += "-- write address and data skid buffers\n"
+            par += "signal aw_valid_q    : std_logic;\n"
+            par += "signal aw_skid_valid : std_logic;\n"
+            par += "signal aw_skid_addr  : t_" + mod.name + "_addr;\n"
+            par += "signal wdata_i       : t_" + mod.name + "_data;\n"
+            par += "signal w_valid_q     : std_logic;\n"
+            par += "signal w_skid_valid  : std_logic;\n"
+            par += "signal w_skid_data   : t_" + mod.name + "_data;\n\n"
+
+        streaming = self.read_mode == "streaming"
+        if streaming:
+            par += "-- read address and data skid buffers\n"
+            par += "signal ar_valid_q    : std_logic;\n"
+            par += "signal ar_skid_valid : std_logic;\n"
+            par += "signal ar_skid_addr  : t_" + mod.name + "_addr;\n"
+            par += "signal r_ready_i     : std_logic;\n"
+            par += "signal r_valid_q     : std_logic;\n"
+            par += "signal r_skid_valid  : std_logic;\n"
+            par += "signal r_skid_data   : t_" + mod.name + "_data;\n\n"
+        elif self.read_mode == "low_latency":
+            par += "-- read data holding register\n"
+            par += "signal r_valid_q     : std_logic;\n"
+            par += "signal r_skid_valid  : std_logic;\n"
+            par += "signal r_skid_data   : t_" + mod.name + "_data;\n\n"
+
+        stages = self.read_pipeline_stages
+        if stages > 0:
+            par += self._read_pipeline_signals(mod)
+
+        e.write(par, 1)
+
+        e.write("begin\n\n")
 
         if mod.count_rw_regs() > 0:
-            s += indent_string("axi_rw_regs <= axi_rw_regs_i") + ";\n"
+            e.write("axi_rw_regs <= axi_rw_regs_i" + ";\n", 1)
         if mod.count_pulse_regs() > 0:
-            s += indent_string("axi_pulse_regs <= axi_pulse_regs_i") + ";\n"
+            e.write("axi_pulse_regs <= axi_pulse_regs_i" + ";\n", 1)
         if mod.count_rw_regs() + mod.count_pulse_regs() > 0:
-            s += "\n"
+            e.write("\n")
 
         par = ""
         par += "awready <= awready_i;\n"
@@ -289,138 +367,30 @@ class BusVHDLGen:
         par += "rvalid  <= rvalid_i;\n"
         par += "\n"
 
-        s += indent_string(par)
-
-        s += indent_string(
-            "register_sel_wr <= awaddr_i(C_MODULE_ADDR_WIDTH-1 downto 0);\n"
-        )
-        s += indent_string(
-            "register_sel_rd <= araddr_i(C_MODULE_ADDR_WIDTH-1 downto 0);\n\n"
-        )
-
-        par = "gen_check_baseaddr : if g_check_baseaddr generate\n"
-        par += indent_string(
-            "valid_baseaddr_wr <= '1' when awaddr_i(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n"
-        )
-        par += indent_string(
-            "valid_baseaddr_rd <= '1' when araddr_i(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n"
-        )
-        par += "else generate\n"
-        par += indent_string("valid_baseaddr_wr <= '1';\n")
-        par += indent_string("valid_baseaddr_rd <= '1';\n")
-        par += "end generate gen_check_baseaddr;\n\n"
-        s += indent_string(par)
-
-        ####################################################################
-        # p_awready
-        ####################################################################
-        reset_string = "awready_i <= '0';"
-
-        logic_string = "if (awready_i = '0' and awvalid = '1'  and wvalid = '1') then\n"
-        logic_string += indent_string("awready_i <= '1';\n")
-        logic_string += "else\n"
-        logic_string += indent_string("awready_i <= '0';\n")
-        logic_string += "end if;"
-
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_awready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_awready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
-        s += "\n"
-
-        ####################################################################
-        # p_awaddr
-        ####################################################################
-        reset_string = "awaddr_i <= (others => '0');"
-
-        logic_string = "if (awready_i = '0' and awvalid = '1' and wvalid = '1') then\n"
-        logic_string += indent_string("awaddr_i <= awaddr;\n")
-        logic_string += "end if;"
-
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_awaddr",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_awaddr",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
-        s += "\n"
-
-        ####################################################################
-        # p_wready
-        ####################################################################
-        reset_string = "wready_i <= '0';"
+        e.write(par, 1)
 
-        logic_string = "if (wready_i = '0' and awvalid = '1' and wvalid = '1') then\n"
-        logic_string += indent_string("wready_i <= '1';\n")
-        logic_string += "else\n"
-        logic_string += indent_string("wready_i <= '0';\n")
-        logic_string += "end if;"
+        e.write("register_sel_wr <= awaddr_i(C_MODULE_ADDR_WIDTH-1 downto 0);\n", 1)
+        e.write("register_sel_rd <= araddr_i(C_MODULE_ADDR_WIDTH-1 downto 0);\n\n", 1)
 
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_wready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
+        with e.indent():
+            e.write("gen_check_baseaddr : if g_check_baseaddr generate\n")
+            e.write(
+                "valid_baseaddr_wr <= '1' when awaddr_i(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n",
+                1,
             )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_wready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
+            e.write(
+                "valid_baseaddr_rd <= '1' when araddr_i(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n",
+                1,
             )
-        s += "\n"
+            e.write("else generate\n")
+            e.write("valid_baseaddr_wr <= '1';\n", 1)
+            e.write("valid_baseaddr_rd <= '1';\n", 1)
+            e.write("end generate gen_check_baseaddr;\n\n")
 
-        s += indent_string(
-            "slv_reg_wren <= wready_i and wvalid and awready_i and awvalid;\n"
-        )
-        s += "\n"
+        if throughput:
+            self._emit_axi_throughput_write(e)
+        else:
+            self._emit_axi_standard_write(e)
 
         if mod.count_rw_regs() + mod.count_pulse_regs() > 0:
             ###################################################################
@@ -434,326 +404,675 @@ class BusVHDLGen:
                     "axi_pulse_regs_cycle <= c_" + mod.name + "_pulse_regs;\n"
                 )
 
-            logic_string = ""
-            # create a generator for looping through all pulse regs
-            if mod.count_pulse_regs() > 0:
-                logic_string += (
-                    "\n-- Return PULSE registers to reset value every clock cycle\n"
-                )
-                logic_string += (
-                    "axi_pulse_regs_cycle <= c_" + mod.name + "_pulse_regs;\n\n"
-                )
-
-            logic_string += "\nif (slv_reg_wren = '1') then\n\n"
+            wdata = "wdata_i" if throughput else "wdata"
+            with e.indent(), self._process_block(e, "p_mm_select_write", reset_string):
+                if mod.count_pulse_regs() > 0:
+                    e.write(
+                        "\n-- Return PULSE registers to reset value every clock cycle\n"
+                    )
+                    e.write(
+                        "axi_pulse_regs_cycle <= c_" + mod.name + "_pulse_regs;\n\n"
+                    )
 
-            logic_string += indent_string("if (valid_baseaddr_wr = '0') then\n\n")
-            logic_string += indent_string("null;\n\n", 2)
+                e.write("\nif (slv_reg_wren = '1') then\n\n")
 
-            # create a generator for looping through all rw and pulse regs
-            gen = (
-                reg for reg in mod.registers if reg.mode == "rw" or reg.mode == "pulse"
-            )
-            for reg in gen:
-                if reg.mode == "rw":
-                    sig_name = "axi_rw_regs_i."
-                elif reg.mode == "pulse":
-                    sig_name = "axi_pulse_regs_cycle."
-
-                par = "elsif unsigned(register_sel_wr) = resize(unsigned(C_ADDR_"
-                par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
-                logic_string += indent_string(par, 1)
-                par = ""
-                if reg.sig_type == "fields":
-
-                    for field in reg.fields:
-                        par += sig_name + reg.name + "." + field.name
-                        par += " <= wdata("
-                        par += field.get_pos_vhdl()
-                        par += ");\n"
-
-                elif reg.sig_type == "default":
-                    par += sig_name + reg.name + " <= wdata;\n"
-                elif reg.sig_type == "slv":
-                    par += sig_name + reg.name + " <= wdata("
-                    par += str(reg.width - 1) + " downto 0);\n"
-                elif reg.sig_type == "sl":
-                    par += sig_name + reg.name + " <= wdata(0);\n"
-
-                logic_string += indent_string(par, 2)
-                logic_string += "\n"
+                e.write("if (valid_baseaddr_wr = '0') then\n\n", 1)
+                e.write("null;\n\n", 2)
 
-            logic_string += indent_string("end if;\n")
-            logic_string += "end if;\n"
+                # loop through all rw and pulse regs
+                for reg in mod.views.writable:
+                    if reg.mode == "rw":
+                        sig_name = "axi_rw_regs_i."
+                    elif reg.mode == "pulse":
+                        sig_name = "axi_pulse_regs_cycle."
 
-            if self.bus_reset == "async":
-                s += indent_string(
-                    async_process(
-                        clk_name,
-                        reset_name,
-                        "p_mm_select_write",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                    )
-                )
+                    par = "elsif unsigned(register_sel_wr) = resize(unsigned(C_ADDR_"
+                    par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
+                    e.write(par, 1)
+                    e.write(self._write_assignments(reg, sig_name, wdata), 2)
+                    e.write("\n")
 
-            elif self.bus_reset == "sync":
-                s += indent_string(
-                    sync_process(
-                        clk_name,
-                        reset_name,
-                        "p_mm_select_write",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                    )
-                )
-            s += "\n"
+                e.write("end if;\n", 1)
+                e.write("end if;\n")
+            e.write("\n")
 
         # Pulse reg process
-        # create a generator for looping through all rw and pulse regs
-        gen = (reg for reg in mod.registers if reg.mode == "pulse")
-        for reg in gen:
-            s += indent_string(self.pulse_reg_process(mod, reg))
-            s += "\n"
+        for reg in mod.views.by_mode["pulse"]:
+            e.write(self.pulse_reg_process(mod, reg), 1)
+            e.write("\n")
+
+        with e.indent():
+            ####################################################################
+            # p_write_response
+            ####################################################################
+            reset_string = "bvalid_i <= '0';\n"
+            reset_string += 'bresp_i  <= "00";'
+
+            if throughput:
+                logic_string = "if (slv_reg_wren = '1') then\n"
+            else:
+                logic_string = "if (awready_i = '1' and awvalid = '1' and "
+                logic_string += (
+                    "wready_i = '1' and wvalid = '1' and bvalid_i = '0') then\n"
+                )
+            logic_string += "  bvalid_i <= '1';\n"
+            logic_string += '  bresp_i  <= "00";\n'
+            logic_string += "elsif (bready = '1' and bvalid_i = '1') then\n"
+            logic_string += "  bvalid_i <= '0';\n"
+            logic_string += "end if;"
+
+            self._process(e, "p_write_response", reset_string, logic_string)
+        e.write("\n")
+
+        if streaming:
+            self._emit_axi_streaming_read(e)
+        elif self.read_mode == "low_latency":
+            self._emit_axi_low_latency_read(e)
+        else:
+            self._emit_axi_standard_read(e)
 
         ####################################################################
-        # p_write_response
+        # p_mm_select_read
         ####################################################################
-        reset_string = "bvalid_i <= '0';\n"
-        reset_string += 'bresp_i  <= "00";'
-
-        logic_string = "if (awready_i = '1' and awvalid = '1' and wready_i = '1' "
-        logic_string += "and wvalid = '1' and bvalid_i = '0') then\n"
-        logic_string += indent_string("bvalid_i <= '1';\n")
-        logic_string += indent_string('bresp_i  <= "00";\n')
-        logic_string += "elsif (bready = '1' and bvalid_i = '1') then\n"
-        logic_string += indent_string("bvalid_i <= '0';\n")
-        logic_string += "end if;"
-
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_write_response",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
+        if stages > 0:
+            with e.indent():
+                self._emit_read_pipeline(
+                    e,
+                    mod,
+                    "register_sel_rd",
+                    "axi",
+                    "slv_reg_rden",
+                    valid_name="valid_baseaddr_rd",
                 )
-            )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_write_response",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
+                e.write("reg_data_out <= rd_stage{}(0);\n".format(stages))
+        elif self._onehot_read(mod):
+            variables = ["v_data : t_" + mod.name + "_data"]
+            with e.indent(), comb_process_block(e, "p_mm_select_read", variables):
+                e.write("reg_data_out <= (others => '0');\n")
+                e.write("v_data := (others => '0');\n\n")
+
+                e.write("-- Parallel read decode, at most one address matches\n")
+                self._emit_onehot_read_decode(
+                    e, mod.views.readable, "register_sel_rd", "axi"
                 )
-            )
-        s += "\n"
-
-        ####################################################################
-        # p_arready
-        ####################################################################
-        reset_string = "arready_i <= '0';\n"
-        reset_string += "araddr_i  <= (others => '0');"
+                e.write("\n")
 
-        logic_string = "if (arready_i = '0' and arvalid = '1') then\n"
-        logic_string += indent_string("arready_i <= '1';\n")
-        logic_string += indent_string("araddr_i  <= araddr;\n")
-        logic_string += "else\n"
-        logic_string += indent_string("arready_i <= '0';\n")
-        logic_string += "end if;"
-
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_arready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
+                e.write("if (valid_baseaddr_rd = '1') then\n")
+                e.write("reg_data_out <= v_data;\n", 1)
+                e.write("end if;\n\n")
+        else:
+            with e.indent(), comb_process_block(e, "p_mm_select_read"):
+                e.write("reg_data_out <= (others => '0');\n\n")
+
+                e.write("if (valid_baseaddr_wr = '0') then\n\n")
+                e.write("null;\n\n", 1)
+
+                for reg in mod.views.readable:
+                    par = "elsif unsigned(register_sel_rd) = resize(unsigned(C_ADDR_"
+                    par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
+                    e.write(par)
+                    e.write(self._read_assignments(reg, "axi"), 1)
+                    e.write("\n")
+
+                e.write("end if;\n\n")
+        e.write("\n")
+
+        if self.read_mode == "standard":
+            with e.indent():
+                ################################################################
+                # p_output
+                ################################################################
+                reset_string = "rdata_i <= (others => '0');"
+
+                if stages > 0:
+                    logic_string = "if (rd_pipe({}) = '1') then\n".format(stages)
+                else:
+                    logic_string = "if (slv_reg_rden = '1') then\n"
+                logic_string += "  rdata_i <= reg_data_out;\n"
+                logic_string += "end if;"
+
+                self._process(e, "p_output", reset_string, logic_string)
+            e.write("\n")
+
+        e.write("end behavior;")
+        e.write("\n")
+
+    def _emit_axi_standard_write(self, e):
+        """! @brief Writes the write channel handshakes accepting one write at a time
+
+        awready and wready are only given when awvalid and wvalid are both high,
+        and a write is accepted at most every other clock cycle.
+        """
+        with e.indent():
+            ####################################################################
+            # p_awready
+            ####################################################################
+            reset_string = "awready_i <= '0';"
+
+            logic_string = (
+                "if (awready_i = '0' and awvalid = '1'  and wvalid = '1') then\n"
             )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_arready",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
+            logic_string += "  awready_i <= '1';\n"
+            logic_string += "else\n"
+            logic_string += "  awready_i <= '0';\n"
+            logic_string += "end if;"
+
+            self._process(e, "p_awready", reset_string, logic_string)
+        e.write("\n")
+
+        with e.indent():
+            ####################################################################
+            # p_awaddr
+            ####################################################################
+            reset_string = "awaddr_i <= (others => '0');"
+
+            logic_string = (
+                "if (awready_i = '0' and awvalid = '1' and wvalid = '1') then\n"
             )
-        s += "\n"
+            logic_string += "  awaddr_i <= awaddr;\n"
+            logic_string += "end if;"
 
-        ####################################################################
-        # p_arvalid
-        ####################################################################
-        reset_string = "rvalid_i <= '0';\n"
-        reset_string += 'rresp_i  <= "00";'
+            self._process(e, "p_awaddr", reset_string, logic_string)
+        e.write("\n")
 
-        logic_string = (
-            "if (arready_i = '1' and arvalid = '1' and rvalid_i = '0') then\n"
-        )
-        logic_string += indent_string("rvalid_i <= '1';\n")
-        logic_string += indent_string('rresp_i  <= "00";\n')
-        logic_string += "elsif (rvalid_i = '1' and rready = '1') then\n"
-        logic_string += indent_string("rvalid_i <= '0';\n")
-        logic_string += "end if;"
+        with e.indent():
+            ####################################################################
+            # p_wready
+            ####################################################################
+            reset_string = "wready_i <= '0';"
 
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_arvalid",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
+            logic_string = (
+                "if (wready_i = '0' and awvalid = '1' and wvalid = '1') then\n"
             )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_arvalid",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
+            logic_string += "  wready_i <= '1';\n"
+            logic_string += "else\n"
+            logic_string += "  wready_i <= '0';\n"
+            logic_string += "end if;"
+
+            self._process(e, "p_wready", reset_string, logic_string)
+        e.write("\n")
+
+        e.write("slv_reg_wren <= wready_i and wvalid and awready_i and awvalid;\n", 1)
+        e.write("\n")
+
+    def _emit_axi_standard_read(self, e):
+        """! @brief Writes the read channel handshakes accepting one read at a time
+
+        arready is given for one clock cycle per read, and the next read is only
+        accepted when rvalid has been taken.
+        """
+        with e.indent():
+            ####################################################################
+            # p_arready
+            ####################################################################
+            reset_string = "arready_i <= '0';\n"
+            reset_string += "araddr_i  <= (others => '0');"
+
+            if self.read_pipeline_stages > 0:
+                # Only one read at a time in the pipeline
+                logic_string = "if (arready_i = '0' and arvalid = '1' and "
+                logic_string += "rd_busy = '0' and rvalid_i = '0') then\n"
+            else:
+                logic_string = "if (arready_i = '0' and arvalid = '1') then\n"
+            logic_string += "  arready_i <= '1';\n"
+            logic_string += "  araddr_i  <= araddr;\n"
+            logic_string += "else\n"
+            logic_string += "  arready_i <= '0';\n"
+            logic_string += "end if;"
+
+            self._process(e, "p_arready", reset_string, logic_string)
+        e.write("\n")
+
+        with e.indent():
+            ####################################################################
+            # p_arvalid
+            ####################################################################
+            reset_string = "rvalid_i <= '0';\n"
+            reset_string += 'rresp_i  <= "00";'
+
+            if self.read_pipeline_stages > 0:
+                logic_string = "if (rd_pipe({}) = '1') then\n".format(
+                    self.read_pipeline_stages
                 )
+            else:
+                logic_string = (
+                    "if (arready_i = '1' and arvalid = '1' and rvalid_i = '0') then\n"
+                )
+            logic_string += "  rvalid_i <= '1';\n"
+            logic_string += '  rresp_i  <= "00";\n'
+            logic_string += "elsif (rvalid_i = '1' and rready = '1') then\n"
+            logic_string += "  rvalid_i <= '0';\n"
+            logic_string += "end if;"
+
+            self._process(e, "p_arvalid", reset_string, logic_string)
+        e.write("\n")
+
+        e.write("slv_reg_rden <= arready_i and arvalid and ", 1)
+        e.write("(not rvalid_i);\n")
+        e.write("\n")
+
+    def _emit_axi_low_latency_read(self, e):
+        """! @brief Writes the read channel handshakes without wait states
+
+        The read address is decoded straight from araddr, and the read data goes
+        through a skid buffer in front of the R channel. arready is the ready of
+        that buffer, so it comes from a flip-flop and stays high unless a read
+        response is already held back by rready. rvalid and rdata follow in the
+        clock cycle after the address handshake.
+        """
+        e.write("-- Decode the read address without registering it\n", 1)
+        e.write("araddr_i <= araddr;\n\n", 1)
+        e.write("slv_reg_rden <= arvalid and arready_i;\n\n", 1)
+        self._emit_skid_buffer(
+            e,
+            "r",
+            "slv_reg_rden",
+            "arready_i",
+            "rready",
+            [("reg_data_out", "rdata_i", "r_skid_data")],
+        )
+        e.write("rvalid_i <= r_valid_q;\n", 1)
+        e.write('rresp_i  <= "00";\n\n', 1)
+
+    def _emit_axi_streaming_read(self, e):
+        """! @brief Writes the read channel handshakes accepting one read per clock
+
+        The read address goes through a skid buffer, and the read data through
+        another one in front of the R channel. A read is done as soon as an
+        address is buffered and the R skid buffer is ready, so arready, rvalid and
+        rdata all come straight from flip-flops.
+        """
+        e.write(
+            "-- A read is done when an address is buffered and the read data can "
+            "be taken\n",
+            1,
+        )
+        e.write("slv_reg_rden <= ar_valid_q and r_ready_i;\n\n", 1)
+        self._emit_skid_buffer(
+            e,
+            "ar",
+            "arvalid",
+            "arready_i",
+            "slv_reg_rden",
+            [("araddr", "araddr_i", "ar_skid_addr")],
+        )
+        self._emit_skid_buffer(
+            e,
+            "r",
+            "slv_reg_rden",
+            "r_ready_i",
+            "rready",
+            [("reg_data_out", "rdata_i", "r_skid_data")],
+        )
+        e.write("rvalid_i <= r_valid_q;\n", 1)
+        e.write('rresp_i  <= "00";\n\n', 1)
+
+    def _emit_skid_buffer(self, e, name, valid, ready, pop, regs):
+        """! @brief Writes a skid buffer on the input channel with handshake valid/ready
+
+        The accepted payload is held in an output register, where
+        <name>_valid_q tells that it is valid, until it is taken by pop. A beat
+        arriving while the output register is busy is kept in a skid register,
+        and ready is only deasserted while the skid register is full. ready thus
+        comes straight from a flip-flop, and the channel sustains one beat per
+        clock cycle as long as the output is taken. regs is a list of (input,
+        output register, skid register) names of the payload signals.
+        """
+        valid_q = name + "_valid_q"
+        skid_valid = name + "_skid_valid"
+
+        e.write("{} <= not {};\n\n".format(ready, skid_valid), 1)
+
+        reset_string = "{} <= '0';\n".format(valid_q)
+        reset_string += "{} <= '0';".format(skid_valid)
+        for _, out_reg, skid_reg in regs:
+            reset_string += "\n{} <= (others => '0');".format(out_reg)
+            reset_string += "\n{} <= (others => '0');".format(skid_reg)
+
+        with e.indent(), self._process_block(e, "p_" + name + "_skid", reset_string):
+            e.write("if ({} = '0' or {} = '1') then\n".format(valid_q, pop))
+            e.write(
+                "-- The output register is free, fill it from the skid register first\n",
+                1,
             )
-        s += "\n"
-
-        s += indent_string("slv_reg_rden <= arready_i and arvalid and ")
-        s += "(not rvalid_i);\n"
-        s += "\n"
-
-        ####################################################################
-        # p_mm_select_read
-        ####################################################################
-        logic_string = "reg_data_out <= (others => '0');\n\n"
-
-        logic_string += "if (valid_baseaddr_wr = '0') then\n\n"
-        logic_string += indent_string("null;\n\n")
-
-        gen = [reg for reg in mod.registers if reg.mode == "ro" or reg.mode == "rw"]
-        for reg in gen:
-            par = "elsif unsigned(register_sel_rd) = resize(unsigned(C_ADDR_"
-            par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
-            logic_string += par
-            par = ""
+            e.write("if ({} = '1') then\n".format(skid_valid), 1)
+            for _, out_reg, skid_reg in regs:
+                e.write("{} <= {};\n".format(out_reg, skid_reg), 2)
+            e.write("{} <= '1';\n".format(valid_q), 2)
+            e.write("{} <= '0';\n".format(skid_valid), 2)
+            e.write("else\n", 1)
+            for in_sig, out_reg, _ in regs:
+                e.write("{} <= {};\n".format(out_reg, in_sig), 2)
+            e.write("{} <= {};\n".format(valid_q, valid), 2)
+            e.write("end if;\n", 1)
+            e.write("elsif ({} = '1' and {} = '1') then\n".format(valid, ready))
+            e.write(
+                "-- The output register is busy, keep the beat in the skid register\n",
+                1,
+            )
+            for in_sig, _, skid_reg in regs:
+                e.write("{} <= {};\n".format(skid_reg, in_sig), 1)
+            e.write("{} <= '1';\n".format(skid_valid), 1)
+            e.write("end if;")
+        e.write("\n")
+
+    def _emit_axi_throughput_write(self, e):
+        """! @brief Writes the write channel handshakes accepting one write per clock
+
+        The write address and data channels have independent skid buffers, so
+        AW and W are accepted in any order. A write is done as soon as both an
+        address and a data beat are buffered and the write response can be given.
+        """
+        e.write(
+            "-- A write is done when both an address and a data beat are "
+            "buffered,\n-- and the previous write response is taken or not pending\n",
+            1,
+        )
+        e.write(
+            "slv_reg_wren <= aw_valid_q and w_valid_q and "
+            "((not bvalid_i) or bready);\n\n",
+            1,
+        )
+        self._emit_skid_buffer(
+            e,
+            "aw",
+            "awvalid",
+            "awready_i",
+            "slv_reg_wren",
+            [("awaddr", "awaddr_i", "aw_skid_addr")],
+        )
+        self._emit_skid_buffer(
+            e,
+            "w",
+            "wvalid",
+            "wready_i",
+            "slv_reg_wren",
+            [("wdata", "wdata_i", "w_skid_data")],
+        )
 
-            if reg.sig_type == "fields":
+    @staticmethod
+    def _write_assignments(reg, sig_name, wdata):
+        """! @brief Returns the assignments of write data to the register signal"""
+        par = ""
+        if reg.sig_type == "fields":
+
+            for field in reg.fields:
+                par += sig_name + reg.name + "." + field.name
+                par += " <= " + wdata + "("
+                par += field.get_pos_vhdl()
+                par += ");\n"
+
+        elif reg.sig_type == "default":
+            par += sig_name + reg.name + " <= " + wdata + ";\n"
+        elif reg.sig_type == "slv":
+            par += sig_name + reg.name + " <= " + wdata + "("
+            par += str(reg.width - 1) + " downto 0);\n"
+        elif reg.sig_type == "sl":
+            par += sig_name + reg.name + " <= " + wdata + "(0);\n"
+        return par
+
+    @staticmethod
+    def _read_signal(reg, short_name):
+        """! @brief Returns the prefix of the record signal a register is read from"""
+        if reg.mode == "rw":
+            return short_name + "_rw_regs_i."
+        elif reg.mode == "ro":
+            return short_name + "_ro_regs."
+        else:
+            raise Exception("Unknown error occurred")
 
-                for field in reg.fields:
-                    par += "reg_data_out("
-                    par += field.get_pos_vhdl()
+    def _read_assignments(self, reg, short_name):
+        """! @brief Returns the assignments of the register signal to reg_data_out"""
+        sig_name = self._read_signal(reg, short_name)
 
-                    if reg.mode == "rw":
-                        par += ") <= axi_rw_regs_i."
-                    elif reg.mode == "ro":
-                        par += ") <= axi_ro_regs."
-                    else:
-                        raise Exception("Unknown error occurred")
-                    par += reg.name + "." + field.name + ";\n"
-
-            elif reg.sig_type == "default":
-                par += "reg_data_out <= "
-                if reg.mode == "rw":
-                    par += "axi_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "axi_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
+        par = ""
+        if reg.sig_type == "fields":
 
-            elif reg.sig_type == "slv":
+            for field in reg.fields:
                 par += "reg_data_out("
-                par += str(reg.width - 1) + " downto 0) <= "
-                if reg.mode == "rw":
-                    par += "axi_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "axi_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
-
-            elif reg.sig_type == "sl":
-                par += "reg_data_out(0) <= "
-                if reg.mode == "rw":
-                    par += "axi_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "axi_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
-
-            logic_string += indent_string(par)
-            logic_string += "\n"
-
-        logic_string += "end if;\n\n"
-        s += indent_string(comb_process("p_mm_select_read", logic_string))
-        s += "\n"
-
-        ####################################################################
-        # p_output
-        ####################################################################
-        reset_string = "rdata_i <= (others => '0');"
-
-        logic_string = "if (slv_reg_rden = '1') then\n"
-        logic_string += indent_string("rdata_i <= reg_data_out;\n")
-        logic_string += "end if;"
+                par += field.get_pos_vhdl()
+                par += ") <= " + sig_name
+                par += reg.name + "." + field.name + ";\n"
+
+        elif reg.sig_type == "default":
+            par += "reg_data_out <= " + sig_name + reg.name + ";\n"
+
+        elif reg.sig_type == "slv":
+            par += "reg_data_out("
+            par += str(reg.width - 1) + " downto 0) <= "
+            par += sig_name + reg.name + ";\n"
+
+        elif reg.sig_type == "sl":
+            par += "reg_data_out(0) <= " + sig_name + reg.name + ";\n"
+        return par
+
+    def _read_or_assignments(self, reg, short_name):
+        """! @brief Returns the assignments that OR the register signal into v_data"""
+        sig_name = self._read_signal(reg, short_name)
+        if reg.sig_type == "fields":
+            targets = [
+                ("v_data(" + field.get_pos_vhdl() + ")", reg.name + "." + field.name)
+                for field in reg.fields
+            ]
+        elif reg.sig_type == "default":
+            targets = [("v_data", reg.name)]
+        elif reg.sig_type == "slv":
+            targets = [("v_data(" + str(reg.width - 1) + " downto 0)", reg.name)]
+        elif reg.sig_type == "sl":
+            targets = [("v_data(0)", reg.name)]
+        par = ""
+        for target, signal in targets:
+            par += target + " := " + target + " or " + sig_name + signal + ";\n"
+        return par
+
+    def _onehot_read(self, mod):
+        """! @brief Returns True if the read data is decoded in parallel"""
+        if self.read_decode == "auto":
+            return len(mod.views.readable) > ONEHOT_READ_THRESHOLD
+        return self.read_decode == "onehot"
+
+    def _emit_onehot_read_decode(self, e, regs, sel_name, short_name, acks=False):
+        """! @brief Writes one if statement per register in regs that ORs its value
+        into v_data
+
+        The register addresses are unique, so at most one of them matches, and the
+        read data becomes a flat AND-OR multiplexer instead of a priority chain.
+        With acks, the matching register also sets v_ack or v_stall_ack.
+        """
+        for reg in regs:
+            par = "if unsigned(" + sel_name + ") = resize(unsigned(C_ADDR_"
+            par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n"
+            e.write(par)
+            par = self._read_or_assignments(reg, short_name)
+            if acks and reg.stall:
+                par += "v_stall_ack := '1';\n"
+            elif acks:
+                par += "v_ack := '1';\n"
+            e.write(par, 1)
+            e.write("end if;\n")
+
+    def _emit_ipbus_onehot_read(self, e, mod):
+        """! @brief Writes the read decode of p_read as a parallel one-hot decode"""
+        e.write("v_data := (others => '0');\n")
+        e.write("v_ack := '0';\n")
+        if mod.has_stall_regs():
+            e.write("v_stall_ack := '0';\n")
+        e.write("\n")
 
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_output",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
+        e.write("-- Parallel read decode, at most one address matches\n")
+        self._emit_onehot_read_decode(
+            e, mod.views.readable, "register_sel", "ipb", acks=True
+        )
+        e.write("\n")
+
+        self._emit_ipbus_read_response(e, mod, "v_data", "v_ack", "v_stall_ack")
+
+    @staticmethod
+    def _emit_ipbus_read_response(e, mod, data, ack, stall_ack):
+        """! @brief Writes the acknowledge or error of a decoded IPBus read"""
+        e.write("if (valid_baseaddr = '0') then\n")
+        e.write("rd_err <= '1';\n", 1)
+        e.write("elsif (" + ack + " = '1') then\n")
+        e.write("reg_data_out <= " + data + ";\n", 1)
+        e.write("rd_ack <= '1';\n", 1)
+        if mod.has_stall_regs():
+            e.write("elsif (" + stall_ack + " = '1') then\n")
+            e.write("reg_data_out <= " + data + ";\n", 1)
+            e.write("rd_stall_ack <= '1';\n", 1)
+        e.write("else\n")
+        e.write('reg_data_out <= 32X"DEADBEEF";\n', 1)
+        e.write("rd_err <= '1';\n", 1)
+        e.write("end if;\n\n")
+
+    def _read_tree(self, regs):
+        """! @brief Returns the fan-in of the pipelined read multiplexer, and the
+        number of partial results registered in each of its stages
+
+        The fan-in is the smallest that reduces the registers to a single result
+        in read_pipeline_stages stages.
+        """
+        stages = self.read_pipeline_stages
+        fan_in = 1
+        while fan_in**stages < len(regs):
+            fan_in += 1
+        sizes = []
+        n_results = len(regs)
+        for _ in range(stages):
+            n_results = max(1, -(-n_results // fan_in))
+            sizes.append(n_results)
+        return fan_in, sizes
+
+    def _read_pipeline_signals(self, mod, acks=False):
+        """! @brief Returns the declarations used by the pipelined read multiplexer"""
+        stall = acks and mod.has_stall_regs()
+        sizes = self._read_tree(mod.views.readable)[1]
+        par = "-- pipelined read multiplexer\n"
+        par += "type t_rd_stage is array (natural range <>) of t_{}_data;\n".format(
+            mod.name
+        )
+        for k, size in enumerate(sizes, 1):
+            par += "signal rd_stage{} : t_rd_stage(0 to {}) := ".format(k, size - 1)
+            par += "(others => (others => '0'));\n"
+            if acks:
+                par += "signal rd_ack_stage{} : std_logic_vector(0 to {}) := ".format(
+                    k, size - 1
                 )
-            )
-
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_output",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
+                par += "(others => '0');\n"
+            if stall:
+                par += "signal rd_stall_stage{} : std_logic_vector(0 to {}) := ".format(
+                    k, size - 1
                 )
+                par += "(others => '0');\n"
+        par += (
+            "signal rd_pipe : std_logic_vector(1 to {}) := (others => '0');\n".format(
+                self.read_pipeline_stages
             )
-        s += "\n"
-
-        s += "end behavior;"
-        s += "\n"
+        )
+        par += "signal rd_busy : std_logic;\n\n"
+        return par
 
-        return s
+    def _emit_read_pipeline(
+        self, e, mod, sel_name, short_name, rden_name, valid_name=None, acks=False
+    ):
+        """! @brief Writes the pipelined read multiplexer
+
+        The first stage decodes the address and ORs together the registers of each
+        group of fan-in registers, and each later stage ORs together fan-in results
+        of the stage before it. rd_pipe delays rden_name through the stages, and
+        rd_busy is set while a read is in the pipeline. With valid_name, the first
+        stage only decodes when that signal is set. With acks, rd_ack_stage<N> and
+        rd_stall_stage<N> tell if the address matched a register.
+        """
+        regs = mod.views.readable
+        stages = self.read_pipeline_stages
+        fan_in, sizes = self._read_tree(regs)
+        stall = acks and mod.has_stall_regs()
+
+        flags = []
+        variables = ["v_data : t_" + mod.name + "_data"]
+        if acks:
+            flags.append(("rd_ack_stage", "v_ack"))
+            variables.append("v_ack : std_logic")
+        if stall:
+            flags.append(("rd_stall_stage", "v_stall_ack"))
+            variables.append("v_stall_ack : std_logic")
+
+        reset = ["rd_pipe <= (others => '0');"]
+        for k in range(1, stages + 1):
+            reset.append("rd_stage{} <= (others => (others => '0'));".format(k))
+            for flag, _ in flags:
+                reset.append("{}{} <= (others => '0');".format(flag, k))
+
+        e.write("rd_busy <= or rd_pipe;\n\n")
+        with self._process_block(e, "p_read_pipeline", "\n".join(reset), variables):
+            if stages == 1:
+                e.write("rd_pipe(1) <= " + rden_name + ";\n\n")
+            else:
+                e.write(
+                    "rd_pipe <= {} & rd_pipe(1 to {});\n\n".format(
+                        rden_name, stages - 1
+                    )
+                )
 
-    def return_ipbus_pif_VHDL(self, mod, clk_name, reset_name):
-        s = ""
+            e.write(
+                "-- Stage 1: decode the address, and OR together each group of "
+                "{} registers\n".format(fan_in)
+            )
+            tabs = 0
+            if valid_name is not None:
+                e.write("rd_stage1 <= (others => (others => '0'));\n")
+                for flag, _ in flags:
+                    e.write(flag + "1 <= (others => '0');\n")
+                e.write("if (" + valid_name + " = '1') then\n")
+                tabs = 1
+            with e.indent(tabs):
+                for group, first in enumerate(range(0, max(len(regs), 1), fan_in)):
+                    e.write("v_data := (others => '0');\n")
+                    for _, var in flags:
+                        e.write(var + " := '0';\n")
+                    self._emit_onehot_read_decode(
+                        e, regs[first : first + fan_in], sel_name, short_name, acks
+                    )
+                    e.write("rd_stage1({}) <= v_data;\n".format(group))
+                    for flag, var in flags:
+                        e.write("{}1({}) <= {};\n".format(flag, group, var))
+            if valid_name is not None:
+                e.write("end if;\n")
+
+            for k in range(2, stages + 1):
+                e.write(
+                    "\n-- Stage {}: OR together each group of {} results of "
+                    "stage {}\n".format(k, fan_in, k - 1)
+                )
+                for group in range(sizes[k - 1]):
+                    first = group * fan_in
+                    last = min(first + fan_in, sizes[k - 2]) - 1
+                    results = [
+                        "rd_stage{}({})".format(k - 1, i)
+                        for i in range(first, last + 1)
+                    ]
+                    e.write(
+                        "rd_stage{}({}) <= {};\n".format(k, group, " or ".join(results))
+                    )
+                    for flag, _ in flags:
+                        e.write(
+                            "{0}{1}({2}) <= or {0}{3}({4} to {5});\n".format(
+                                flag, k, group, k - 1, first, last
+                            )
+                        )
+        e.write("\n")
+
+    def emit_ipbus_pif_VHDL(self, e, mod):
         par = (
             "signal ipb_out_i      : ipb_rbus;\n"
             "signal reg_rden       : std_logic := '0';\n"
             "signal reg_wren       : std_logic := '0';\n"
             "signal wr_ack, rd_ack : std_logic := '0';\n"
             "signal wr_err, rd_err : std_logic := '0';\n"
-            "signal ack_d          : std_logic := '0';\n"
         )
+        low_latency = self.read_mode == "low_latency"
+        if not low_latency:
+            par += "signal ack_d          : std_logic := '0';\n"
 
         if mod.has_stall_regs():
             par += (
@@ -769,39 +1088,46 @@ class BusVHDLGen:
         par += "signal register_sel   : std_logic_vector(C_MODULE_ADDR_WIDTH-1 downto 0) := (others => '0');\n"
         par += "signal valid_baseaddr : std_logic := '0';\n\n"
 
-        s += indent_string(par)
+        stages = self.read_pipeline_stages
+        if stages > 0:
+            par += self._read_pipeline_signals(mod, acks=True)
 
-        s += "begin\n\n"
+        e.write(par, 1)
 
-        s += indent_string("ipb_out <= ipb_out_i;\n")
+        e.write("begin\n\n")
+
+        e.write("ipb_out <= ipb_out_i;\n", 1)
         if mod.count_rw_regs() > 0:
-            s += indent_string("ipb_rw_regs <= ipb_rw_regs_i") + ";\n"
+            e.write("ipb_rw_regs <= ipb_rw_regs_i" + ";\n", 1)
         if mod.count_pulse_regs() > 0:
-            s += indent_string("ipb_pulse_regs <= ipb_pulse_regs_i") + ";\n"
+            e.write("ipb_pulse_regs <= ipb_pulse_regs_i" + ";\n", 1)
         if mod.count_rw_regs() + mod.count_pulse_regs() > 0:
-            s += "\n"
+            e.write("\n")
 
         if mod.has_stall_regs():
-            s += indent_string(
-                "reg_wren <= (ipb_in.ipb_strobe and ipb_in.ipb_write) and not (wr_ack or wr_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err or wr_stall_ack or stall);\n\n"
+            e.write(
+                "reg_wren <= (ipb_in.ipb_strobe and ipb_in.ipb_write) and not (wr_ack or wr_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err or wr_stall_ack or stall);\n\n",
+                1,
             )
         else:
-            s += indent_string(
-                "reg_wren <= (ipb_in.ipb_strobe and ipb_in.ipb_write) and not (wr_ack or wr_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err);\n\n"
+            e.write(
+                "reg_wren <= (ipb_in.ipb_strobe and ipb_in.ipb_write) and not (wr_ack or wr_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err);\n\n",
+                1,
             )
 
-        s += indent_string(
-            "register_sel <= ipb_in.ipb_addr(C_MODULE_ADDR_WIDTH-1 downto 0);\n\n"
+        e.write(
+            "register_sel <= ipb_in.ipb_addr(C_MODULE_ADDR_WIDTH-1 downto 0);\n\n", 1
         )
 
-        par = "gen_check_baseaddr : if g_check_baseaddr generate\n"
-        par += indent_string(
-            "valid_baseaddr <= '1' when ipb_in.ipb_addr(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n"
-        )
-        par += "else generate\n"
-        par += indent_string("valid_baseaddr <= '1';\n")
-        par += "end generate gen_check_baseaddr;\n\n"
-        s += indent_string(par)
+        with e.indent():
+            e.write("gen_check_baseaddr : if g_check_baseaddr generate\n")
+            e.write(
+                "valid_baseaddr <= '1' when ipb_in.ipb_addr(31 downto C_MODULE_ADDR_WIDTH) = C_BASEADDR(31 downto C_MODULE_ADDR_WIDTH) else '0';\n",
+                1,
+            )
+            e.write("else generate\n")
+            e.write("valid_baseaddr <= '1';\n", 1)
+            e.write("end generate gen_check_baseaddr;\n\n")
 
         if mod.count_rw_regs() + mod.count_pulse_regs() > 0:
             ###################################################################
@@ -816,109 +1142,73 @@ class BusVHDLGen:
                 )
             reset_string += "wr_ack <= '0';\n" "wr_err <= '0';\n"
 
-            logic_string = ""
-            # create a generator for looping through all pulse regs
-            if mod.count_pulse_regs() > 0:
-                logic_string += (
-                    "\n-- Return PULSE registers to reset value every clock cycle\n"
-                )
-                logic_string += (
-                    "ipb_pulse_regs_cycle <= c_" + mod.name + "_pulse_regs;\n\n"
-                )
-
-            logic_string += "wr_ack <= '0';\n" "wr_err <= '0';\n"
-            if mod.has_stall_regs():
-                logic_string += "wr_stall_ack <= '0';\n"
+            with e.indent(), self._process_block(e, "p_write", reset_string):
+                if mod.count_pulse_regs() > 0:
+                    e.write(
+                        "\n-- Return PULSE registers to reset value every clock cycle\n"
+                    )
+                    e.write(
+                        "ipb_pulse_regs_cycle <= c_" + mod.name + "_pulse_regs;\n\n"
+                    )
 
-            logic_string += "\nif (reg_wren) then\n\n"
+                e.write("wr_ack <= '0';\n" "wr_err <= '0';\n")
+                if mod.has_stall_regs():
+                    e.write("wr_stall_ack <= '0';\n")
 
-            logic_string += indent_string("if (valid_baseaddr = '0') then\n\n")
-            logic_string += indent_string("wr_err <= '1';\n\n", 2)
+                e.write("\nif (reg_wren) then\n\n")
 
-            # create a generator for looping through all rw and pulse regs
-            gen = (
-                reg for reg in mod.registers if reg.mode == "rw" or reg.mode == "pulse"
-            )
-            for i, reg in enumerate(gen):
-                if reg.mode == "rw":
-                    sig_name = "ipb_rw_regs_i."
-                elif reg.mode == "pulse":
-                    sig_name = "ipb_pulse_regs_cycle."
-
-                par = "elsif"
-                par += " unsigned(register_sel) = resize(unsigned(C_ADDR_"
-                par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
-                logic_string += indent_string(par)
-                par = ""
-                if reg.sig_type == "fields":
-
-                    for field in reg.fields:
-                        par += sig_name + reg.name + "." + field.name
-                        par += " <= ipb_in.ipb_wdata("
-                        par += field.get_pos_vhdl()
-                        par += ");\n"
-
-                elif reg.sig_type == "default":
-                    par += sig_name + reg.name + " <= ipb_in.ipb_wdata;\n"
-                elif reg.sig_type == "slv":
-                    par += sig_name + reg.name + " <= ipb_in.ipb_wdata("
-                    par += str(reg.width - 1) + " downto 0);\n"
-                elif reg.sig_type == "sl":
-                    par += sig_name + reg.name + " <= ipb_in.ipb_wdata(0);\n"
-                if reg.stall:
-                    par += "wr_stall_ack <= '1';\n"
-                else:
-                    par += "wr_ack <= '1';\n"
+                e.write("if (valid_baseaddr = '0') then\n\n", 1)
+                e.write("wr_err <= '1';\n\n", 2)
 
-                logic_string += indent_string(par, 2)
-                logic_string += "\n"
+                # loop through all rw and pulse regs
+                for reg in mod.views.writable:
+                    if reg.mode == "rw":
+                        sig_name = "ipb_rw_regs_i."
+                    elif reg.mode == "pulse":
+                        sig_name = "ipb_pulse_regs_cycle."
+
+                    par = "elsif"
+                    par += " unsigned(register_sel) = resize(unsigned(C_ADDR_"
+                    par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
+                    e.write(par, 1)
+                    par = self._write_assignments(reg, sig_name, "ipb_in.ipb_wdata")
+                    if reg.stall:
+                        par += "wr_stall_ack <= '1';\n"
+                    else:
+                        par += "wr_ack <= '1';\n"
 
-            logic_string += indent_string("else\n\n")
-            logic_string += indent_string("wr_err <= '1';\n\n", 2)
+                    e.write(par, 2)
+                    e.write("\n")
 
-            logic_string += indent_string("end if;\n")
-            logic_string += "end if;\n"
+                e.write("else\n\n", 1)
+                e.write("wr_err <= '1';\n\n", 2)
 
-            if self.bus_reset == "async":
-                s += indent_string(
-                    async_process(
-                        clk_name,
-                        reset_name,
-                        "p_write",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                    )
-                )
-
-            elif self.bus_reset == "sync":
-                s += indent_string(
-                    sync_process(
-                        clk_name,
-                        reset_name,
-                        "p_write",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                    )
-                )
-            s += "\n"
+                e.write("end if;\n", 1)
+                e.write("end if;\n")
+            e.write("\n")
 
         # Pulse reg process
-        # create a generator for looping through all rw and pulse regs
-        gen = (reg for reg in mod.registers if reg.mode == "pulse")
-        for reg in gen:
-            s += indent_string(self.pulse_reg_process(mod, reg))
-            s += "\n"
+        for reg in mod.views.by_mode["pulse"]:
+            e.write(self.pulse_reg_process(mod, reg), 1)
+            e.write("\n")
 
-        if mod.has_stall_regs():
-            s += indent_string(
-                "\nreg_rden <= (ipb_in.ipb_strobe and (not ipb_in.ipb_write)) and not (rd_ack or rd_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err or rd_stall_ack or stall);\n\n"
-            )
+        if low_latency:
+            # Read data and ack follow the strobe combinationally
+            par = "\nreg_rden <= ipb_in.ipb_strobe and (not ipb_in.ipb_write)"
         else:
-            s += indent_string(
-                "\nreg_rden <= (ipb_in.ipb_strobe and (not ipb_in.ipb_write)) and not (rd_ack or rd_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err);\n\n"
-            )
+            par = "\nreg_rden <= (ipb_in.ipb_strobe and (not ipb_in.ipb_write)) and not (rd_ack or rd_err or ipb_out_i.ipb_ack or ipb_out_i.ipb_err"
+            if mod.has_stall_regs():
+                par += " or rd_stall_ack or stall"
+            if stages > 0:
+                par += " or rd_busy"
+            par += ")"
+        e.write(par + ";\n\n", 1)
+
+        if stages > 0:
+            with e.indent():
+                self._emit_read_pipeline(
+                    e, mod, "register_sel", "ipb", "reg_rden", acks=True
+                )
 
         ####################################################################
         # p_read
@@ -927,109 +1217,53 @@ class BusVHDLGen:
             "reg_data_out <= (others => '0');\n" "rd_ack <= '0';\n" "rd_err <= '0';"
         )
 
-        logic_string = "\n-- default values\n" "rd_ack <= '0';\n" "rd_err <= '0';\n"
-        if mod.has_stall_regs():
-            logic_string += "rd_stall_ack <= '0';\n"
-
-        logic_string += "\nif (reg_rden) then\n"
-        logic_string += indent_string("reg_data_out <= (others => '0');\n\n")
-
-        logic_string += indent_string("if (valid_baseaddr = '0') then\n\n")
-        logic_string += indent_string("rd_err <= '1';\n\n", 2)
-
-        gen = [reg for reg in mod.registers if reg.mode == "ro" or reg.mode == "rw"]
-        for i, reg in enumerate(gen):
-
-            par = "elsif"
-            par += " unsigned(register_sel) = resize(unsigned(C_ADDR_"
-            par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
-            logic_string += indent_string(par)
-            par = ""
-
-            if reg.sig_type == "fields":
-
-                for field in reg.fields:
-                    par += "reg_data_out("
-                    par += field.get_pos_vhdl()
+        onehot = stages == 0 and self._onehot_read(mod)
+        variables = None
+        if onehot:
+            variables = ["v_data : t_" + mod.name + "_data", "v_ack : std_logic"]
+            if mod.has_stall_regs():
+                variables.append("v_stall_ack : std_logic")
 
-                    if reg.mode == "rw":
-                        par += ") <= ipb_rw_regs_i."
-                    elif reg.mode == "ro":
-                        par += ") <= ipb_ro_regs."
-                    else:
-                        raise Exception("Unknown error occurred")
-                    par += reg.name + "." + field.name + ";\n"
-
-            elif reg.sig_type == "default":
-                par += "reg_data_out <= "
-                if reg.mode == "rw":
-                    par += "ipb_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "ipb_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
+        if low_latency:
+            read_block = comb_process_block(e, "p_read", variables)
+        else:
+            read_block = self._process_block(e, "p_read", reset_string, variables)
 
-            elif reg.sig_type == "slv":
-                par += "reg_data_out("
-                par += str(reg.width - 1) + " downto 0) <= "
-                if reg.mode == "rw":
-                    par += "ipb_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "ipb_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
-
-            elif reg.sig_type == "sl":
-                par += "reg_data_out(0) <= "
-                if reg.mode == "rw":
-                    par += "ipb_rw_regs_i."
-                elif reg.mode == "ro":
-                    par += "ipb_ro_regs."
-                else:
-                    raise Exception("Unknown error occurred")
-                par += reg.name + ";\n"
-            if reg.stall:
-                par += "rd_stall_ack <= '1';\n"
+        with e.indent(), read_block:
+            if low_latency:
+                e.write("-- default values\n" "reg_data_out <= (others => '0');\n")
             else:
-                par += "rd_ack <= '1';\n"
-
-            logic_string += indent_string(par, 2)
-            logic_string += "\n"
-
-        logic_string += indent_string("else\n\n")
-        logic_string += indent_string('reg_data_out <= 32X"DEADBEEF";\n', 2)
-        logic_string += indent_string("rd_err <= '1';\n\n", 2)
-
-        logic_string += indent_string("end if;\n")
-        logic_string += "end if;\n"
-
-        if self.bus_reset == "async":
-            s += indent_string(
-                async_process(
-                    clk_name,
-                    reset_name,
-                    "p_read",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
+                e.write("\n-- default values\n")
+            e.write("rd_ack <= '0';\n" "rd_err <= '0';\n")
+            if mod.has_stall_regs():
+                e.write("rd_stall_ack <= '0';\n")
 
-        elif self.bus_reset == "sync":
-            s += indent_string(
-                sync_process(
-                    clk_name,
-                    reset_name,
-                    "p_read",
-                    reset_string,
-                    logic_string,
-                    self.reset_active_low,
-                )
-            )
+            if stages > 0:
+                e.write("\nif (rd_pipe({})) then\n".format(stages))
+            else:
+                e.write("\nif (reg_rden) then\n")
+            if low_latency:
+                e.write("\n")
+            else:
+                e.write("reg_data_out <= (others => '0');\n\n", 1)
+
+            if stages > 0:
+                with e.indent():
+                    self._emit_ipbus_read_response(
+                        e,
+                        mod,
+                        "rd_stage{}(0)".format(stages),
+                        "rd_ack_stage{}(0)".format(stages),
+                        "rd_stall_stage{}(0)".format(stages),
+                    )
+            elif onehot:
+                with e.indent():
+                    self._emit_ipbus_onehot_read(e, mod)
+            else:
+                self._emit_ipbus_priority_read(e, mod)
+            e.write("end if;\n")
 
-        s += "\n"
+        e.write("\n")
 
         ####################################################################
         # p_stall
@@ -1038,54 +1272,27 @@ class BusVHDLGen:
             variables = ["v_cnt : natural := 0"]
             reset_string = "stall <= '0';"
 
-            logic_string = "ack_d <= '0';\n" "if wr_stall_ack or rd_stall_ack then\n"
-            logic_string += indent_string("stall <= '1';\n")
-            gen = [reg for reg in mod.registers if reg.stall]
-            for reg in gen:
-                logic_string += indent_string(
-                    "if unsigned(ipb_in.ipb_addr) = resize(unsigned(C_BASEADDR) + unsigned(C_ADDR_{}), {}) then\n".format(
-                        reg.name.upper(), str(self.addr_width)
+            with e.indent(), self._process_block(e, "p_stall", reset_string, variables):
+                e.write("ack_d <= '0';\n" "if wr_stall_ack or rd_stall_ack then\n")
+                e.write("stall <= '1';\n", 1)
+                for reg in mod.views.stall:
+                    e.write(
+                        "if unsigned(ipb_in.ipb_addr) = resize(unsigned(C_BASEADDR) + unsigned(C_ADDR_{}), {}) then\n".format(
+                            reg.name.upper(), str(self.addr_width)
+                        ),
+                        1,
                     )
-                )
-                logic_string += indent_string(
-                    "v_cnt := {};\n".format(reg.get_stall_cycles_str()), 2
-                )
-                logic_string += indent_string("end if;\n")
-
-            logic_string += "elsif v_cnt > 0 then\n"
-            logic_string += indent_string("v_cnt := v_cnt - 1;\n")
-            logic_string += indent_string("stall <= '1';\n")
-            logic_string += "elsif stall then\n"
-            logic_string += indent_string("stall <= '0';\n")
-            logic_string += indent_string("ack_d <= '1';\n")
-            logic_string += "end if;\n"
-
-            if self.bus_reset == "async":
-                s += indent_string(
-                    async_process(
-                        clk_name,
-                        reset_name,
-                        "p_stall",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                        variables,
-                    )
-                )
-
-            elif self.bus_reset == "sync":
-                s += indent_string(
-                    sync_process(
-                        clk_name,
-                        reset_name,
-                        "p_stall",
-                        reset_string,
-                        logic_string,
-                        self.reset_active_low,
-                        variables,
-                    )
-                )
-            s += "\n"
+                    e.write("v_cnt := {};\n".format(reg.get_stall_cycles_str()), 2)
+                    e.write("end if;\n", 1)
+
+                e.write("elsif v_cnt > 0 then\n")
+                e.write("v_cnt := v_cnt - 1;\n", 1)
+                e.write("stall <= '1';\n", 1)
+                e.write("elsif stall then\n")
+                e.write("stall <= '0';\n", 1)
+                e.write("ack_d <= '1';\n", 1)
+                e.write("end if;\n")
+            e.write("\n")
 
         ####################################################################
         # p_output
@@ -1105,35 +1312,58 @@ class BusVHDLGen:
             logic_string += "if (rd_ack or rd_err) and (not stall) then\n"
         else:
             logic_string += "if (rd_ack or rd_err) then\n"
-        logic_string += indent_string("ipb_out_i.ipb_ack <= rd_ack;\n")
-        logic_string += indent_string("ipb_out_i.ipb_err <= rd_err;\n")
+        logic_string += "  ipb_out_i.ipb_ack <= rd_ack;\n"
+        logic_string += "  ipb_out_i.ipb_err <= rd_err;\n"
         if mod.has_stall_regs():
             logic_string += "elsif (wr_ack or wr_err) and (not stall) then\n"
         else:
             logic_string += "elsif (wr_ack or wr_err) then\n"
-        logic_string += indent_string("ipb_out_i.ipb_ack <= wr_ack;\n")
-        logic_string += indent_string("ipb_out_i.ipb_err <= wr_err;\n")
+        logic_string += "  ipb_out_i.ipb_ack <= wr_ack;\n"
+        logic_string += "  ipb_out_i.ipb_err <= wr_err;\n"
         if mod.has_stall_regs():
             logic_string += "elsif ack_d then\n"
-            logic_string += indent_string("ipb_out_i.ipb_ack <= ack_d;\n")
+            logic_string += "  ipb_out_i.ipb_ack <= ack_d;\n"
         logic_string += "end if;\n"
 
-        s += indent_string(
-            comb_process_with_reset(
-                reset_name,
-                "p_output",
-                reset_string,
-                logic_string,
-                self.reset_active_low,
-            )
-        )
+        with e.indent(), comb_process_with_reset_block(
+            e,
+            str.strip(self.reset_name),
+            "p_output",
+            reset_string,
+            self.reset_active_low,
+        ):
+            e.write(logic_string)
 
-        s += "\n"
+        e.write("\n")
 
-        s += "end behavior;"
-        s += "\n"
+        e.write("end behavior;")
+        e.write("\n")
 
-        return s
+    def _emit_ipbus_priority_read(self, e, mod):
+        """! @brief Writes the read decode of p_read as an if-elsif chain"""
+        e.write("if (valid_baseaddr = '0') then\n\n", 1)
+        e.write("rd_err <= '1';\n\n", 2)
+
+        for reg in mod.views.readable:
+
+            par = "elsif"
+            par += " unsigned(register_sel) = resize(unsigned(C_ADDR_"
+            par += reg.name.upper() + "), C_MODULE_ADDR_WIDTH) then\n\n"
+            e.write(par, 1)
+            par = self._read_assignments(reg, "ipb")
+            if reg.stall:
+                par += "rd_stall_ack <= '1';\n"
+            else:
+                par += "rd_ack <= '1';\n"
+
+            e.write(par, 2)
+            e.write("\n")
+
+        e.write("else\n\n", 1)
+        e.write('reg_data_out <= 32X"DEADBEEF";\n', 2)
+        e.write("rd_err <= '1';\n\n", 2)
+
+        e.write("end if;\n", 1)
 
     def get_instantiation(self, name, inter):
 
@@ -1382,6 +1612,13 @@ class BusVHDLGen:
         ).format(ext_name, self.short_name, self.clk_name)
         s += "variable dummy_data : std_logic_vector(31 downto 0);\n\n"
 
+        if self.read_mode == "streaming":
+            s += "-- read throughput check\n"
+            s += "constant C_STREAM_READS : natural := 64;\n"
+            s += "variable v_reads        : natural;\n"
+            s += "variable v_beats        : natural;\n"
+            s += "variable v_cycles       : natural;\n\n"
+
         s += (
             "procedure check(\n"
             "  constant addr_value : in unsigned;\n"
@@ -1408,6 +1645,84 @@ class BusVHDLGen:
         )
         return s
 
+    def uvvm_read_throughput_check(self, reg_addr):
+        """! @brief Returns a testbench check that streaming reads take one clock each
+
+        Reads reg_addr C_STREAM_READS times with arvalid and rready held high,
+        and checks that it takes no more clock cycles than the number of reads
+        plus the latency of the first read. The reads are given up after
+        4*C_STREAM_READS clock cycles, so a missing rvalid fails the check instead
+        of hanging the testbench.
+        """
+        clk = "{}_{}".format(self.short_name, self.clk_name)
+        s = 'log_hdr_large("Checking streaming read throughput");\n\n'
+        s += "wait until rising_edge({});\n".format(clk)
+        s += "axilite_if.read_address_channel.araddr <= std_logic_vector("
+        s += "resize(f_addr(g_{}_baseaddr, {}), addr_width));\n".format(
+            self.short_name, reg_addr
+        )
+        s += "axilite_if.read_address_channel.arvalid <= '1';\n"
+        s += "axilite_if.read_data_channel.rready     <= '1';\n"
+        s += "v_reads  := 0;\n"
+        s += "v_beats  := 0;\n"
+        s += "v_cycles := 0;\n"
+        s += "while v_beats < C_STREAM_READS and v_cycles < 4*C_STREAM_READS loop\n"
+        s += "  wait until rising_edge({});\n".format(clk)
+        s += "  v_cycles := v_cycles + 1;\n"
+        s += "  if (axi_out.arready = '1' and axi_in.arvalid = '1') then\n"
+        s += "    v_reads := v_reads + 1;\n"
+        s += "    if (v_reads = C_STREAM_READS) then\n"
+        s += "      axilite_if.read_address_channel.arvalid <= '0';\n"
+        s += "    end if;\n"
+        s += "  end if;\n"
+        s += "  if (axi_out.rvalid = '1') then\n"
+        s += "    v_beats := v_beats + 1;\n"
+        s += "  end if;\n"
+        s += "end loop;\n"
+        s += "axilite_if.read_address_channel.arvalid <= '0';\n"
+        s += "axilite_if.read_data_channel.rready     <= '0';\n\n"
+        s += "check_value(v_beats, C_STREAM_READS, error, "
+        s += '"All streaming reads must return data");\n'
+        s += 'log(ID_SEQUENCER, to_string(C_STREAM_READS) & " reads took " & '
+        s += 'to_string(v_cycles) & " clock cycles", C_SCOPE);\n'
+        s += "check_value(v_cycles <= C_STREAM_READS + 2, error, "
+        s += '"Streaming reads must sustain one read per clock cycle");\n\n'
+        return s
+
+    def uvvm_read_latency_check(self, reg_addr):
+        """! @brief Returns a testbench check of the low latency read timing
+
+        On AXI, rvalid must be set in the clock cycle after arvalid. On IPBus,
+        ipb_ack must be set in the same clock cycle as ipb_strobe.
+        """
+        clk = "{}_{}".format(self.short_name, self.clk_name)
+        addr = "f_addr(g_{}_baseaddr, {})".format(self.short_name, reg_addr)
+        s = 'log_hdr_large("Checking read latency");\n\n'
+        s += "wait until rising_edge({});\n".format(clk)
+        if self.bus_type == "axi":
+            s += "axilite_if.read_address_channel.araddr <= "
+            s += "std_logic_vector(resize({}, addr_width));\n".format(addr)
+            s += "axilite_if.read_address_channel.arvalid <= '1';\n"
+            s += "axilite_if.read_data_channel.rready     <= '1';\n"
+            s += "wait until rising_edge({});\n".format(clk)
+            s += "check_value(axi_out.arready, '1', error, "
+            s += '"arready must be high when the read data channel is free");\n'
+            s += "axilite_if.read_address_channel.arvalid <= '0';\n"
+            s += "wait until rising_edge({});\n".format(clk)
+            s += "check_value(axi_out.rvalid, '1', error, "
+            s += '"rvalid must be set in the clock cycle after arvalid");\n'
+            s += "axilite_if.read_data_channel.rready <= '0';\n\n"
+        elif self.bus_type == "ipbus":
+            s += "ipbus_if.addr   <= std_logic_vector({});\n".format(addr)
+            s += "ipbus_if.wr     <= '0';\n"
+            s += "ipbus_if.strobe <= '1';\n"
+            s += "wait for C_CLK_PERIOD/4;\n"
+            s += "check_value(ipb_out.ipb_ack, '1', error, "
+            s += '"ipb_ack must be set in the same clock cycle as ipb_strobe");\n'
+            s += "wait until rising_edge({});\n".format(clk)
+            s += "ipbus_if.strobe <= '0';\n\n"
+        return s
+
     def uvvm_check(self, reg_addr, data_exp, string):
         s = 'check(f_addr(g_{}_baseaddr, {}), {}, "{}");\n'.format(
             self.short_name, reg_addr, data_exp, string
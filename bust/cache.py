@@ -0,0 +1,108 @@
+"""! @package cache
+On-disk cache of parsed module models
+
+"""
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+
+from bust._version import __VERSION__
+
+logger = logging.getLogger(__name__)
+
+
+def cache_dir():
+    """! @brief Returns the cache directory, $XDG_CACHE_HOME/bust or ~/.cache/bust"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "bust")
+
+
+def _code_fingerprint():
+    """! @brief Returns a hash of the size and modification time of the bust sources
+
+    Makes sure that a model pickled by other code than what is running is never
+    loaded, also when the sources are edited without changing the version.
+    """
+    sha = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(package_dir, "*.py"))):
+        stat = os.stat(path)
+        sha.update("{} {} {}\n".format(path, stat.st_size, stat.st_mtime_ns).encode())
+    return sha.hexdigest()
+
+
+class ModelCache(object):
+    """! @brief Pickled Settings, Bus and Module objects of JSON files
+
+    An entry is keyed by the path and content of the JSON file, the bust version
+    and sources, and the Python version, so an outdated entry is never used. Only
+    the latest entry of each JSON file is kept.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = cache_dir()
+        self.directory = directory
+
+    def _path_prefix(self, json_file):
+        path = os.path.abspath(json_file)
+        return hashlib.sha256(path.encode()).hexdigest()[:32]
+
+    def entry(self, json_file):
+        """! @brief Returns the path of the cache entry of json_file as it is now"""
+        sha = hashlib.sha256()
+        sha.update(__VERSION__.encode())
+        sha.update(sys.version.encode())
+        sha.update(_code_fingerprint().encode())
+        # Settings keeps the path as given, so it is part of the model
+        sha.update(json_file.encode())
+        with open(json_file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                sha.update(chunk)
+        name = "{}-{}.pickle".format(self._path_prefix(json_file), sha.hexdigest())
+        return os.path.join(self.directory, name)
+
+    def load(self, entry):
+        """! @brief Returns the cached (settings, bus, module) tuple, or None"""
+        try:
+            with open(entry, "rb") as f:
+                model = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Corrupt or unreadable, the JSON file is parsed instead
+            logger.debug("Could not load cached model {}: {}".format(entry, e))
+            return None
+        logger.debug("Loaded cached model " + entry)
+        return model
+
+    def store(self, entry, settings, bus, module):
+        """! @brief Cache a model as entry, replacing older entries of its JSON file
+
+        Failing to write the cache is not an error, only logged.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(
+                        (settings, bus, module), f, protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                os.replace(tmp_path, entry)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            prefix = os.path.basename(entry).split("-")[0]
+            pattern = os.path.join(self.directory, prefix + "-*.pickle")
+            for path in glob.glob(pattern):
+                if path != entry:
+                    os.unlink(path)
+        except Exception as e:
+            logger.debug("Could not cache model {}: {}".format(entry, e))
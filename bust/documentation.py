@@ -1,5 +1,4 @@
-from pylatexenc.latexencode import utf8tolatex
-from bust.utils import indent_string
+from bust.emitter import Emitter
 from bust._version import __VERSION__
 
 
@@ -10,31 +9,49 @@ class Documentation(object):
         self.module = module
 
     def return_tex_documentation(self, test_version=None):
+        e = Emitter()
+        self.emit_tex_documentation(e, test_version)
+        return e.getvalue()
+
+    def emit_tex_documentation(self, e, test_version=None):
+        # pylatexenc is slow to import, and only needed for the documentation
+        from pylatexenc.latexencode import utf8tolatex
+
         if test_version is None:
             version = __VERSION__
         else:
             version = test_version
-        s = tex_top
-        s += "\n\n"
-        s += r"\title{" + utf8tolatex(self.module.name) + "}\n"
-        s += r"\author{" + self.module.get_version() + "}\n"
-        s += r"\date{\today\ \currenttime}" + "\n"
-        s += "\n"
-        s += r"\pagestyle{fancy}" + "\n"
-        s += r"\fancyhf{}" + "\n"
-        s += r"\fancyhead[C]{Generated by bust " + version + "}\n"
-        s += r"\fancyfoot[L]{\today\ \currenttime}" + "\n"
-        s += r"\fancyfoot[C]{\thepage}" + "\n"
-        s += r"\fancyfoot[R]{" + self.module.get_version() + "}\n\n\n"
-        s += r"\begin{document}" + "\n\n"
-        s += r"\maketitle" + "\n"
-        s += r"\thispagestyle{fancy}" + "\n"
-        s += "\n"
-
-        s += utf8tolatex(self.module.description) + "\n\n"
-
-        s += r"\section{Register List}" + "\n\n"
-        s += tex_table_top + "\n"
+        e.write(tex_top)
+        e.write("\n\n")
+        e.write(r"\title{" + utf8tolatex(self.module.name) + "}\n")
+        e.write(r"\author{" + self.module.get_version() + "}\n")
+        # The time stamps make the PDF differ each time it is generated
+        if self.module.settings.doc_timestamp:
+            timestamp = r"\today\ \currenttime"
+        else:
+            timestamp = ""
+        e.write(r"\date{" + timestamp + "}\n")
+        e.write("\n")
+        e.write(r"\pagestyle{fancy}" + "\n")
+        e.write(r"\fancyhf{}" + "\n")
+        e.write(r"\fancyhead[C]{Generated by bust " + version + "}\n")
+        e.write(r"\fancyfoot[L]{" + timestamp + "}\n")
+        e.write(r"\fancyfoot[C]{\thepage}" + "\n")
+        e.write(r"\fancyfoot[R]{" + self.module.get_version() + "}\n\n\n")
+        e.write(r"\begin{document}" + "\n\n")
+        e.write(r"\maketitle" + "\n")
+        e.write(r"\thispagestyle{fancy}" + "\n")
+        e.write("\n")
+
+        e.write(utf8tolatex(self.module.description) + "\n\n")
+
+        read_timing = self.read_timing()
+        if read_timing is not None:
+            e.write(r"\section{Read Timing}" + "\n\n")
+            e.write(read_timing + "\n\n")
+
+        e.write(r"\section{Register List}" + "\n\n")
+        e.write(tex_table_top + "\n")
         for i, reg in enumerate(self.module.registers):
             p = str(i) + " & "
             p += utf8tolatex(reg.name) + " & "
@@ -49,81 +66,113 @@ class Documentation(object):
             p += r"\texttt{"
             p += "0x" + format(int(reg.reset, 16), "X") + "} \\\\\n"
             p += r"\hline" + "\n"
-            s += indent_string(p, 3)
-        s += tex_table_bot
+            e.write(p, 3)
+        e.write(tex_table_bot)
 
-        s += "\n\n" r"\section{Registers}" + "\n\n"
+        e.write("\n\n" r"\section{Registers}" + "\n\n")
 
         for reg in self.module.registers:
 
-            s += r"\begin{register}{H}{" + utf8tolatex(reg.name) + " - "
-            s += reg.mode.upper()
+            p = r"\begin{register}{H}{" + utf8tolatex(reg.name) + " - "
+            p += reg.mode.upper()
             if reg.mode.lower() == "pulse":
-                s += " for " + str(reg.pulse_cycles) + " cycles "
+                p += " for " + str(reg.pulse_cycles) + " cycles "
             if reg.stall:
-                s += " - STALL for {} cycles".format(reg.stall_cycles)
-            s += "}{" + "0x{0:0{1}X}".format(
+                p += " - STALL for {} cycles".format(reg.stall_cycles)
+            p += "}{" + "0x{0:0{1}X}".format(
                 reg.address, int(self.module.addr_width / 4)
             )
-            s += "}"
+            p += "}"
+            e.write(p)
 
-            s += indent_string(r"\par ")
+            e.write(r"\par ", 1)
 
-            s += utf8tolatex(reg.description) + r" \regnewline" + "\n"
-            s += indent_string(r"\label{" + reg.name + "}\n")
+            e.write(utf8tolatex(reg.description) + r" \regnewline" + "\n")
 
-            if reg.width < self.module.data_width:
-                p = r"\regfield{unused}{"
-                p += str(self.module.data_width - reg.width) + "}{"
-                p += str(reg.width) + "}{-}\n"
-                s += indent_string(p)
+            with e.indent():
+                e.write(r"\label{" + reg.name + "}\n")
 
-            if reg.sig_type != "fields":
+                if reg.width < self.module.data_width:
+                    p = r"\regfield{unused}{"
+                    p += str(self.module.data_width - reg.width) + "}{"
+                    p += str(reg.width) + "}{-}\n"
+                    e.write(p)
 
-                p = r"\regfield{}{" + str(reg.width) + "}{0}{"
-                if reg.width < 2:
-                    p += str(int(reg.reset, 16))
-                else:
-                    p += "{0x" + format(int(reg.reset, 16), "X") + "}"
-                p += "}\n"
-
-                s += indent_string(p)
-
-            else:
-                for field in reversed(reg.fields):
-                    p = r"\regfield{" + utf8tolatex(field.name) + "}{"
-                    p += str(field.width) + "}{"
-                    p += str(field.pos_low) + "}{"
-                    if field.width < 2:
-                        p += str(int(field.reset, 16))
+                if reg.sig_type != "fields":
+
+                    p = r"\regfield{}{" + str(reg.width) + "}{0}{"
+                    if reg.width < 2:
+                        p += str(int(reg.reset, 16))
                     else:
-                        p += "{0x" + format(int(field.reset, 16), "X") + "}"
+                        p += "{0x" + format(int(reg.reset, 16), "X") + "}"
                     p += "}\n"
-                    s += indent_string(p)
 
-            s += r"\reglabel{Reset}\regnewline" + "\n"
+                    e.write(p)
+
+                else:
+                    for field in reversed(reg.fields):
+                        p = r"\regfield{" + utf8tolatex(field.name) + "}{"
+                        p += str(field.width) + "}{"
+                        p += str(field.pos_low) + "}{"
+                        if field.width < 2:
+                            p += str(int(field.reset, 16))
+                        else:
+                            p += "{0x" + format(int(field.reset, 16), "X") + "}"
+                        p += "}\n"
+                        e.write(p)
+
+            e.write(r"\reglabel{Reset}\regnewline" + "\n")
 
             if reg.sig_type == "fields":
 
-                p = r"\begin{regdesc}\begin{reglist}["
-                # Get the longest field name and indent the list based on that width
-                gen = [field.name for field in reg.fields]
-                longest = max(gen, key=len)
-                p += utf8tolatex(longest)
-                p += "]\n"
-                s += indent_string(p)
-                for field in reg.fields:
-                    p = r"\item [" + utf8tolatex(field.name) + "] "
-                    p += utf8tolatex(field.description)
-                    s += indent_string(p, 2)
-                s += indent_string(r"\end{reglist}\end{regdesc}" + "\n")
-
-            s += r"\end{register}" + "\n\n"
-
-        s += "\end{document}"
-        s += "\n"
-
-        return s
+                with e.indent():
+                    p = r"\begin{regdesc}\begin{reglist}["
+                    # Get the longest field name and indent the list based on that width
+                    gen = [field.name for field in reg.fields]
+                    longest = max(gen, key=len)
+                    p += utf8tolatex(longest)
+                    p += "]\n"
+                    e.write(p)
+                    for field in reg.fields:
+                        p = r"\item [" + utf8tolatex(field.name) + "] "
+                        p += utf8tolatex(field.description)
+                        e.write(p, 1)
+                    e.write(r"\end{reglist}\end{regdesc}" + "\n")
+
+            e.write(r"\end{register}" + "\n\n")
+
+        e.write(r"\end{document}")
+        e.write("\n")
+
+    def read_timing(self):
+        """! @brief Returns a description of non-default read timing, or None"""
+        bus = self.module.bus
+        if bus.read_mode == "low_latency":
+            if bus.bus_type == "axi":
+                return (
+                    r"Reads have no wait states. The read address is decoded "
+                    r"without being registered, and \texttt{rvalid} and "
+                    r"\texttt{rdata} are set in the clock cycle after the "
+                    r"\texttt{arvalid}/\texttt{arready} handshake. "
+                    r"\texttt{arready} comes from a register, and stays high unless "
+                    r"two read responses are waiting for \texttt{rready}."
+                )
+            return (
+                r"Reads have no wait states. \texttt{ipb\_ack} is set in the same "
+                r"clock cycle as \texttt{ipb\_strobe}."
+            )
+        if bus.read_mode == "streaming":
+            return (
+                r"Reads are streamed, one per clock cycle as long as "
+                r"\texttt{rready} is high. \texttt{rvalid} is set two clock cycles "
+                r"after the read address handshake."
+            )
+        if bus.read_pipeline_stages > 0:
+            return (
+                "The read data is pipelined in {} stages, which adds {} clock "
+                "cycles to the read latency."
+            ).format(bus.read_pipeline_stages, bus.read_pipeline_stages)
+        return None
 
 
 tex_top = r"""\documentclass{article}
@@ -7,7 +7,6 @@ from cursesmenu.items import FunctionItem
 from collections import OrderedDict
 from prettytable import PrettyTable
 
-from bust.utils import json_parser
 from bust.utils import cont
 from bust.utils import is_int
 from bust.utils import clear_screen
@@ -19,17 +18,19 @@ from bust.module import Module
 from bust.bus import Bus
 from bust.register import Register
 from bust.field import Field
-from bust.vhdl import get_identifier
+from bust.vhdl import get_identifier, Namespace
 from bust.settings import Settings
+from bust.generation import load_model
 
 
 class Editor(object):
     """A console-based menu system for creating and editing module descripting JSON files"""
 
-    def __init__(self, edit, jsonfile, output_dir="output/"):
+    def __init__(self, edit, jsonfile, output_dir="output/", cache=None):
         """Constructor
 
-        Either reconstructs a module object from JSON, or create a new based on user input
+        Either reconstructs a module object from JSON, or create a new based on user input.
+        A ModelCache can be given as cache to load the module object from.
         """
         self.jsonfile = jsonfile
         self.output_dir = output_dir
@@ -38,10 +39,7 @@ class Editor(object):
         if edit:
             # Load the specified JSON file
             try:
-                json = json_parser(jsonfile)
-                self.settings = Settings(jsonfile, json["settings"])
-                self.bus = Bus(json["bus"])
-                self.mod = Module(json["module"], self.bus, self.settings)
+                self.settings, self.bus, self.mod = load_model(jsonfile, cache=cache)
                 self.recently_saved = True
             except Exception as e:
                 print("An unresolvable error has occurred:")
@@ -124,7 +122,7 @@ class Editor(object):
                             reg.sig_type,
                             reg.width,
                             reg.reset,
-                            add_line_breaks(reg.description, 25),
+                            reg.description_with_breaks,
                         ]
                     )
                 return table
@@ -174,7 +172,7 @@ class Editor(object):
                         field.get_pos_str(),
                         field.width,
                         field.reset,
-                        add_line_breaks(field.description, 25),
+                        field.description_with_breaks,
                     ]
                 )
 
@@ -186,22 +184,21 @@ class Editor(object):
         Get user input to create a register that may or may not consists of individual fields
         """
         reg = OrderedDict()
-        reg_names = [regs.name for regs in self.mod.registers]
         print("Input register information: ")
         try:
-            reg["name"] = get_identifier("Name: ", reg_names)
+            reg["name"] = get_identifier("Name: ", self.mod.reg_names)
             reg["description"] = input("Description: ")
             reg["mode"] = get_list_choice(
                 "Choose register mode: ", Register.supported_modes, "lower", 0
             )
 
             fields = []
+            field_names = Namespace()
 
             width_consumed = 0
             while True:
                 field_dic = OrderedDict()
                 add_fields = input("Do you want to add a field? (Y/n): ")
-                field_names = [field["name"] for field in fields]
                 if add_fields.upper() == "N":
                     break
                 elif add_fields.upper() == "Y" or add_fields == "":
@@ -248,6 +245,7 @@ class Editor(object):
                     field_dic["description"] = input("Field description: ")
 
                     fields.append(field_dic)
+                    field_names.add(field_dic["name"])
                     # Check if all available data bits are use
                     if width_consumed == self.mod.data_width:
                         print(
@@ -459,7 +457,7 @@ class Editor(object):
                 input("Are you sure you want to delete this register? (y/N): ").upper()
                 == "Y"
             ):
-                del self.mod.registers[int(choice)]
+                self.mod.remove_register(int(choice))
                 self.recently_saved = False
 
         self.update_menu()
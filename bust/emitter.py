@@ -0,0 +1,87 @@
+"""! @package emitter
+Contains the Emitter class used by the code generators
+
+"""
+from contextlib import contextmanager
+
+from bust.utils import spaces_in_tab
+
+
+class Emitter(object):
+    """! @brief Indentation-aware output buffer for the code generators
+
+    Text is appended as chunks to a list and only joined once, when the output is
+    requested. Every non-empty line is prefixed with the current indentation as it
+    is written, so nested blocks never have to be re-indented afterwards.
+
+    If a file object is given as out, the buffered chunks are written to it each
+    time they exceed buffer_size characters, so the output never has to be held
+    in memory as a whole.
+    """
+
+    def __init__(self, tabs=0, out=None, buffer_size=1 << 16):
+        self._chunks = []
+        self._buffered = 0
+        self._out = out
+        self._buffer_size = buffer_size
+        self._line_start = True
+        self._tabs = 0
+        self._indent = ""
+        self._set_tabs(tabs)
+
+    def _set_tabs(self, tabs):
+        self._tabs = tabs
+        self._indent = spaces_in_tab * tabs * " "
+
+    @contextmanager
+    def indent(self, tabs=1):
+        """! @brief Increase the indentation of everything written in the block"""
+        self._set_tabs(self._tabs + tabs)
+        try:
+            yield self
+        finally:
+            self._set_tabs(self._tabs - tabs)
+
+    def write(self, string, tabs=0):
+        """! @brief Write string with every non-empty line indented
+
+        Equivalent to appending indent_string(string, tabs) to the output, with tabs
+        counted from the current indentation.
+        """
+        if not string:
+            return
+        indent = spaces_in_tab * (self._tabs + tabs) * " "
+        if indent:
+            string = "\n".join(
+                indent + line if line else line for line in string.split("\n")
+            )
+        self._chunks.append(string)
+        self._buffered += len(string)
+        self._line_start = string[-1] == "\n"
+        if self._out is not None and self._buffered >= self._buffer_size:
+            self.flush()
+
+    def newline(self):
+        """! @brief Terminate the current line unless nothing is written on it"""
+        if not self._line_start:
+            self.write("\n")
+
+    def flush(self):
+        """! @brief Write all buffered chunks to the output file"""
+        if self._out is None:
+            raise RuntimeError("Emitter has no output file to flush to")
+        if self._chunks:
+            self._out.write("".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+
+    def getvalue(self):
+        """! @brief Returns everything written so far as one string
+
+        With an output file, only what has not been flushed yet is returned.
+        """
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        if self._chunks:
+            return self._chunks[0]
+        return ""
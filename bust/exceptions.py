@@ -54,6 +54,17 @@ class InvalidResetMode(RuntimeError):
         super().__init__(error(msg))
 
 
+class InvalidBusOption(RuntimeError):
+    """@brief Raised when a bus option has an unsupported value."""
+
+    def __init__(self, option, value, supported):
+        msg = "Bus option {} must be one of: {}\n".format(
+            option, ", ".join(str(value) for value in supported)
+        )
+        msg += "but was: {}".format(value)
+        super().__init__(error(msg))
+
+
 class ModuleDataBitsExceeded(Exception):
     """! @brief Raised when the specified module data bits are exceeded."""
 
@@ -105,3 +116,14 @@ class InvalidStallValue(RuntimeError):
     def __init__(self, val):
         msg = "Invalid stall value: {}. Must be between 2 and 255.".format(val)
         super().__init__(msg)
+
+
+class OverwriteRefused(RuntimeError):
+    """! @brief Raised when an existing file would be overwritten, and the overwrite
+    policy is fail.
+    """
+
+    def __init__(self, path):
+        msg = "Will not overwrite existing file: {}\n".format(path)
+        msg += "Use -f, -F or --overwrite to choose what to do with existing files"
+        super().__init__(error(msg))
@@ -1,3 +1,4 @@
+import sys
 from collections import OrderedDict
 
 from bust.utils import add_line_breaks
@@ -6,18 +7,36 @@ from bust.utils import add_line_breaks
 class Field(object):
     """Documentation for Field"""
 
+    __slots__ = (
+        "name",
+        "sig_type",
+        "width",
+        "reset",
+        "description",
+        "_description_with_breaks",
+        "pos_low",
+        "pos_high",
+    )
+
     supported_types = ["slv", "sl"]
 
     def __init__(self, name, sig_type, width, reset, description, pos_low):
         self.name = name
-        self.sig_type = sig_type
+        self.sig_type = sys.intern(sig_type)
         self.width = width
         self.reset = reset
         self.description = description
-        self.description_with_breaks = add_line_breaks(description, 25)
+        self._description_with_breaks = None
         self.pos_low = pos_low
         self.pos_high = pos_low + width - 1
 
+    @property
+    def description_with_breaks(self):
+        """! @brief The description with line breaks, computed when first used"""
+        if self._description_with_breaks is None:
+            self._description_with_breaks = add_line_breaks(self.description, 25)
+        return self._description_with_breaks
+
     def get_pos_str(self):
         if self.sig_type == "sl":
             return str(self.pos_low)
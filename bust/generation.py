@@ -1,144 +1,230 @@
 import os
 import logging
-import subprocess
+from collections import namedtuple
 
-from bust.utils import write_string_to_file, update_module_top_level
+from bust.bus import Bus
+from bust.documentation import Documentation
+from bust.emitter import Emitter
+from bust.exceptions import OverwriteRefused
+from bust.header import Header
+from bust.manifest import Manifest
+from bust.module import Module
+from bust.profiling import Profiler
+from bust.settings import Settings
+from bust.testbench import Testbench
+from bust.utils import (
+    json_parser,
+    update_module_top_level,
+    confirm_overwrite,
+    create_temp_file,
+    files_equal,
+    get_overwrite_policy,
+)
 
 logger = logging.getLogger(__name__)
 
+## One output file of generate_output
+#
+# The content is produced by calling the method named method of the generator
+# object named source, with the generator objects named in args as arguments.
+# emit tells if the method writes to an Emitter or returns a string.
+Artifact = namedtuple(
+    "Artifact",
+    ["group", "filename", "output_dir", "source", "method", "args", "emit", "force"],
+)
 
-def generate_output(
-    settings, bus, module, header, documentation, testbench, gen_settings
-):
-    """Starts the generation of all output files"""
+## Paths of the files written and kept by generate_output
+#
+# Files in unchanged were not written, as their inputs are the same as when they
+# were last written, or, with gen_settings["if_changed"], as their content is.
+Summary = namedtuple("Summary", ["written", "skipped", "unchanged"])
 
-    # Control all output directories
-    proj_dir = os.path.expanduser(gen_settings["dir"])  # Make sure that we understand ~
-    logger.info("Project path: {}".format(os.path.abspath(proj_dir)))
-    if settings.mod_subdir:
-        mod_dir = os.path.join(proj_dir, module.name)
-    else:
-        mod_dir = proj_dir
+# Generator objects of the worker process, and if renders are to be profiled, set by
+# _init_worker
+_worker_sources = None
+_worker_profile = False
 
-    if settings.bus_subdir and not bus.bus_type == "ipbus":
-        bus_dir = os.path.join(proj_dir, bus.bus_type)
-    else:
-        bus_dir = mod_dir
 
-    mod_hdl = os.path.join(mod_dir, settings.hdl_dir)
-    mod_script = os.path.join(mod_dir, settings.script_dir)
-    mod_tb = os.path.join(mod_dir, settings.tb_dir)
-    mod_doc = os.path.join(mod_dir, settings.doc_dir)
-    mod_header = os.path.join(mod_dir, settings.header_dir)
-    mod_sim = os.path.join(mod_dir, settings.sim_dir)
-    bus_hdl = os.path.join(bus_dir, settings.hdl_dir)
-    bus_sim = os.path.join(bus_dir, settings.sim_dir)
+def _render_to_temp(render, output_file, output_dir, emit, buffer_size=1 << 16):
+    """! @brief Render to a temporary file in output_dir and return its path
 
-    logger.debug("Creating all output directories")
+    If emit is True, render is called with an Emitter writing to the file,
+    otherwise render must return the string to write.
+    """
+    if not os.path.isdir(output_dir):
+        raise RuntimeError("Output dir does not exist: {}".format(output_dir))
+
+    fd, tmp_path = create_temp_file(output_file, output_dir)
     try:
-        os.makedirs(proj_dir, exist_ok=True)
-        os.makedirs(mod_dir, exist_ok=True)
-        os.makedirs(bus_dir, exist_ok=True)
-        os.makedirs(mod_hdl, exist_ok=True)
-        os.makedirs(mod_script, exist_ok=True)
-        os.makedirs(mod_tb, exist_ok=True)
-        os.makedirs(mod_doc, exist_ok=True)
-        os.makedirs(mod_header, exist_ok=True)
-        os.makedirs(mod_sim, exist_ok=True)
-        os.makedirs(bus_hdl, exist_ok=True)
-        os.makedirs(bus_sim, exist_ok=True)
+        with os.fdopen(fd, "w") as strfile:
+            if emit:
+                e = Emitter(out=strfile, buffer_size=buffer_size)
+                render(e)
+                e.flush()
+            else:
+                strfile.write(render())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
 
-    except Exception:
-        logger.error("ERROR: Could not create output directories")
-        exit(1)
+
+def _commit(tmp_path, output_file, output_dir, if_changed=False):
+    """! @brief Replace output_file with the temporary file
+
+    If if_changed is True and output_file already has the same content, it is left
+    untouched and False is returned.
+    """
+    joined = os.path.join(output_dir, output_file)
+    if if_changed and files_equal(joined, tmp_path):
+        logger.debug("Unchanged: " + joined)
+        os.unlink(tmp_path)
+        return False
+    logger.debug("Writing to " + joined)
+    os.replace(tmp_path, joined)
+    return True
+
+
+def write_emitted_to_file(
+    emit,
+    output_file,
+    output_dir,
+    force_overwrite=False,
+    policy="ask",
+    buffer_size=1 << 16,
+    if_changed=False,
+):
+    """! @brief Stream the output of a generator to file
+
+    emit is called with an Emitter that writes to a temporary file in output_dir.
+    The temporary file replaces output_file once emit returns, so the complete
+    output is never held in memory and output_file is never left half-written.
+    If if_changed is True, or policy is if-changed, an existing file with the same
+    content is left untouched. See confirm_overwrite for policy.
+    Returns False if an existing file was kept.
+    """
+    if not os.path.isdir(output_dir):
+        raise RuntimeError("Output dir does not exist: {}".format(output_dir))
+
+    path = os.path.join(output_dir, output_file)
+    if_changed = if_changed or policy == "if-changed"
+    if not if_changed and not confirm_overwrite(path, force_overwrite, policy):
+        return False
+
+    tmp_path = _render_to_temp(emit, output_file, output_dir, True, buffer_size)
+    if if_changed:
+        if files_equal(path, tmp_path):
+            logger.debug("Unchanged: " + path)
+            os.unlink(tmp_path)
+            return False
+        if not confirm_overwrite(path, force_overwrite, policy):
+            os.unlink(tmp_path)
+            return False
+    _commit(tmp_path, output_file, output_dir)
+    return True
+
+
+def _init_worker(sources, profile=False):
+    global _worker_sources, _worker_profile
+    _worker_sources = sources
+    _worker_profile = profile
+
+
+def _render_artifact(sources, artifact):
+    obj = sources[artifact.source]
+    args = [sources[arg] for arg in artifact.args]
+    method = getattr(obj, artifact.method)
+    if artifact.emit:
+        render = lambda e: method(e, *args)
     else:
-        logger.debug("Successfully created all output directories")
+        render = lambda: method(*args)
+    return _render_to_temp(
+        render, artifact.filename, artifact.output_dir, artifact.emit
+    )
+
+
+def _render_stage(artifact):
+    return "render " + artifact.filename
+
+
+def _render_artifact_in_worker(artifact):
+    """! @brief Returns the temporary file and the profiled stages of the render"""
+    profiler = Profiler(_worker_profile)
+    with profiler.stage(_render_stage(artifact)):
+        tmp_path = _render_artifact(_worker_sources, artifact)
+    return tmp_path, profiler.stages
+
+
+def _get_artifacts(settings, bus, module, gen_settings, dirs):
+    """! @brief Returns all output files to generate, in the order they are written"""
+    artifacts = []
+    force_ow = gen_settings["force_ow"]
+
+    def add(
+        group, filename, output_dir, source, method, args=(), emit=True, force=None
+    ):
+        if force is None:
+            force = force_ow
+        artifacts.append(
+            Artifact(group, filename, output_dir, source, method, args, emit, force)
+        )
 
     if gen_settings["gen_bus"]:
-        logger.info("Generating Bus VHDL Package File...")
-        try:
-            filename = "{}_pkg.vhd".format(bus.bus_type)
-            write_string_to_file(
-                bus.return_bus_pkg_VHDL(), filename, bus_hdl, gen_settings["force_ow"]
-            )
-        except Exception:
-            logger.error("ERROR: Could not generate Bus VHDL Package File")
-            exit(1)
+        group = "Bus VHDL Package File"
+        filename = "{}_pkg.vhd".format(bus.bus_type)
+        add(group, filename, dirs["bus_hdl"], "bus", "return_bus_pkg_VHDL", emit=False)
 
     if gen_settings["gen_mod"]:
-        logger.info("Generating Module VHDL Files...")
-        try:
-            # PIF
-            filename = "{}_{}_pif.vhd".format(module.name, bus.short_name)
-            write_string_to_file(
-                bus.return_bus_pif_VHDL(module),
+        group = "Module VHDL Files"
+        # PIF
+        filename = "{}_{}_pif.vhd".format(module.name, bus.short_name)
+        add(group, filename, dirs["mod_hdl"], "bus", "emit_bus_pif_VHDL", ("module",))
+        # PIF Package
+        filename = "{}_pif_pkg.vhd".format(module.name)
+        add(group, filename, dirs["mod_hdl"], "module", "emit_module_pkg_VHDL")
+        # Top Module
+        filename = "{}.vhd".format(module.name)
+        if gen_settings["update_top"]:
+            # The existing top level is merged in generate_output
+            add(
+                group,
                 filename,
-                mod_hdl,
-                gen_settings["force_ow"],
+                dirs["mod_hdl"],
+                "module",
+                "return_module_VHDL",
+                emit=False,
+                force=gen_settings["force_ow_top"],
             )
-            # PIF Package
-            filename = "{}_pif_pkg.vhd".format(module.name)
-            write_string_to_file(
-                module.return_module_pkg_VHDL(),
+        else:
+            add(
+                group,
                 filename,
-                mod_hdl,
-                gen_settings["force_ow"],
+                dirs["mod_hdl"],
+                "module",
+                "emit_module_VHDL",
+                force=gen_settings["force_ow_top"],
             )
 
-            # Top Module
-            filename = "{}.vhd".format(module.name)
-            if gen_settings["update_top"]:
-                logger.info("Trying to update top level-file")
-                path = os.path.join(mod_hdl, filename)
-                new_top = update_module_top_level(path, module.return_module_VHDL())
-                write_string_to_file(
-                    new_top, filename, mod_hdl, gen_settings["force_ow_top"]
-                )
-            else:
-                write_string_to_file(
-                    module.return_module_VHDL(),
-                    filename,
-                    mod_hdl,
-                    gen_settings["force_ow_top"],
-                )
-
-        except Exception:
-            logger.error("ERROR: Could not generate Module VHDL Files")
-            exit(1)
-
     if gen_settings["gen_header"]:
-        logger.info("Generating Module Include Files...")
-        try:
-            filename = "{}.h".format(module.name)
-            write_string_to_file(
-                header.return_c_header(), filename, mod_header, gen_settings["force_ow"]
-            )
-            filename = "{}.hpp".format(module.name)
-            write_string_to_file(
-                header.return_cpp_header(),
-                filename,
-                mod_header,
-                gen_settings["force_ow"],
-            )
-            filename = "{}.py".format(module.name)
-            write_string_to_file(
-                header.return_python_header(),
-                filename,
+        group = "Module Include Files"
+        mod_header = dirs["mod_header"]
+        add(group, module.name + ".h", mod_header, "header", "emit_c_header")
+        add(group, module.name + ".hpp", mod_header, "header", "emit_cpp_header")
+        add(
+            group,
+            module.name + ".py",
+            mod_header,
+            "header",
+            "emit_python_header",
+        )
+        if bus.bus_type == "ipbus":
+            add(
+                group,
+                module.name + ".xml",
                 mod_header,
-                gen_settings["force_ow"],
+                "header",
+                "emit_ipbus_addr_table",
             )
-            if bus.bus_type == "ipbus":
-                filename = "{}.xml".format(module.name)
-                write_string_to_file(
-                    header.return_ipbus_addr_table(),
-                    filename,
-                    mod_header,
-                    gen_settings["force_ow"],
-                )
-
-        except Exception:
-            logger.error("ERROR: Could not generate Module Include Files")
-            exit(1)
 
     if gen_settings["gen_tb"]:
         if settings.uvvm_rel_path is None:
@@ -146,60 +232,522 @@ def generate_output(
                 "Cannot generate testbench: UVVM Relative Path is not specified"
             )
         else:
-            logger.info("Generating PIF Testbench Files...")
-            try:
-                filename = "component_list.txt"
-                write_string_to_file(
-                    testbench.return_uvvm_component_list(),
-                    filename,
-                    mod_script,
-                    gen_settings["force_ow"],
-                )
-                filename = "simulate_{}_pif.do".format(bus.bus_type)
-                write_string_to_file(
-                    testbench.return_tcl_script(),
-                    filename,
-                    mod_script,
-                    gen_settings["force_ow"],
-                )
-                filename = "{}_{}_pif_tb.vhd".format(module.name, bus.short_name)
-                write_string_to_file(
-                    testbench.return_vhdl_tb(),
-                    filename,
-                    mod_tb,
-                    gen_settings["force_ow"],
+            group = "PIF Testbench Files"
+            mod_script = dirs["mod_script"]
+            add(
+                group,
+                "component_list.txt",
+                mod_script,
+                "testbench",
+                "return_uvvm_component_list",
+                emit=False,
+            )
+            filename = "simulate_{}_pif.do".format(bus.bus_type)
+            add(
+                group,
+                filename,
+                mod_script,
+                "testbench",
+                "return_tcl_script",
+                emit=False,
+            )
+            filename = "{}_{}_pif_tb.vhd".format(module.name, bus.short_name)
+            add(group, filename, dirs["mod_tb"], "testbench", "emit_vhdl_tb")
+
+    if gen_settings["gen_doc"]:
+        group = "Module Documentation"
+        filename = "{}.tex".format(module.name)
+        add(group, filename, dirs["mod_doc"], "documentation", "emit_tex_documentation")
+
+    return artifacts
+
+
+def _overwrite_policy(artifact, gen_settings):
+    """! @brief Returns the overwrite policy of artifact, always if it is forced
+
+    Only -F forces the top level, so -u alone asks before the merged top level
+    replaces it.
+    """
+    if artifact.force:
+        return "always"
+    return gen_settings.get("overwrite", "ask")
+
+
+def _confirmed_artifacts(artifacts, gen_settings):
+    """! @brief Ask for permission to overwrite existing files up front
+
+    Returns the artifacts that are to be written.
+    """
+    confirmed = []
+    for artifact in artifacts:
+        policy = _overwrite_policy(artifact, gen_settings)
+        if gen_settings["update_top"] and artifact.method == "return_module_VHDL":
+            # update_module_top_level asks for itself, as the merged file may turn
+            # out to be the same
+            if policy == "never" and os.path.isfile(_path(artifact)):
+                logger.info("Did not update " + _path(artifact))
+            else:
+                confirmed.append(artifact)
+        elif confirm_overwrite(_path(artifact), policy=policy):
+            confirmed.append(artifact)
+    return confirmed
+
+
+def _write_artifact(artifact, tmp_path, gen_settings):
+    """! @brief Move the rendered artifact into place
+
+    Returns False if the file already had the same content, see _commit.
+    """
+    if_changed = gen_settings.get("if_changed", False)
+    if gen_settings["update_top"] and artifact.method == "return_module_VHDL":
+        logger.info("Trying to update top level-file")
+        path = os.path.join(artifact.output_dir, artifact.filename)
+        try:
+            with open(tmp_path) as f:
+                new_top = update_module_top_level(
+                    path, f.read(), _overwrite_policy(artifact, gen_settings)
                 )
+        finally:
+            os.unlink(tmp_path)
+        tmp_path = _render_to_temp(
+            lambda: new_top, artifact.filename, artifact.output_dir, False
+        )
+    return _commit(tmp_path, artifact.filename, artifact.output_dir, if_changed)
 
-            except Exception:
-                logger.error("ERROR: Could not generate PIF Testbench Files")
-                exit(1)
 
-    if gen_settings["gen_doc"]:
-        logger.info("Generating Module Documentation...")
+def _is_tex(artifact):
+    return artifact.method == "emit_tex_documentation"
+
+
+def _path(artifact):
+    return os.path.join(artifact.output_dir, artifact.filename)
+
+
+def _discard(futures):
+    """! @brief Remove the temporary files of renders that are not written"""
+    for future in futures:
         try:
-            filename = "{}.tex".format(module.name)
-            write_string_to_file(
-                documentation.return_tex_documentation(),
-                filename,
-                mod_doc,
-                gen_settings["force_ow"],
-            )
+            tmp_path = future.result()[0]
         except Exception:
-            logger.error("ERROR: Could not generate Module Documentation")
-            exit(1)
+            continue
+        if os.path.isfile(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_model(json_file, profiler=None, cache=None):
+    """! @brief Parse a module JSON file
 
+    If a ModelCache is given as cache, the model is loaded from it if it has been
+    parsed from the same file before, and otherwise stored in it.
+    Returns the settings, bus and module objects.
+    """
+    if profiler is None:
+        profiler = Profiler(False)
+    entry = None
+    model = None
+    if cache is not None:
+        with profiler.stage("cache load"):
+            entry = cache.entry(json_file)
+            model = cache.load(entry)
+    if model is None:
+        model = _parse_model(json_file, profiler)
+        if cache is not None:
+            with profiler.stage("cache store"):
+                cache.store(entry, *model)
+    # Logged also when loaded from the cache
+    for d in model[2].warnings:
+        logger.warning("Warning - {} {} - {}".format(d.owner, d.identifier, d.message))
+    return model
+
+
+def _parse_model(json_file, profiler):
+    with profiler.stage("json_parser"):
+        json_dict = json_parser(json_file)
+    with profiler.stage("Settings"):
+        settings = Settings(json_file, json_dict["settings"])
+    with profiler.stage("Bus"):
+        bus = Bus(json_dict["bus"])
+    with profiler.stage("Module"):
+        module = Module(json_dict["module"], bus, settings)
+    return settings, bus, module
+
+
+def load_generators(json_file, profiler=None, cache=None):
+    """! @brief Parse a module JSON file
+
+    See load_model for cache.
+    Returns the settings, bus, module, header, documentation and testbench objects
+    used by generate_output.
+    """
+    settings, bus, module = load_model(json_file, profiler, cache)
+    header = Header(module)
+    documentation = Documentation(module)
+    testbench = Testbench(module, bus.get_VHDL_generator(), settings)
+    return settings, bus, module, header, documentation, testbench
+
+
+def get_gen_settings(args, settings, bus):
+    """! @brief Returns the file generation settings from the docopt arguments"""
+    gs = {}
+
+    if args.get("-o") is None:
+        gs["dir"] = settings.project_path
+    else:
+        gs["dir"] = args["-o"]
+
+    # Check if force overwrite is set
+    gs["force_ow"] = False
+    gs["force_ow_top"] = False
+    if args.get("-F"):
+        gs["force_ow"] = True
+        gs["force_ow_top"] = True
+    elif args.get("-f"):
+        gs["force_ow"] = True
+
+    # Check if top-level are to be updated
+    gs["update_top"] = False
+    # The update asks for itself before replacing the top level, unless -F is set
+    if args.get("-u"):
+        gs["update_top"] = True
+
+    if bus.bus_type == "axi":
+        gs["gen_bus"] = True
+    else:
+        gs["gen_bus"] = False
+    if args.get("-b"):
+        gs["gen_bus"] = False
+
+    gs["gen_doc"] = True
+    gs["gen_pdf"] = True
+    if args.get("-d"):
+        gs["gen_doc"] = False
+        gs["gen_pdf"] = False
+    elif args.get("-p"):
+        gs["gen_pdf"] = False
+
+    gs["gen_tb"] = True
+    if args.get("-t"):
+        gs["gen_tb"] = False
+
+    gs["gen_header"] = True
+    if args.get("-i"):
+        gs["gen_header"] = False
+
+    gs["gen_mod"] = True
+    if args.get("-m"):
+        gs["gen_mod"] = False
+
+    gs["rebuild"] = bool(args.get("-r"))
+    gs["if_changed"] = bool(args.get("--if-changed"))
+
+    gs["overwrite"] = get_overwrite_policy(args.get("--overwrite") or "ask")
+    if gs["overwrite"] == "if-changed":
+        gs["if_changed"] = True
+    gs["jobs"] = 1
+    return gs
+
+
+def get_jobs(value):
+    """! @brief Returns the number of worker processes given on the command line
+
+    0 means one per CPU.
+    """
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = -1
+    if jobs < 0:
+        raise ValueError("Number of jobs must be a non-negative integer")
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def get_output_dirs(settings, bus, module, gen_settings):
+    """! @brief Returns a dictionary with all output directories of the module"""
+    proj_dir = os.path.expanduser(gen_settings["dir"])  # Make sure that we understand ~
+    if settings.mod_subdir:
+        mod_dir = os.path.join(proj_dir, module.name)
+    else:
+        mod_dir = proj_dir
+
+    if settings.bus_subdir and not bus.bus_type == "ipbus":
+        bus_dir = os.path.join(proj_dir, bus.bus_type)
+    else:
+        bus_dir = mod_dir
+
+    return {
+        "proj": proj_dir,
+        "mod": mod_dir,
+        "bus": bus_dir,
+        "mod_hdl": os.path.join(mod_dir, settings.hdl_dir),
+        "mod_script": os.path.join(mod_dir, settings.script_dir),
+        "mod_tb": os.path.join(mod_dir, settings.tb_dir),
+        "mod_doc": os.path.join(mod_dir, settings.doc_dir),
+        "mod_header": os.path.join(mod_dir, settings.header_dir),
+        "mod_sim": os.path.join(mod_dir, settings.sim_dir),
+        "bus_hdl": os.path.join(bus_dir, settings.hdl_dir),
+        "bus_sim": os.path.join(bus_dir, settings.sim_dir),
+    }
+
+
+def get_manifest(module, dirs):
+    """! @brief Returns the manifest of the files generated for module
+
+    dirs are the output directories, see get_output_dirs.
+    """
+    return Manifest(os.path.join(dirs["mod"], ".{}_manifest.json".format(module.name)))
+
+
+def _pdf_path(tex_file):
+    return os.path.splitext(tex_file)[0] + ".pdf"
+
+
+def pdf_up_to_date(tex_file, manifest):
+    """! @brief Check if the PDF of tex_file was generated from the same LaTeX
+
+    Returns True if it was, and the PDF has not been modified since, and the hash
+    of tex_file to record once the PDF is generated, see record_pdf.
+    """
+    try:
+        tex_hash = Manifest.file_hash(tex_file)
+    except OSError:
+        # pdflatex reports the missing file
+        return False, None
+    return manifest.is_unchanged(_pdf_path(tex_file), tex_hash), tex_hash
+
+
+def record_pdf(manifest, tex_file, tex_hash, success):
+    """! @brief Record the PDF generated from tex_file in manifest and save it
+
+    If pdflatex failed, the PDF is forgotten so that it is generated again.
+    """
+    pdf_file = _pdf_path(tex_file)
+    if success and tex_hash is not None and os.path.isfile(pdf_file):
+        manifest.record(pdf_file, tex_hash)
+    else:
+        manifest.discard(pdf_file)
+    manifest.save()
+
+
+def generate_output(
+    settings, bus, module, header, documentation, testbench, gen_settings
+):
+    """Starts the generation of all output files
+
+    Files that are unchanged according to the manifest of the previous run are
+    not generated again, unless gen_settings["rebuild"] is set. With
+    gen_settings["if_changed"], files are generated before it is decided whether to
+    overwrite them, and existing files with the same content are left untouched.
+
+    The PDF is generated by pdflatex in the background, while the other files are
+    generated. pdflatex is not run if the LaTeX file is the same as the one the
+    existing PDF was generated from.
+
+    If gen_settings["profiler"] is set, the rendering of each file and the wait for
+    pdflatex are profiled with it.
+
+    Returns a Summary of the files that were written and the existing files that
+    were kept.
+    """
+
+    # Control all output directories
+    dirs = get_output_dirs(settings, bus, module, gen_settings)
+    logger.info("Project path: {}".format(os.path.abspath(dirs["proj"])))
+
+    logger.debug("Creating all output directories")
+    try:
+        for path in dirs.values():
+            os.makedirs(path, exist_ok=True)
+
+    except Exception:
+        logger.error("ERROR: Could not create output directories")
+        exit(1)
+    else:
+        logger.debug("Successfully created all output directories")
+
+    sources = {
+        "bus": bus,
+        "module": module,
+        "header": header,
+        "documentation": documentation,
+        "testbench": testbench,
+    }
+    artifacts = _get_artifacts(settings, bus, module, gen_settings, dirs)
+    jobs = gen_settings.get("jobs", 1)
+    if_changed = gen_settings.get("if_changed", False)
+    profiler = gen_settings.get("profiler") or Profiler(False)
+    written = []
+    skipped = []
+    unchanged = []
+
+    latex = None
+    tex_path = os.path.join(dirs["mod_doc"], module.name + ".tex")
     if gen_settings["gen_pdf"]:
+        from bust.latex import LatexRunner
+
+        latex = LatexRunner()
+        # Write the LaTeX file first, so that pdflatex runs while the other files
+        # are generated
+        artifacts.sort(key=lambda artifact: not _is_tex(artifact))
+
+    manifest = get_manifest(module, dirs)
+    model_hash = Manifest.model_hash(module)
+    fingerprints = {}
+    for artifact in artifacts:
+        fingerprints[artifact] = Manifest.fingerprint(
+            model_hash,
+            artifact.filename,
+            artifact.method,
+            artifact.args,
+            gen_settings["update_top"],
+        )
+    if not gen_settings.get("rebuild", False):
+        unchanged = [
+            artifact
+            for artifact in artifacts
+            if manifest.is_unchanged(_path(artifact), fingerprints[artifact])
+        ]
+        for artifact in unchanged:
+            logger.debug("Unchanged: " + _path(artifact))
+        artifacts = [artifact for artifact in artifacts if artifact not in unchanged]
+        unchanged = [_path(artifact) for artifact in unchanged]
+
+    def write(artifact, tmp_path):
+        if if_changed:
+            # Nothing has been asked before rendering
+            if files_equal(_path(artifact), tmp_path):
+                os.unlink(tmp_path)
+                logger.debug("Unchanged: " + _path(artifact))
+                unchanged.append(_path(artifact))
+                manifest.record(_path(artifact), fingerprints[artifact])
+                return
+            try:
+                confirmed = _confirmed_artifacts([artifact], gen_settings)
+            except OverwriteRefused:
+                os.unlink(tmp_path)
+                raise
+            if not confirmed:
+                os.unlink(tmp_path)
+                skip(artifact)
+                return
+        if _write_artifact(artifact, tmp_path, gen_settings):
+            written.append(_path(artifact))
+        else:
+            unchanged.append(_path(artifact))
+        manifest.record(_path(artifact), fingerprints[artifact])
+
+    def skip(artifact):
+        skipped.append(_path(artifact))
+        manifest.discard(_path(artifact))
+
+    pdf_checked = False
+    pdf_started = False
+    tex_hash = None
+
+    def start_pdf():
+        # As soon as the LaTeX file is written, or kept
+        nonlocal pdf_checked, pdf_started, tex_hash
+        if latex is None or pdf_checked:
+            return
+        pdf_checked = True
+        up_to_date, tex_hash = pdf_up_to_date(tex_path, manifest)
+        if up_to_date:
+            logger.info("Documentation PDF is up to date")
+            return
         logger.info("Generating Documentation PDF...")
-        try:
-            subprocess.call(
-                [
-                    "pdflatex",
-                    "--interaction=batchmode",
-                    f"--output-directory={mod_doc}",
-                    os.path.join(mod_doc, module.name + ".tex"),
-                ],
-                stdout=open(os.devnull, "wb"),
+        latex.start(tex_path, dirs["mod_doc"])
+        pdf_started = True
+
+    if not any(_is_tex(artifact) for artifact in artifacts):
+        start_pdf()
+
+    try:
+        if jobs > 1:
+            # Ask all questions before starting the workers, which then render all
+            # files concurrently. The files are still written in order.
+            from concurrent.futures import ProcessPoolExecutor
+
+            if not if_changed:
+                confirmed = _confirmed_artifacts(artifacts, gen_settings)
+                for artifact in artifacts:
+                    if artifact not in confirmed:
+                        skip(artifact)
+                artifacts = confirmed
+                if not any(_is_tex(artifact) for artifact in artifacts):
+                    start_pdf()
+            workers = min(jobs, len(artifacts)) or 1
+            with ProcessPoolExecutor(
+                workers,
+                initializer=_init_worker,
+                initargs=(sources, profiler.enabled),
+            ) as executor:
+                futures = [
+                    executor.submit(_render_artifact_in_worker, artifact)
+                    for artifact in artifacts
+                ]
+                group = None
+                for i, (artifact, future) in enumerate(zip(artifacts, futures)):
+                    if artifact.group != group:
+                        group = artifact.group
+                        logger.info("Generating {}...".format(group))
+                    try:
+                        tmp_path, stages = future.result()
+                        profiler.add(stages)
+                        write(artifact, tmp_path)
+                    except OverwriteRefused:
+                        _discard(futures[i + 1 :])
+                        raise
+                    except Exception:
+                        logger.error("ERROR: Could not generate {}".format(group))
+                        logger.debug(
+                            "Generation of {} failed".format(artifact.filename)
+                        )
+                        _discard(futures[i + 1 :])
+                        exit(1)
+                    if _is_tex(artifact):
+                        start_pdf()
+        else:
+            group = None
+            for artifact in artifacts:
+                if artifact.group != group:
+                    group = artifact.group
+                    logger.info("Generating {}...".format(group))
+                try:
+                    if if_changed or _confirmed_artifacts([artifact], gen_settings):
+                        with profiler.stage(_render_stage(artifact)):
+                            tmp_path = _render_artifact(sources, artifact)
+                        write(artifact, tmp_path)
+                    else:
+                        skip(artifact)
+                except OverwriteRefused:
+                    raise
+                except Exception:
+                    logger.error("ERROR: Could not generate {}".format(group))
+                    exit(1)
+                if _is_tex(artifact):
+                    start_pdf()
+    except OverwriteRefused as e:
+        logger.error(str(e))
+        exit(1)
+    finally:
+        # Also keep track of the files written before a failure
+        manifest.save()
+
+    if unchanged:
+        logger.info("{} files are up to date".format(len(unchanged)))
+
+    if latex is not None:
+        # Only the time spent waiting for pdflatex after the other files are written
+        with profiler.stage("pdflatex"):
+            failures = latex.wait()
+        for tex_file, message in failures:
+            logger.error(
+                "ERROR: PDF Generation Failed: {}: {}".format(tex_file, message)
             )
-        except Exception:
-            logger.error("ERROR: PDF Generation Failed")
+        if pdf_started:
+            record_pdf(manifest, tex_path, tex_hash, not failures)
+        if failures:
             exit(1)
+
+    return Summary(written, skipped, unchanged)
@@ -1,4 +1,4 @@
-from bust.utils import indent_string
+from bust.emitter import Emitter
 
 
 class Header(object):
@@ -8,201 +8,155 @@ class Header(object):
         self.module = module
 
     def return_c_header(self):
-        s = ""
+        e = Emitter()
+        self.emit_c_header(e)
+        return e.getvalue()
 
-        s += "#ifndef " + self.module.name.upper() + "_H\n"
-        s += "#define " + self.module.name.upper() + "_H\n"
+    def emit_c_header(self, e):
+        e.write("#ifndef " + self.module.name.upper() + "_H\n")
+        e.write("#define " + self.module.name.upper() + "_H\n")
 
-        s += "\n\n"
+        e.write("\n\n")
 
         for reg in self.module.registers:
-            s += "/* Register: " + reg.name + " */\n"
-            s += f'#define {reg.name.upper()}_MODE "{reg.mode}";\n'
-            s += f"#define {reg.name.upper()}_WIDTH {reg.width};\n"
-            s += f"#define {reg.name.upper()}_OFFSET {str(hex(reg.address))};\n"
-            s += f"#define {reg.name.upper()}_RESET {reg.reset};\n"
-            s += "\n"
+            e.write(
+                "/* Register: " + reg.name + " */\n"
+                f'#define {reg.name.upper()}_MODE "{reg.mode}";\n'
+                f"#define {reg.name.upper()}_WIDTH {reg.width};\n"
+                f"#define {reg.name.upper()}_OFFSET {str(hex(reg.address))};\n"
+                f"#define {reg.name.upper()}_RESET {reg.reset};\n"
+                "\n"
+            )
 
             if reg.sig_type == "fields":
                 for field in reg.fields:
-                    s += "/* Field: " + field.name + " */\n"
-                    s += (
-                        "#define "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_OFFSET "
-                    )
-                    s += str(field.pos_low) + "\n"
-                    s += (
-                        "#define "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_WIDTH "
-                    )
-                    s += str(field.width) + "\n"
-                    s += (
-                        "#define "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_RESET "
-                    )
-                    s += field.reset + "\n"
-                    s += (
-                        "#define "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_MASK "
+                    prefix = "#define " + reg.name.upper() + "_" + field.name.upper()
+                    e.write(
+                        "/* Field: " + field.name + " */\n"
+                        f"{prefix}_OFFSET {field.pos_low}\n"
+                        f"{prefix}_WIDTH {field.width}\n"
+                        f"{prefix}_RESET {field.reset}\n"
+                        f"{prefix}_MASK {hex(pow(2, field.width) - 1 << field.pos_low)}\n"
+                        "\n"
                     )
-                    s += str(hex(pow(2, field.width) - 1 << field.pos_low)) + "\n"
-                    s += "\n"
 
-        s += "#endif"
-        s += "\n"
-
-        return s
+        e.write("#endif")
+        e.write("\n")
 
     def return_cpp_header(self):
-        s = ""
+        e = Emitter()
+        self.emit_cpp_header(e)
+        return e.getvalue()
 
-        s += "#ifndef " + self.module.name.upper() + "_H\n"
-        s += "#define " + self.module.name.upper() + "_H\n"
-        s += "\n"
+    def emit_cpp_header(self, e):
+        e.write("#ifndef " + self.module.name.upper() + "_H\n")
+        e.write("#define " + self.module.name.upper() + "_H\n")
+        e.write("\n")
 
-        s += "#include <cstdint>\n"
-        s += "#include <string>\n\n"
+        e.write("#include <cstdint>\n")
+        e.write("#include <string>\n\n")
 
-        s += "namespace " + self.module.name.upper() + "\n"
-        s += "{\n"
+        e.write("namespace " + self.module.name.upper() + "\n")
+        e.write("{\n")
 
         for reg in self.module.registers:
-            s += "/* Register: " + reg.name + " */\n"
-            s += f'const std::string {reg.name.upper()}_MODE = "{reg.mode}";\n'
-            s += f"const uint32_t {reg.name.upper()}_WIDTH = {reg.width};\n"
-            s += (
+            e.write(
+                "/* Register: " + reg.name + " */\n"
+                f'const std::string {reg.name.upper()}_MODE = "{reg.mode}";\n'
+                f"const uint32_t {reg.name.upper()}_WIDTH = {reg.width};\n"
                 f"const uint32_t {reg.name.upper()}_OFFSET = {str(hex(reg.address))};\n"
+                f"const uint32_t {reg.name.upper()}_RESET = {reg.reset};\n"
+                "\n"
             )
-            s += f"const uint32_t {reg.name.upper()}_RESET = {reg.reset};\n"
-            s += "\n"
 
             if reg.sig_type == "fields":
                 for field in reg.fields:
-                    s += "/* Field: " + field.name + " */\n"
-                    s += (
-                        "const uint32_t "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_OFFSET = "
-                    )
-                    s += str(field.pos_low) + ";\n"
-                    s += (
-                        "const uint32_t "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_WIDTH = "
-                    )
-                    s += str(field.width) + ";\n"
-                    s += (
-                        "const uint32_t "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_RESET = "
+                    prefix = (
+                        "const uint32_t " + reg.name.upper() + "_" + field.name.upper()
                     )
-                    s += field.reset + ";\n"
-                    s += (
-                        "const uint32_t "
-                        + reg.name.upper()
-                        + "_"
-                        + field.name.upper()
-                        + "_MASK = "
+                    e.write(
+                        "/* Field: " + field.name + " */\n"
+                        f"{prefix}_OFFSET = {field.pos_low};\n"
+                        f"{prefix}_WIDTH = {field.width};\n"
+                        f"{prefix}_RESET = {field.reset};\n"
+                        f"{prefix}_MASK = {hex(pow(2, field.width) - 1 << field.pos_low)};\n"
+                        "\n"
                     )
-                    s += str(hex(pow(2, field.width) - 1 << field.pos_low)) + ";\n"
-                    s += "\n"
-        s += "};\n\n"
+        e.write("};\n\n")
 
-        s += "#endif"
-        s += "\n"
-
-        return s
+        e.write("#endif")
+        e.write("\n")
 
     def return_python_header(self):
-        s = ""
+        e = Emitter()
+        self.emit_python_header(e)
+        return e.getvalue()
 
-        s += "class " + self.module.name.upper() + "_H:\n"
+    def emit_python_header(self, e):
+        e.write("class " + self.module.name.upper() + "_H:\n")
 
         for reg in self.module.registers:
-            s += "\n"
-            s += indent_string('"""Register: ' + reg.name + '"""\n', 2)
-            s += indent_string(f'{reg.name.upper()}_MODE = "{reg.mode}"\n', 2)
-            s += indent_string(f"{reg.name.upper()}_WIDTH = {reg.width}\n", 2)
-            s += indent_string(
-                f"{reg.name.upper()}_OFFSET = {str(hex(reg.address))}\n", 2
+            e.write("\n")
+            e.write(
+                '"""Register: ' + reg.name + '"""\n'
+                f'{reg.name.upper()}_MODE = "{reg.mode}"\n'
+                f"{reg.name.upper()}_WIDTH = {reg.width}\n"
+                f"{reg.name.upper()}_OFFSET = {str(hex(reg.address))}\n"
+                f"{reg.name.upper()}_RESET = {reg.reset}\n",
+                2,
             )
-            s += indent_string(f"{reg.name.upper()}_RESET = {reg.reset}\n", 2)
 
             if reg.sig_type == "fields":
                 for field in reg.fields:
-                    s += "\n"
-                    s += indent_string('""" Field: ' + field.name + ' """\n', 2)
-                    s += indent_string(
-                        reg.name.upper() + "_" + field.name.upper() + "_OFFSET = ", 2
-                    )
-                    s += str(field.pos_low) + "\n"
-                    s += indent_string(
-                        reg.name.upper() + "_" + field.name.upper() + "_WIDTH = ", 2
-                    )
-                    s += str(field.width) + "\n"
-                    s += indent_string(
-                        reg.name.upper() + "_" + field.name.upper() + "_RESET = ", 2
+                    prefix = reg.name.upper() + "_" + field.name.upper()
+                    e.write("\n")
+                    e.write(
+                        '""" Field: ' + field.name + ' """\n'
+                        f"{prefix}_OFFSET = {field.pos_low}\n"
+                        f"{prefix}_WIDTH = {field.width}\n"
+                        f"{prefix}_RESET = {field.reset}\n"
+                        f"{prefix}_MASK = {hex(pow(2, field.width) - 1 << field.pos_low)}\n",
+                        2,
                     )
-                    s += field.reset + "\n"
-                    s += indent_string(
-                        reg.name.upper() + "_" + field.name.upper() + "_MASK = ", 2
-                    )
-                    s += str(hex(pow(2, field.width) - 1 << field.pos_low))
-                    s += "\n"
-
-        return s
 
     def return_ipbus_addr_table(self):
-        s = '<?xml version="1.0" encoding="ISO-8859-1"?>\n'
-        s += '<node id="{}">\n'.format(self.module.name)
-
-        for reg in self.module.registers:
-            par = '<node id="{}" address="0x{:08X}" permission="{}" description="{}" parameters="reset={}'.format(
-                reg.name, reg.address, reg.get_mode(), reg.description, reg.reset
-            )
-
-            if reg.mode == "pulse":
-                par += ";pulse_cycles={}".format(reg.pulse_cycles)
-            if reg.stall:
-                par += ";stall_cycles={}".format(reg.stall_cycles)
-            if reg.sig_type == "fields":
-                par += '">\n'
-            else:
-                par += '"/>\n'
-
-            if reg.sig_type == "fields":
-                for field in reg.fields:
-                    par2 = '<node id="{}" mask="{}" description="{}" parameters="reset={}"/>\n'.format(
-                        field.name,
-                        hex(field.get_mask()),
-                        field.description,
-                        field.reset,
-                    )
-                    par += indent_string(par2, 2)
-
-                par += "</node>\n"
-
-            s += indent_string(par, 2)
-
-        s += "</node>"
-        s += "\n"
-
-        return s
+        e = Emitter()
+        self.emit_ipbus_addr_table(e)
+        return e.getvalue()
+
+    def emit_ipbus_addr_table(self, e):
+        e.write('<?xml version="1.0" encoding="ISO-8859-1"?>\n')
+        e.write('<node id="{}">\n'.format(self.module.name))
+
+        with e.indent(2):
+            for reg in self.module.registers:
+                par = '<node id="{}" address="0x{:08X}" permission="{}" description="{}" parameters="reset={}'.format(
+                    reg.name, reg.address, reg.get_mode(), reg.description, reg.reset
+                )
+
+                if reg.mode == "pulse":
+                    par += ";pulse_cycles={}".format(reg.pulse_cycles)
+                if reg.stall:
+                    par += ";stall_cycles={}".format(reg.stall_cycles)
+                if reg.sig_type == "fields":
+                    par += '">\n'
+                else:
+                    par += '"/>\n'
+                e.write(par)
+
+                if reg.sig_type == "fields":
+                    for field in reg.fields:
+                        e.write(
+                            '<node id="{}" mask="{}" description="{}" parameters="reset={}"/>\n'.format(
+                                field.name,
+                                hex(field.get_mask()),
+                                field.description,
+                                field.reset,
+                            ),
+                            2,
+                        )
+
+                    e.write("</node>\n")
+
+        e.write("</node>")
+        e.write("\n")
@@ -0,0 +1,77 @@
+"""! @package latex
+Runs pdflatex in the background
+
+"""
+import logging
+import os
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+
+class LatexRunner(object):
+    """! @brief Generates PDFs with pdflatex in background processes
+
+    At most max_jobs pdflatex processes run at a time. start returns as soon as
+    the process is started, and wait collects the exit status of all of them.
+    """
+
+    def __init__(self, max_jobs=1):
+        self.max_jobs = max(1, max_jobs)
+        self.failures = []
+        self._running = []
+
+    def start(self, tex_file, output_dir=None):
+        """! @brief Start generating the PDF of tex_file in output_dir
+
+        output_dir defaults to the directory of tex_file. If max_jobs pdflatex
+        processes are already running, the oldest is waited for first.
+        """
+        if output_dir is None:
+            output_dir = os.path.dirname(tex_file)
+        while len(self._running) >= self.max_jobs:
+            self._wait_oldest()
+        logger.debug("Starting pdflatex for " + tex_file)
+        try:
+            process = subprocess.Popen(
+                [
+                    "pdflatex",
+                    "--interaction=batchmode",
+                    f"--output-directory={output_dir}",
+                    tex_file,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            self.failures.append((tex_file, "pdflatex is not installed"))
+        except OSError as e:
+            self.failures.append((tex_file, "Could not run pdflatex: " + str(e)))
+        else:
+            self._running.append((tex_file, output_dir, process))
+
+    def _wait_oldest(self):
+        tex_file, output_dir, process = self._running.pop(0)
+        returncode = process.wait()
+        if returncode != 0:
+            log_file = os.path.join(
+                output_dir, os.path.splitext(os.path.basename(tex_file))[0] + ".log"
+            )
+            self.failures.append(
+                (
+                    tex_file,
+                    "pdflatex exited with status {}, see {}".format(
+                        returncode, log_file
+                    ),
+                )
+            )
+
+    def wait(self):
+        """! @brief Wait for all pdflatex processes to finish
+
+        Returns the failures as a list of (tex_file, message) tuples.
+        """
+        while self._running:
+            self._wait_oldest()
+        return self.failures
@@ -0,0 +1,117 @@
+"""! @package manifest
+Keeps track of the inputs that produced each generated file
+
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from bust._version import __VERSION__
+
+logger = logging.getLogger(__name__)
+
+
+class Manifest(object):
+    """! @brief Fingerprints of the generated files of a module
+
+    For every file written, the manifest records a fingerprint of everything that
+    went into it, together with the size and modification time of the file. A
+    file whose fingerprint is unchanged and that has not been touched since it was
+    written does not have to be generated again.
+    """
+
+    format_version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.base_dir = os.path.dirname(path)
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def model_hash(module):
+        """! @brief Returns a hash of the normalized model, including settings and bus"""
+        return hashlib.sha256(module.return_JSON(True).encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint(model_hash, *keys):
+        """! @brief Returns the fingerprint of a file
+
+        keys must be JSON serializable, and identify the file and the settings
+        that affect its content.
+        """
+        data = json.dumps([model_hash, __VERSION__] + list(keys))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    @staticmethod
+    def file_hash(path, chunk_size=1 << 16):
+        """! @brief Returns a hash of the content of the file at path"""
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def load(self):
+        self._entries = {}
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable manifest " + self.path)
+            return
+        if manifest.get("format") == self.format_version:
+            self._entries = manifest.get("files", {})
+
+    def _key(self, path):
+        return os.path.relpath(path, self.base_dir)
+
+    def is_unchanged(self, path, fingerprint):
+        """! @brief Returns True if path was written with the same fingerprint and
+        has not been modified since
+        """
+        entry = self._entries.get(self._key(path))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def record(self, path, fingerprint):
+        """! @brief Record that path has been written with fingerprint"""
+        stat = os.stat(path)
+        self._entries[self._key(path)] = {
+            "fingerprint": fingerprint,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self._dirty = True
+
+    def discard(self, path):
+        """! @brief Forget path, e.g. because the existing file was kept"""
+        if self._entries.pop(self._key(path), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """! @brief Write the manifest if anything has changed"""
+        if not self._dirty:
+            return
+        manifest = {"format": self.format_version, "files": self._entries}
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=self.base_dir
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._dirty = False
@@ -4,13 +4,135 @@ Contains the Module class and relevant exceptions
 """
 
 import json
+from bisect import bisect_right, insort
 from collections import OrderedDict
 
 from bust.exceptions import InvalidAddress, InvalidRegister
 from bust.module_vhdl_gen import ModuleVHDLGen
-from bust.register import Register
+from bust.register import Register, RegisterViews
 from bust.utils import add_line_breaks, indent_string
-from bust.vhdl import is_unique, is_valid_VHDL
+from bust.vhdl import (
+    InvalidIdentifiers,
+    Namespace,
+    check_VHDL_identifier,
+    validate_identifiers,
+)
+
+
+class AddressIndex:
+    """! @brief Index of the register addresses used by a module
+
+    Used addresses are kept in a dictionary for constant-time collision checks, and
+    in a sorted list for address-ordered iteration. The slots of the allocation
+    grid (multiples of the address stride) that are still unused are kept as a
+    sorted list of free gaps, so the next free slot is found without scanning.
+    """
+
+    def __init__(self, stride, max_addr):
+        self.stride = stride
+        self.max_addr = max_addr
+        self.clear()
+
+    def clear(self):
+        self._owners = {}
+        self._ordered = []
+        self._gap_lo = [0]
+        self._gap_hi = [self.max_addr // self.stride]
+
+    def __contains__(self, addr):
+        return addr in self._owners
+
+    def __len__(self):
+        return len(self._ordered)
+
+    def __iter__(self):
+        """Iterate over the used addresses in ascending order"""
+        return iter(self._ordered)
+
+    def items(self):
+        """Iterate over (address, owner) pairs in ascending address order"""
+        for addr in self._ordered:
+            yield addr, self._owners[addr]
+
+    def is_free(self, addr):
+        return addr not in self._owners
+
+    def max_address(self):
+        """Returns the highest used address, or None if no address is used"""
+        if self._ordered:
+            return self._ordered[-1]
+        return None
+
+    def next_free(self):
+        """Returns the lowest free address on the allocation grid, or None if the
+        address space is exhausted"""
+        if self._gap_lo:
+            return self._gap_lo[0] * self.stride
+        return None
+
+    def add(self, addr, owner=None):
+        if addr in self._owners:
+            raise ValueError("Address " + hex(addr) + " is already in use")
+        self._owners[addr] = owner
+        insort(self._ordered, addr)
+        if addr % self.stride == 0:
+            self._occupy_slot(addr // self.stride)
+
+    def remove(self, addr):
+        del self._owners[addr]
+        i = bisect_right(self._ordered, addr) - 1
+        del self._ordered[i]
+        if addr % self.stride == 0:
+            self._release_slot(addr // self.stride)
+
+    def _occupy_slot(self, slot):
+        i = bisect_right(self._gap_lo, slot) - 1
+        if i < 0 or self._gap_hi[i] < slot:
+            # Slot is beyond the address space
+            return
+        lo = self._gap_lo[i]
+        hi = self._gap_hi[i]
+        if lo == hi:
+            del self._gap_lo[i]
+            del self._gap_hi[i]
+        elif slot == lo:
+            self._gap_lo[i] = slot + 1
+        elif slot == hi:
+            self._gap_hi[i] = slot - 1
+        else:
+            self._gap_hi[i] = slot - 1
+            self._gap_lo.insert(i + 1, slot + 1)
+            self._gap_hi.insert(i + 1, hi)
+
+    def _release_slot(self, slot):
+        if slot > self.max_addr // self.stride:
+            return
+        i = bisect_right(self._gap_lo, slot)
+        join_left = i > 0 and self._gap_hi[i - 1] == slot - 1
+        join_right = i < len(self._gap_lo) and self._gap_lo[i] == slot + 1
+        if join_left and join_right:
+            self._gap_hi[i - 1] = self._gap_hi[i]
+            del self._gap_lo[i]
+            del self._gap_hi[i]
+        elif join_left:
+            self._gap_hi[i - 1] = slot
+        elif join_right:
+            self._gap_lo[i] = slot
+        else:
+            self._gap_lo.insert(i, slot)
+            self._gap_hi.insert(i, slot)
+
+
+def module_identifiers(mod):
+    """! @brief Yields the (identifier, owner) pairs of the names in a module dictionary"""
+    yield mod["name"], "module"
+    for reg in mod.get("register", []):
+        if "name" not in reg:
+            continue
+        yield reg["name"], "register"
+        for field in reg.get("fields", []):
+            if "name" in field:
+                yield field["name"], "field in register " + reg["name"]
 
 
 class Module:
@@ -26,12 +148,30 @@ class Module:
         self.bus = bus
         self.settings = settings
         self.registers = []
-        self.addresses = []
+        # Derived from the registers and name, built when first used
+        self._views = None
+        self._vhdl_gen = None
+
+        # Register names are used for the C_ADDR_<NAME> constants
+        self.reg_names = Namespace(
+            {
+                "MAX": "the generated constant C_ADDR_MAX",
+                "WIDTH": "the generated constant C_ADDR_WIDTH",
+            }
+        )
+        # Name prefixes of the <REG>_* and <REG>_<FIELD>_* header macros
+        self.macro_names = Namespace()
+
+        # All identifiers are validated up front, so every problem is reported at once
+        diagnostics = validate_identifiers(module_identifiers(mod))
+        errors = [d for d in diagnostics if d.severity == "error"]
+        if errors:
+            raise InvalidIdentifiers(errors)
+        self.warnings = [d for d in diagnostics if d.severity == "warning"]
 
-        is_valid_VHDL(mod["name"])
         self.name = mod["name"]
         self.description = mod["description"]
-        self.description_with_breaks = add_line_breaks(mod["description"], 25)
+        self._description_with_breaks = None
         if "version" in mod:
             self.version = mod["version"]
         else:
@@ -52,19 +192,65 @@ class Module:
             else:
                 self.byte_addressable = False
 
+        if self.byte_addressable:
+            stride = self.data_width // 8  # force integer division to prevent float
+        else:
+            stride = 1
+        self.address_index = AddressIndex(stride, pow(2, self.addr_width) - 1)
+
         for reg in mod["register"]:
             if "stall_cycles" in reg and bus.bus_type != "ipbus":
                 raise NotImplementedError(
                     "Stall cycles has not been implemented for other buses than IPBus..."
                 )
+            if "stall_cycles" in reg and bus.read_mode == "low_latency":
+                raise NotImplementedError(
+                    "Stall cycles can not be combined with the low_latency read mode..."
+                )
             self.add_register(reg)
 
+    @property
+    def description_with_breaks(self):
+        """! @brief The description with line breaks, computed when first used"""
+        if self._description_with_breaks is None:
+            self._description_with_breaks = add_line_breaks(self.description, 25)
+        return self._description_with_breaks
+
     def get_version(self):
         if self.version is None:
             return ""
         else:
             return "Version: {}".format(self.version)
 
+    @property
+    def addresses(self):
+        """List of the addresses in use, in ascending order"""
+        return list(self.address_index)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        self._vhdl_gen = None
+
+    def _invalidate(self):
+        """! @brief Drop the views and generator after the registers are changed"""
+        self._views = None
+        self._vhdl_gen = None
+
+    @property
+    def views(self):
+        """! @brief RegisterViews of the registers, rebuilt after registers are
+        added or removed
+
+        """
+        if self._views is None:
+            self._views = RegisterViews(self.registers)
+        return self._views
+
     def add_register(self, reg):
         if self.register_valid(reg):
             if "address" in reg:
@@ -74,36 +260,43 @@ class Module:
                         raise RuntimeError(
                             "Address " + hex(addr) + " is definitely out of range..."
                         )
-                    self.addresses.append(addr)
-                    self.registers.append(Register(reg, addr, self.data_width))
                 else:
                     raise InvalidAddress(reg["name"], addr)
             else:
                 addr = self.get_next_address()
-                self.addresses.append(addr)
-                self.registers.append(Register(reg, addr, self.data_width))
+            register = Register(reg, addr, self.data_width)
+            macros = register.get_macro_names()
+            for macro in macros:
+                self.macro_names.check(macro)
+            for macro, owner in macros.items():
+                self.macro_names.add(macro, owner)
+            self.reg_names.add(register.name)
+            self.address_index.add(addr, register)
+            self.registers.append(register)
+            self._invalidate()
         else:
             raise InvalidRegister(reg)
 
+    def remove_register(self, index):
+        """! @brief Removes the register at index and releases its address"""
+        reg = self.registers.pop(index)
+        self._invalidate()
+        self.address_index.remove(reg.address)
+        self.reg_names.discard(reg.name)
+        for macro in reg.get_macro_names():
+            self.macro_names.discard(macro)
+        return reg
+
     def get_next_address(self):
-        """! @brief Will get the next address based on the byte-addressed scheme"""
-        addr = 0
-        found_addr = False
-        while not found_addr:
-            if self.is_address_out_of_range(addr):
-                raise RuntimeError(
-                    "Address " + hex(addr) + " is definitely out of range..."
-                )
-            if self.is_address_free(addr):
-                self.addresses.append(addr)
-                return addr
-            else:
-                if self.byte_addressable:
-                    addr += (
-                        self.data_width // 8
-                    )  # force integer division to prevent float
-                else:
-                    addr += 1
+        """! @brief Will get the next free address based on the byte-addressed scheme"""
+        addr = self.address_index.next_free()
+        if addr is None:
+            raise RuntimeError(
+                "Address "
+                + hex(self.address_index.max_addr + 1)
+                + " is definitely out of range..."
+            )
+        return addr
 
     def is_address_out_of_range(self, addr):
         """Returns True if address is out of range, False if not"""
@@ -115,11 +308,7 @@ class Module:
 
     def is_address_free(self, addr):
         """Returns True if address is not been used in the module, False if it already taken"""
-        for address in self.addresses:
-            if address == addr:
-                return False
-        # If loop completes without matching addresses
-        return True
+        return self.address_index.is_free(addr)
 
     def is_address_byte_based(self, addr):
         """Returns True if address is divisible by number of bytes in module data width"""
@@ -130,10 +319,11 @@ class Module:
             return False
 
     def update_addresses(self):
-        self.addresses = []
+        self._invalidate()
+        self.address_index.clear()
         for reg in self.registers:
             addr = self.get_next_address()
-            self.addresses.append(addr)
+            self.address_index.add(addr, reg)
             reg.address = addr
 
     def register_valid(self, reg):
@@ -148,29 +338,25 @@ class Module:
 
         """Check if name is valid VHDL, if not it will raise an exception which must be
         catched in calling function"""
-        is_valid_VHDL(reg["name"])
+        check_VHDL_identifier(reg["name"])
 
-        """Get a list of the currently used reg names and compare the chosen reg names to this list
-        If it is already taken it will raise an exception which must be catched in calling function"""
-        reg_names = [r.name for r in self.registers]
-        is_unique(reg["name"], reg_names)
+        """Check the chosen reg name against the names already in use. If it is already
+        taken it will raise an exception which must be catched in calling function"""
+        self.reg_names.check(reg["name"])
 
         return True
 
     def count_ro_regs(self):
-        return len([reg for reg in self.registers if reg.mode == "ro"])
+        return self.views.count("ro")
 
     def count_rw_regs(self):
-        return len([reg for reg in self.registers if reg.mode == "rw"])
+        return self.views.count("rw")
 
     def count_pulse_regs(self):
-        return len([reg for reg in self.registers if reg.mode == "pulse"])
+        return self.views.count("pulse")
 
     def has_stall_regs(self):
-        if len([reg for reg in self.registers if reg.stall]) > 0:
-            return True
-        else:
-            return False
+        return len(self.views.stall) > 0
 
     def __str__(self):
         string = "Name: " + self.name + "\n"
@@ -248,17 +434,32 @@ class Module:
         gen_obj = self._get_vhdl_gen_obj()
         return gen_obj.return_module_VHDL()
 
+    def emit_module_pkg_VHDL(self, e):
+        gen_obj = self._get_vhdl_gen_obj()
+        gen_obj.emit_module_pkg_VHDL(e)
+
+    def emit_module_VHDL(self, e):
+        gen_obj = self._get_vhdl_gen_obj()
+        gen_obj.emit_module_VHDL(e)
+
     def get_instantiation(self, instance_name, intern_out=False):
         """Also a VHDL method."""
         gen_obj = self._get_vhdl_gen_obj()
         return gen_obj.get_instantiation(instance_name, intern_out)
 
     def _get_vhdl_gen_obj(self):
-        o = ModuleVHDLGen(
-            name=self.name,
-            bus_gen=self.bus.get_VHDL_generator(),
-            regs=self.registers,
-            data_width=self.data_width,
-            addr_width=self.addr_width,
-        )
-        return o
+        """! @brief Returns the ModuleVHDLGen of the module, created once and shared
+        by all the VHDL outputs until the module is changed
+
+        """
+        if self._vhdl_gen is None:
+            self._vhdl_gen = ModuleVHDLGen(
+                name=self.name,
+                bus_gen=self.bus.get_VHDL_generator(),
+                regs=self.registers,
+                data_width=self.data_width,
+                addr_width=self.addr_width,
+                addr_max=self.address_index.max_address(),
+                views=self.views,
+            )
+        return self._vhdl_gen
@@ -1,42 +1,71 @@
+from bust.emitter import Emitter
+from bust.register import RegisterViews
 from bust.utils import indent_string
 from bust.vhdl import lib_declaration, ieee_math
 
 
 class ModuleVHDLGen:
-    def __init__(self, name, bus_gen, regs, data_width, addr_width):
+    def __init__(
+        self, name, bus_gen, regs, data_width, addr_width, addr_max=None, views=None
+    ):
         """Code generator for the Module module."""
         self.name = name
         self.bus = bus_gen
         self.registers = regs
         self.data_width = data_width
         self.addr_width = addr_width
-        self.n_rw_regs = len([reg for reg in self.registers if reg.mode == "rw"])
-        self.n_ro_regs = len([reg for reg in self.registers if reg.mode == "ro"])
-        self.n_pulse_regs = len([reg for reg in self.registers if reg.mode == "pulse"])
+        if addr_max is None:
+            addr_max = max((reg.address for reg in regs), default=0)
+        self.addr_max = addr_max
+        if views is None:
+            views = RegisterViews(regs)
+        self.views = views
+        self.n_rw_regs = views.count("rw")
+        self.n_ro_regs = views.count("ro")
+        self.n_pulse_regs = views.count("pulse")
+        # Blocks used by several outputs, rendered once
+        self._renders = {}
+
+    def _emit_cached(self, e, key, emit, *args):
+        """! @brief Write the block written by emit(e, *args) to e, rendering it only
+        the first time it is asked for with key
+
+        """
+        if key not in self._renders:
+            block = Emitter()
+            emit(block, *args)
+            self._renders[key] = block.getvalue()
+        e.write(self._renders[key])
 
     def return_module_pkg_VHDL(self):
-        s = ieee_math()
-        s += "\n"
-        s += "package " + self.name + "_pif_pkg is"
-        s += "\n\n"
+        e = Emitter()
+        self.emit_module_pkg_VHDL(e)
+        return e.getvalue()
 
-        s += self.get_subtypes_and_addrs_vhdl()
+    def emit_module_pkg_VHDL(self, e):
+        e.write(ieee_math())
+        e.write("\n")
+        e.write("package " + self.name + "_pif_pkg is")
+        e.write("\n\n")
 
-        if self.n_rw_regs > 0:
-            s += self.get_rw_regs_vhdl()
+        with e.indent():
+            self._emit_cached(e, "addrs", self.emit_subtypes_and_addrs_vhdl)
 
-        if self.n_ro_regs > 0:
-            s += self.get_ro_regs_vhdl()
+            if self.n_rw_regs > 0:
+                self._emit_cached(e, "rw_regs", self.emit_rw_regs_vhdl)
 
-        if self.n_pulse_regs > 0:
-            s += self.get_pulse_regs_vhdl()
+            if self.n_ro_regs > 0:
+                self._emit_cached(e, "ro_regs", self.emit_ro_regs_vhdl)
 
-        s += "\n"
+            if self.n_pulse_regs > 0:
+                self._emit_cached(e, "pulse_regs", self.emit_pulse_regs_vhdl)
 
-        s += "end package " + self.name + "_pif_pkg;"
-        s += "\n\n"
+        e.write("\n")
 
-        s += (
+        e.write("end package " + self.name + "_pif_pkg;")
+        e.write("\n\n")
+
+        e.write(
             f"package body {self.name}_pif_pkg is\n"
             "\n"
             "  function set_module_addr_width(g_module_addr_width : integer) return integer is\n"
@@ -51,86 +80,62 @@ class ModuleVHDLGen:
             f"end package body {self.name}_pif_pkg;\n"
         )
 
-        return s
+    def _reg_record_type(self, reg):
+        """! @brief Returns the VHDL type of the register in the register record"""
+        if reg.sig_type == "default" or (
+            reg.sig_type == "slv" and reg.width == self.data_width
+        ):
+            return "t_" + self.name + "_data"
+        elif reg.sig_type == "slv":
+            return "std_logic_vector(" + str(reg.width - 1) + " downto 0)"
+        elif reg.sig_type == "sl":
+            return "std_logic"
+        elif reg.sig_type == "fields":
+            return "t_" + self.name + "_" + reg.mode + "_" + reg.name
+        else:
+            raise RuntimeError("Something went wrong... What now?" + reg.sig_type)
+
+    def _emit_regs_vhdl(self, e, mode, label):
+        """! @brief Writes the record types and reset value constant of all
+        registers with the given mode
+        """
+        regs = self.views.by_mode[mode]
+
+        e.write("-- " + label + " Register Record Definitions\n\n")
+        # Create all types for the registers with records
+        for reg in regs:
+            if reg.sig_type == "fields":
+                self.emit_record_fields_definition_vhdl(e, reg)
+        # The register record type
+        e.write("type t_" + self.name + "_" + mode + "_regs is record\n")
+        for reg in regs:
+            e.write(reg.name + " : " + self._reg_record_type(reg) + ";\n", 1)
+        e.write("end record;\n")
+        e.write("\n")
+        e.write("-- " + label + " Register Reset Value Constant\n\n")
+        e.write(
+            "constant c_"
+            + self.name
+            + "_"
+            + mode
+            + "_regs : t_"
+            + self.name
+            + "_"
+            + mode
+            + "_regs := (\n"
+        )
+        self.emit_field_declarations(e, regs)
 
-    def get_pulse_regs_vhdl(self):
-        s = indent_string("-- PULSE Register Record Definitions\n\n")
-        # Create all types for PULSE registers with records
-        for reg in self.registers:
-            if reg.mode == "pulse" and reg.sig_type == "fields":
-                s += self.record_fields_definition_vhdl(reg)
-        # The PULSE register record type
-        s += indent_string("type t_" + self.name + "_pulse_regs is record\n")
-        for reg in self.registers:
-            if reg.mode == "pulse":
-                s += indent_string(reg.name, 2) + " : "
-                if reg.sig_type == "default" or (
-                    reg.sig_type == "slv" and reg.width == self.data_width
-                ):
-                    s += "t_" + self.name + "_data;\n"
-                elif reg.sig_type == "slv":
-                    s += "std_logic_vector(" + str(reg.width - 1) + " downto 0);\n"
-                elif reg.sig_type == "sl":
-                    s += "std_logic;\n"
-                elif reg.sig_type == "fields":
-                    s += "t_" + self.name + "_pulse_" + reg.name + ";\n"
-                else:
-                    raise RuntimeError("Something went wrong...")
-        s += indent_string("end record;\n")
-        s += "\n"
-        s += indent_string("-- PULSE Register Reset Value Constant\n\n")
-        s += indent_string("constant c_") + self.name + "_pulse_regs : t_"
-        s += self.name + "_pulse_regs := (\n"
-        gen = [reg for reg in self.registers if reg.mode == "pulse"]
-        s += self.get_field_declarations(gen)
-        s += "\n"
-        return s
-
-    def get_ro_regs_vhdl(self):
-        s = indent_string("-- RO Register Record Definitions\n\n")
-        # Create all types for RO registers with records
-        for reg in self.registers:
-            if reg.mode == "ro" and reg.sig_type == "fields":
-                s += indent_string("type t_" + self.name + "_ro_")
-                s += reg.name + " is record\n"
-
-                for field in reg.fields:
-                    s += indent_string(field.name, 2) + " : "
-                    if field.sig_type == "slv":
-                        s += "std_logic_vector(" + str(field.width - 1)
-                        s += " downto 0);\n"
-                    elif field.sig_type == "sl":
-                        s += "std_logic;\n"
-                    else:
-                        raise RuntimeError("Something went wrong...")
-                s += indent_string("end record;\n\n")
-        # The RO register record type
-        s += indent_string("type t_" + self.name + "_ro_regs is record\n")
-        for reg in self.registers:
-            if reg.mode == "ro":
-                s += indent_string(reg.name, 2) + " : "
-                if reg.sig_type == "default" or (
-                    reg.sig_type == "slv" and reg.width == self.data_width
-                ):
-                    s += "t_" + self.name + "_data;\n"
-                elif reg.sig_type == "slv":
-                    s += "std_logic_vector(" + str(reg.width - 1) + " downto 0);\n"
-                elif reg.sig_type == "sl":
-                    s += "std_logic;\n"
-                elif reg.sig_type == "fields":
-                    s += "t_" + self.name + "_ro_" + reg.name + ";\n"
-                else:
-                    raise RuntimeError(
-                        "Something went wrong... What now?" + reg.sig_type
-                    )
-        s += indent_string("end record;\n")
-        s += "\n"
-        s += indent_string("-- RO Register Reset Value Constant\n\n")
-        s += indent_string("constant c_") + self.name + "_ro_regs : t_"
-        s += self.name + "_ro_regs := (\n"
-        gen = [reg for reg in self.registers if reg.mode == "ro"]
-        s += self.get_field_declarations(gen)
-        return s
+    def emit_pulse_regs_vhdl(self, e):
+        self._emit_regs_vhdl(e, "pulse", "PULSE")
+        e.write("\n")
+
+    def emit_ro_regs_vhdl(self, e):
+        self._emit_regs_vhdl(e, "ro", "RO")
+
+    def emit_rw_regs_vhdl(self, e):
+        self._emit_regs_vhdl(e, "rw", "RW")
+        e.write("\n")
 
     @staticmethod
     def get_field_reset_value(reg):
@@ -161,42 +166,8 @@ class ModuleVHDLGen:
         par += ")"
         return par
 
-    def get_rw_regs_vhdl(self):
-        s = indent_string("-- RW Register Record Definitions\n\n")
-        # Create all types for RW registers with records
-        for reg in self.registers:
-            if reg.mode == "rw" and reg.sig_type == "fields":
-                s += self.record_fields_definition_vhdl(reg)
-        # The RW register record type
-        s += indent_string("type t_" + self.name + "_rw_regs is record\n")
-        for reg in self.registers:
-            if reg.mode == "rw":
-                s += indent_string(reg.name, 2) + " : "
-                if reg.sig_type == "default" or (
-                    reg.sig_type == "slv" and reg.width == self.data_width
-                ):
-                    s += "t_" + self.name + "_data;\n"
-                elif reg.sig_type == "slv":
-                    s += "std_logic_vector(" + str(reg.width - 1) + " downto 0);\n"
-                elif reg.sig_type == "sl":
-                    s += "std_logic;\n"
-                elif reg.sig_type == "fields":
-                    s += "t_" + self.name + "_rw_" + reg.name + ";\n"
-                else:
-                    raise RuntimeError("Something went wrong...")
-        s += indent_string("end record;\n")
-        s += "\n"
-        s += indent_string("-- RW Register Reset Value Constant\n\n")
-        s += indent_string("constant c_") + self.name + "_rw_regs : t_"
-        s += self.name + "_rw_regs := (\n"
-        gen = [reg for reg in self.registers if reg.mode == "rw"]
-        s += self.get_field_declarations(gen)
-        s += "\n"
-        return s
-
-    def get_field_declarations(self, gen):
-        s = ""
-        for i, reg in enumerate(gen):
+    def emit_field_declarations(self, e, regs):
+        for i, reg in enumerate(regs):
             par = ""
             par += reg.name + " => "
 
@@ -216,31 +187,29 @@ class ModuleVHDLGen:
             else:
                 raise RuntimeError("Something went wrong... What now?" + reg.sig_type)
 
-            if i < len(gen) - 1:
+            if i < len(regs) - 1:
                 par += ","
             else:
                 par += ");"
             par += "\n"
 
-            s += indent_string(par, 2)
-        return s
+            e.write(par, 1)
 
-    def record_fields_definition_vhdl(self, reg):
-        s = indent_string("type t_" + self.name + "_" + reg.mode + "_")
-        s += reg.name + " is record\n"
+    def emit_record_fields_definition_vhdl(self, e, reg):
+        e.write(
+            "type t_" + self.name + "_" + reg.mode + "_" + reg.name + " is record\n"
+        )
         for field in reg.fields:
-            s += indent_string(field.name, 2) + " : "
             if field.sig_type == "slv":
-                s += "std_logic_vector(" + str(field.width - 1)
-                s += " downto 0);\n"
+                sig_type = "std_logic_vector(" + str(field.width - 1) + " downto 0)"
             elif field.sig_type == "sl":
-                s += "std_logic;\n"
+                sig_type = "std_logic"
             else:
                 raise RuntimeError("Something went wrong..." + field.sig_type)
-        s += indent_string("end record;\n\n")
-        return s
+            e.write(field.name + " : " + sig_type + ";\n", 1)
+        e.write("end record;\n\n")
 
-    def get_subtypes_and_addrs_vhdl(self):
+    def emit_subtypes_and_addrs_vhdl(self, e):
         par = ""
         par += "constant C_" + self.name.upper()
         par += "_ADDR_WIDTH : natural := " + str(self.addr_width) + ";\n"
@@ -254,40 +223,56 @@ class ModuleVHDLGen:
         par += "std_logic_vector(C_" + self.name.upper() + "_DATA_WIDTH-1 "
         par += "downto 0);\n"
         par += "\n"
+        e.write(par)
+
         for reg in self.registers:
-            par += "constant C_ADDR_" + reg.name.upper()
-            par += " : t_" + self.name + "_addr := " + str(self.addr_width)
-            par += 'X"' + "%X" % reg.address + '";\n'
-        par += "\n"
+            e.write(
+                "constant C_ADDR_"
+                + reg.name.upper()
+                + " : t_"
+                + self.name
+                + "_addr := "
+                + str(self.addr_width)
+                + 'X"'
+                + "%X" % reg.address
+                + '";\n'
+            )
+        e.write("\n")
 
-        max_addr = self.registers[-1].address
-        par += f"constant C_ADDR_MAX   : integer := {max_addr}; -- {hex(max_addr)}\n"
+        max_addr = self.addr_max
+        par = f"constant C_ADDR_MAX   : integer := {max_addr}; -- {hex(max_addr)}\n"
         par += "constant C_ADDR_WIDTH : integer := integer(ceil(log2(real(C_ADDR_MAX + 1))));\n\n"
 
         par += "function set_module_addr_width(g_module_addr_width : integer) return integer;\n"
         par += "\n"
-
-        return indent_string(par)
+        e.write(par)
 
     def return_module_VHDL(self):
-        s = lib_declaration()
-        s += "-- User Libraries Start\n\n"
-        s += "-- User Libraries End\n"
-        s += "\n"
+        e = Emitter()
+        self.emit_module_VHDL(e)
+        return e.getvalue()
+
+    def emit_module_VHDL(self, e):
+        e.write(lib_declaration())
+        e.write("-- User Libraries Start\n\n")
+        e.write("-- User Libraries End\n")
+        e.write("\n")
         if self.bus.comp_library != "work":
-            s += "library " + self.bus.comp_library + ";\n"
+            e.write("library " + self.bus.comp_library + ";\n")
         if self.bus.bus_type == "ipbus":
-            s += "use " + self.bus.comp_library + "." + self.bus.bus_type + ".all;\n"
+            e.write(
+                "use " + self.bus.comp_library + "." + self.bus.bus_type + ".all;\n"
+            )
         else:
-            s += (
+            e.write(
                 "use " + self.bus.comp_library + "." + self.bus.bus_type + "_pkg.all;\n"
             )
-        s += "use work." + self.name + "_pif_pkg.all;\n"
-        s += "\n"
+        e.write("use work." + self.name + "_pif_pkg.all;\n")
+        e.write("\n")
 
-        s += "entity " + self.name + " is\n"
-        s += "\n"
-        s += indent_string("generic (\n")
+        e.write("entity " + self.name + " is\n")
+        e.write("\n")
+        e.write("generic (\n", 1)
         par = "-- User Generics Start\n\n"
         par += "-- User Generics End\n"
         par += "-- " + self.bus.bus_type.upper() + " Bus Interface Generics\n"
@@ -302,9 +287,9 @@ class ModuleVHDLGen:
         par += "g_module_addr_width   : integer := 0\n"
         par += ");\n"
 
-        s += indent_string(par, 2)
+        e.write(par, 2)
 
-        s += indent_string("port (\n")
+        e.write("port (\n", 1)
         par = "-- User Ports Start\n\n"
         par += "-- User Ports End\n"
         par += "-- {} Bus Interface Ports\n".format(self.bus.bus_type.upper())
@@ -317,68 +302,87 @@ class ModuleVHDLGen:
         par += "{}_in       : in  {};\n".format(self.bus.short_name, self.bus.in_type)
         par += "{}_out      : out {}\n".format(self.bus.short_name, self.bus.out_type)
         par += ");\n"
-        s += indent_string(par, 2)
-        s += "\n"
-        s += "end entity " + self.name + ";\n"
-        s += "\n"
-
-        s += "architecture behavior of " + self.name + " is\n"
-        s += "\n"
-        par = "-- User Architecture Start\n\n"
-        par += "-- User Architecture End\n\n"
-        s += indent_string(par)
-
-        s += indent_string(
-            "-- " + self.bus.bus_type.upper() + " output signal for user readback\n"
-        )
-        par = "signal {}_out_i : {};\n".format(self.bus.short_name, self.bus.out_type)
-        s += indent_string(par)
+        e.write(par, 2)
+        e.write("\n")
+        e.write("end entity " + self.name + ";\n")
+        e.write("\n")
 
-        s += indent_string("-- Register Signals\n")
-        if self.n_rw_regs > 0:
-            s += indent_string("signal " + self.bus.short_name + "_rw_regs    : t_")
-            s += self.name + "_rw_regs    := c_" + self.name + "_rw_regs;\n"
-        if self.n_ro_regs > 0:
-            s += indent_string("signal " + self.bus.short_name + "_ro_regs    : t_")
-            s += self.name + "_ro_regs    := c_" + self.name + "_ro_regs;\n"
-        if self.n_pulse_regs > 0:
-            s += indent_string("signal " + self.bus.short_name + "_pulse_regs : t_")
-            s += self.name + "_pulse_regs := c_" + self.name + "_pulse_regs;\n"
+        e.write("architecture behavior of " + self.name + " is\n")
+        e.write("\n")
 
-        if self.n_rw_regs + self.n_ro_regs + self.n_pulse_regs > 0:
-            s += "\n"
+        with e.indent():
+            par = "-- User Architecture Start\n\n"
+            par += "-- User Architecture End\n\n"
+            e.write(par)
+
+            e.write(
+                "-- " + self.bus.bus_type.upper() + " output signal for user readback\n"
+            )
+            e.write(
+                "signal {}_out_i : {};\n".format(self.bus.short_name, self.bus.out_type)
+            )
 
-        s += "begin\n"
-        s += "\n"
+            e.write("-- Register Signals\n")
+            for mode, n_regs, pad in (
+                ("rw", self.n_rw_regs, "   "),
+                ("ro", self.n_ro_regs, "   "),
+                ("pulse", self.n_pulse_regs, ""),
+            ):
+                if n_regs > 0:
+                    e.write(
+                        "signal {0}_{1}_regs {2}: t_{3}_{1}_regs {2}:= c_{3}_{1}_regs;\n".format(
+                            self.bus.short_name, mode, pad, self.name
+                        )
+                    )
 
-        par = "-- User Logic Start\n\n"
-        par += "-- User Logic End\n\n"
-        s += indent_string(par)
+        if self.n_rw_regs + self.n_ro_regs + self.n_pulse_regs > 0:
+            e.write("\n")
 
-        s += indent_string(
-            self.bus.short_name + "_out <= " + self.bus.short_name + "_out_i;\n\n"
-        )
+        e.write("begin\n")
+        e.write("\n")
 
-        s += indent_string(
-            self.get_instantiation("i_{}_{}_pif".format(self.name, self.bus.short_name))
-        )
+        with e.indent():
+            par = "-- User Logic Start\n\n"
+            par += "-- User Logic End\n\n"
+            e.write(par)
 
-        s += "\n"
-        s += "end architecture behavior;"
-        s += "\n"
+            e.write(
+                self.bus.short_name + "_out <= " + self.bus.short_name + "_out_i;\n\n"
+            )
 
-        return s
+            self._emit_instantiation_cached(
+                e, "i_{}_{}_pif".format(self.name, self.bus.short_name)
+            )
+
+        e.write("\n")
+        e.write("end architecture behavior;")
+        e.write("\n")
 
     def get_instantiation(self, instance_name, intern_out=True):
-        s = instance_name + " "
-        s += ": entity work." + self.name + "_" + self.bus.short_name + "_pif\n"
-        s += indent_string("generic map (\n")
+        e = Emitter()
+        self._emit_instantiation_cached(e, instance_name, intern_out)
+        return e.getvalue()
+
+    def _emit_instantiation_cached(self, e, instance_name, intern_out=True):
+        key = ("instantiation", instance_name, intern_out)
+        self._emit_cached(e, key, self.emit_instantiation, instance_name, intern_out)
+
+    def emit_instantiation(self, e, instance_name, intern_out=True):
+        e.write(
+            instance_name
+            + " : entity work."
+            + self.name
+            + "_"
+            + self.bus.short_name
+            + "_pif\n"
+        )
+        e.write("generic map (\n", 1)
         par = "g_{0}_baseaddr      => g_{0}_baseaddr,\n".format(self.bus.short_name)
         par += "g_check_baseaddr    => g_check_baseaddr,\n"
         par += "g_module_addr_width => g_module_addr_width)\n"
-        s += indent_string(par, 2)
+        e.write(par, 2)
 
-        s += indent_string("port map (\n")
+        e.write("port map (\n", 1)
         if intern_out:
             inter = "_i"
         else:
@@ -427,5 +431,4 @@ class ModuleVHDLGen:
 
         par += ");\n"
 
-        s += indent_string(par, 2)
-        return s
+        e.write(par, 2)
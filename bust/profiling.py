@@ -0,0 +1,104 @@
+"""! @package profiling
+Time and memory use of the stages of a bust run
+
+"""
+import datetime
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from bust._version import __VERSION__
+
+
+class Profiler(object):
+    """! @brief Records wall time, CPU time and peak memory of named stages
+
+    The peak memory of a stage is the highest amount of memory allocated by Python
+    on top of what was allocated when the stage started, as traced by tracemalloc.
+    Tracing starts with the first stage, and slows everything down considerably,
+    so a disabled Profiler is used unless profiling is asked for. Stages must not
+    be nested.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self._tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        """! @brief Profile the code in the block as stage name"""
+        if not self.enabled:
+            yield
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0]
+        children = _children_cpu_time()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            # Includes the CPU time of subprocesses, such as pdflatex
+            cpu = time.process_time() - cpu + _children_cpu_time() - children
+            peak = tracemalloc.get_traced_memory()[1] - memory
+            self.stages.append({"name": name, "wall": wall, "cpu": cpu, "peak": peak})
+
+    def add(self, stages):
+        """! @brief Add stages recorded by another Profiler, e.g. in a worker process"""
+        self.stages.extend(stages)
+
+    def stop(self):
+        """! @brief Stop tracing memory allocations if the Profiler started it"""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def table(self):
+        """! @brief Returns the stages as a table, the slowest stage first"""
+        row = "{:<50} {:>10} {:>10} {:>12}"
+        lines = [row.format("Stage", "Wall [s]", "CPU [s]", "Peak [KiB]")]
+        for stage in sorted(self.stages, key=lambda s: s["wall"], reverse=True):
+            lines.append(
+                row.format(
+                    stage["name"],
+                    "{:.4f}".format(stage["wall"]),
+                    "{:.4f}".format(stage["cpu"]),
+                    "{:.1f}".format(stage["peak"] / 1024),
+                )
+            )
+        lines.append(
+            row.format(
+                "Total",
+                "{:.4f}".format(sum(s["wall"] for s in self.stages)),
+                "{:.4f}".format(sum(s["cpu"] for s in self.stages)),
+                "{:.1f}".format(max([s["peak"] for s in self.stages] or [0]) / 1024),
+            )
+        )
+        return "\n".join(lines)
+
+    def report(self, module_name=None):
+        """! @brief Returns the stages as a JSON serializable dictionary"""
+        return {
+            "module": module_name,
+            "bust": __VERSION__,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "stages": self.stages,
+        }
+
+    def save(self, path, module_name=None):
+        """! @brief Write the report to path as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.report(module_name), f, indent=1)
+            f.write("\n")
+
+
+def _children_cpu_time():
+    times = os.times()
+    return times.children_user + times.children_system
@@ -1,3 +1,6 @@
+import sys
+from collections import OrderedDict
+
 from bust.exceptions import (
     ModuleDataBitsExceeded,
     UndefinedRegisterType,
@@ -8,20 +11,41 @@ from bust.exceptions import (
 )
 from bust.field import Field
 from bust.utils import add_line_breaks, indent_string
-from bust.vhdl import is_unique, is_valid_VHDL
+from bust.vhdl import Namespace, check_VHDL_identifier
 
 
 class Register:
-    """! @brief Managing register information"""
+    """! @brief Managing register information
+
+    Large register maps hold many registers, so the attributes are kept in slots
+    instead of a per-instance dictionary, and the mode and type strings are
+    interned and shared between all registers.
+    """
+
+    __slots__ = (
+        "name",
+        "mode",
+        "description",
+        "_description_with_breaks",
+        "address",
+        "pulse_cycles",
+        "stall",
+        "stall_cycles",
+        "reset",
+        "width",
+        "fields",
+        "_field_names",
+        "sig_type",
+    )
 
     supported_types = ["default", "slv", "sl"]
     supported_modes = ["RW", "RO", "PULSE"]
 
     def __init__(self, reg, address, mod_data_width):
         self.name = reg["name"]
-        self.mode = reg["mode"].lower()
+        self.mode = sys.intern(reg["mode"].lower())
         self.description = reg["description"]
-        self.description_with_breaks = add_line_breaks(reg["description"], 25)
+        self._description_with_breaks = None
         self.address = address
 
         if self.mode == "pulse":
@@ -41,6 +65,7 @@ class Register:
         self.reset = "0x0"
         self.width = 0
         self.fields = []
+        self._field_names = Namespace()
 
         if "width" in reg:
             tmp_width = reg["width"]
@@ -48,7 +73,7 @@ class Register:
             tmp_width = 1  # Setting to 1, in case std_logic
 
         if "type" in reg:
-            self.sig_type = reg["type"]
+            self.sig_type = sys.intern(reg["type"])
         else:
             self.sig_type = "fields"
 
@@ -121,17 +146,28 @@ class Register:
         string += "\nDescription: " + self.description + "\n\n"
         return string
 
+    @property
+    def description_with_breaks(self):
+        """! @brief The description with line breaks, computed when first used"""
+        if self._description_with_breaks is None:
+            self._description_with_breaks = add_line_breaks(self.description, 25)
+        return self._description_with_breaks
+
+    @property
+    def field_names(self):
+        """! @brief Namespace of the field names"""
+        return self._field_names
+
     def add_field(self, field):
         # Check that all required keys exist
         if not all(key in field for key in ("name", "type")):
             raise InvalidFieldFormat(self.name)
 
         # Make sure field name is valid VHDL
-        is_valid_VHDL(field["name"])
+        check_VHDL_identifier(field["name"])
 
         # Make sure the field name is unique in this register
-        field_names = [field.name for field in self.fields]
-        is_unique(field["name"], field_names)
+        self.field_names.check(field["name"])
 
         if field["type"] == "slv":
             if "width" not in field:
@@ -171,6 +207,7 @@ class Register:
         self.fields.append(
             Field(field["name"], field["type"], width, reset, description, next_low)
         )
+        self._field_names.add(field["name"])
 
         # Maintain the register reset value
         reg_reset_int = int(self.reset, 16)
@@ -178,6 +215,19 @@ class Register:
         reg_reset_int += field_reset_int << next_low
         self.reset = hex(reg_reset_int)
 
+    def get_macro_names(self):
+        """! @brief Returns the name prefixes used for this register and its fields
+        in the generated header files, mapped to a description of their owner
+
+        """
+        macros = OrderedDict()
+        macros[self.name.upper()] = "register " + self.name
+        for field in self.fields:
+            macros[self.name.upper() + "_" + field.name.upper()] = (
+                "field " + field.name + " in register " + self.name
+            )
+        return macros
+
     def check_register_data_width(self, module):
         """! @brief Controls that the combined data bits in fields does not
         exceed data bits of module
@@ -210,3 +260,33 @@ class Register:
 
     def get_stall_cycles_str(self):
         return str(self.stall_cycles - 2)
+
+
+class RegisterViews(object):
+    """! @brief The registers of a module grouped by mode and kind
+
+    All views are built in one pass over the registers, and keep the register
+    order. The generators share the views of a module instead of filtering the
+    registers each time they need a group of them.
+    """
+
+    def __init__(self, registers):
+        self.by_mode = OrderedDict((mode, []) for mode in ("rw", "ro", "pulse"))
+        self.writable = []  # rw and pulse
+        self.readable = []  # ro and rw
+        self.stall = []
+        self.with_fields = []
+        for reg in registers:
+            self.by_mode.setdefault(reg.mode, []).append(reg)
+            if reg.mode != "ro":
+                self.writable.append(reg)
+            if reg.mode != "pulse":
+                self.readable.append(reg)
+            if reg.stall:
+                self.stall.append(reg)
+            if reg.fields:
+                self.with_fields.append(reg)
+
+    def count(self, mode):
+        """! @brief Returns the number of registers with the given mode"""
+        return len(self.by_mode.get(mode, ()))
@@ -13,6 +13,7 @@ class Settings(object):
         "ipbus_rel_path": None,
         "vip_ipbus_rel_path": None,
         "coverage": False,
+        "doc_timestamp": True,
     }
 
     def __init__(self, json_path, settings):
@@ -29,6 +30,7 @@ class Settings(object):
             self.ipbus_rel_path = self.default_val["ipbus_rel_path"]
             self.vip_ipbus_rel_path = self.default_val["vip_ipbus_rel_path"]
             self.coverage = self.default_val["coverage"]
+            self.doc_timestamp = self.default_val["doc_timestamp"]
         else:
 
             self.json_path = json_path
@@ -87,6 +89,11 @@ class Settings(object):
             else:
                 self.coverage = settings["coverage"]
 
+            if "doc_timestamp" not in settings:
+                self.doc_timestamp = self.default_val["doc_timestamp"]
+            else:
+                self.doc_timestamp = settings["doc_timestamp"]
+
         self.hdl_dir = "hdl"
         self.script_dir = "scripts"
         self.tb_dir = "tb"
@@ -105,6 +112,8 @@ class Settings(object):
         if self.vip_ipbus_rel_path is not None:
             json["vip_ipbus_rel_path"] = self.vip_ipbus_rel_path
         json["coverage"] = self.coverage
+        if self.doc_timestamp != self.default_val["doc_timestamp"]:
+            json["doc_timestamp"] = self.doc_timestamp
         return json
 
     def return_sim_bus_path(self, bus_type):
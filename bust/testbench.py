@@ -1,4 +1,5 @@
 import logging
+from bust.emitter import Emitter
 from bust.utils import indent_string
 from bust.bus import Bus
 
@@ -200,195 +201,218 @@ class Testbench(object):
         return s
 
     def return_vhdl_tb(self):
+        e = Emitter()
+        self.emit_vhdl_tb(e)
+        return e.getvalue()
+
+    def emit_vhdl_tb(self, e):
         self.logger.debug("Generating TB Sequencer VHDL")
 
-        s = (
+        e.write(
             "library ieee;\n"
             "use ieee.std_logic_1164.all;\n"
             "use ieee.numeric_std.all;\n\n"
         )
 
         if self.bus.bus_type == "ipbus":
-            s += "library ipbus;\n"
-            s += "use ipbus.ipbus.all;\n\n"
+            e.write("library ipbus;\n")
+            e.write("use ipbus.ipbus.all;\n\n")
 
         else:
             if self.bus.comp_library != Bus.default_comp_library:
-                s += "library {};\n".format(self.bus.comp_library)
-            s += "use {}.{}_pkg.all;\n".format(self.bus.comp_library, self.bus.bus_type)
-        s += "use work.{}_pif_pkg.all;\n\n".format(self.module.name)
-
-        s += "library uvvm_util;\n" "context uvvm_util.uvvm_util_context;\n\n"
-
-        s += self.bus.get_uvvm_lib()
-
-        s += (
-            "\n-------------------------------------------------------------------------------\n"
-            "\n"
-            "entity {0}_{1}_pif_tb is\n"
-            "\n"
-            "end entity {0}_{1}_pif_tb;\n"
-            "\n"
-            "-------------------------------------------------------------------------------\n\n"
-            ""
-        ).format(self.module.name, self.bus.short_name)
-
-        s += "architecture tb of {}_{}_pif_tb is\n\n".format(
-            self.module.name, self.bus.short_name
+                e.write("library {};\n".format(self.bus.comp_library))
+            e.write(
+                "use {}.{}_pkg.all;\n".format(self.bus.comp_library, self.bus.bus_type)
+            )
+        e.write("use work.{}_pif_pkg.all;\n\n".format(self.module.name))
+
+        e.write("library uvvm_util;\n" "context uvvm_util.uvvm_util_context;\n\n")
+
+        e.write(self.bus.get_uvvm_lib())
+
+        e.write(
+            (
+                "\n-------------------------------------------------------------------------------\n"
+                "\n"
+                "entity {0}_{1}_pif_tb is\n"
+                "\n"
+                "end entity {0}_{1}_pif_tb;\n"
+                "\n"
+                "-------------------------------------------------------------------------------\n\n"
+                ""
+            ).format(self.module.name, self.bus.short_name)
         )
 
-        s += indent_string(
-            "constant C_SCOPE      : string := C_TB_SCOPE_DEFAULT;\n"
-            "constant C_CLK_PERIOD : time   := 10 ns;\n"
+        e.write(
+            "architecture tb of {}_{}_pif_tb is\n\n".format(
+                self.module.name, self.bus.short_name
+            )
         )
-        s += "\n"
-        s += indent_string(
-            "-- component generics\n"
-            'constant g_{}_baseaddr   : std_logic_vector(31 downto 0) := 32X"FFAA0000";\n'
-            "constant g_check_baseaddr    : boolean                       := true;\n"
-            "constant g_module_addr_width : integer                       := 16;\n"
-        ).format(self.bus.short_name)
-        s += "\n"
 
-        # Initial reset value
-        if self.bus.reset_active_low:
-            init_reset = "'1'"
-        else:
-            init_reset = "'0'"
+        with e.indent():
+            e.write(
+                "constant C_SCOPE      : string := C_TB_SCOPE_DEFAULT;\n"
+                "constant C_CLK_PERIOD : time   := 10 ns;\n"
+            )
+            e.write("\n")
+            e.write(
+                (
+                    "-- component generics\n"
+                    'constant g_{}_baseaddr   : std_logic_vector(31 downto 0) := 32X"FFAA0000";\n'
+                    "constant g_check_baseaddr    : boolean                       := true;\n"
+                    "constant g_module_addr_width : integer                       := 16;\n"
+                ).format(self.bus.short_name)
+            )
+            e.write("\n")
 
-        s += indent_string("-- component ports\n")
-        if self.module.count_rw_regs() > 0:
-            s += indent_string(
-                "signal {0}_rw_regs    : t_{1}_rw_regs    := c_{1}_rw_regs;\n".format(
-                    self.bus.short_name, self.module.name
+            # Initial reset value
+            if self.bus.reset_active_low:
+                init_reset = "'1'"
+            else:
+                init_reset = "'0'"
+
+            e.write("-- component ports\n")
+            if self.module.count_rw_regs() > 0:
+                e.write(
+                    "signal {0}_rw_regs    : t_{1}_rw_regs    := c_{1}_rw_regs;\n".format(
+                        self.bus.short_name, self.module.name
+                    )
                 )
-            )
-        if self.module.count_ro_regs() > 0:
-            s += indent_string(
-                "signal {0}_ro_regs    : t_{1}_ro_regs    := c_{1}_ro_regs;\n".format(
-                    self.bus.short_name, self.module.name
+            if self.module.count_ro_regs() > 0:
+                e.write(
+                    "signal {0}_ro_regs    : t_{1}_ro_regs    := c_{1}_ro_regs;\n".format(
+                        self.bus.short_name, self.module.name
+                    )
                 )
-            )
-        if self.module.count_pulse_regs() > 0:
-            s += indent_string(
-                "signal {0}_pulse_regs : t_{1}_pulse_regs := c_{1}_pulse_regs;\n".format(
-                    self.bus.short_name, self.module.name
+            if self.module.count_pulse_regs() > 0:
+                e.write(
+                    "signal {0}_pulse_regs : t_{1}_pulse_regs := c_{1}_pulse_regs;\n".format(
+                        self.bus.short_name, self.module.name
+                    )
                 )
-            )
 
-        s += indent_string(
-            "signal {0}_{2}        : std_logic                   := '1';\n"
-            "signal {0}_{3}   : std_logic                   := {4};\n"
-            "signal {0}_in         : {5};\n"
-            "signal {0}_out        : {6};\n"
-            ""
-        ).format(
-            self.bus.short_name,
-            self.module.name,
-            self.bus.clk_name,
-            self.bus.reset_name,
-            init_reset,
-            self.bus.in_type,
-            self.bus.out_type,
-        )
-        s += "\n"
+            e.write(
+                (
+                    "signal {0}_{2}        : std_logic                   := '1';\n"
+                    "signal {0}_{3}   : std_logic                   := {4};\n"
+                    "signal {0}_in         : {5};\n"
+                    "signal {0}_out        : {6};\n"
+                    ""
+                ).format(
+                    self.bus.short_name,
+                    self.module.name,
+                    self.bus.clk_name,
+                    self.bus.reset_name,
+                    init_reset,
+                    self.bus.in_type,
+                    self.bus.out_type,
+                )
+            )
+            e.write("\n")
 
-        s += indent_string(self.bus.get_uvvm_signals())
-        s += "\n"
+            e.write(self.bus.get_uvvm_signals())
+            e.write("\n")
 
-        s += indent_string(self.get_addr_func())
-        s += "\n"
+            e.write(self.get_addr_func())
+            e.write("\n")
 
-        s += "begin  -- architecture tb\n\n"
+        e.write("begin  -- architecture tb\n\n")
 
-        s += indent_string(self.bus.get_uvvm_signal_assignment())
-        s += "\n"
+        with e.indent():
+            e.write(self.bus.get_uvvm_signal_assignment())
+            e.write("\n")
 
-        s += indent_string("-- component instantiation\n")
-        s += indent_string(self.module.get_instantiation("DUT", False))
-        s += "\n"
+            e.write("-- component instantiation\n")
+            e.write(self.module.get_instantiation("DUT", False))
+            e.write("\n")
 
-        s += indent_string(
-            ("-- clock generator\n" "clock_generator({}_{}, C_CLK_PERIOD);\n\n").format(
-                self.bus.short_name, self.bus.clk_name
+            e.write(
+                (
+                    "-- clock generator\n" "clock_generator({}_{}, C_CLK_PERIOD);\n\n"
+                ).format(self.bus.short_name, self.bus.clk_name)
             )
-        )
 
-        s += indent_string(("-- main testbench\n" "p_main : process\n\n"))
-
-        s += indent_string(self.get_uvvm_gen_overloads(), 2)
-        s += indent_string(self.bus.get_uvvm_overloads(), 2)
-
-        s += indent_string("begin\n\n")
-
-        par = (
-            "-- enable_log_msg(ALL_MESSAGES);\n"
-            "disable_log_msg(ALL_MESSAGES, QUIET);\n"
-            "enable_log_msg(ID_LOG_HDR, QUIET);\n"
-            "enable_log_msg(ID_LOG_HDR_LARGE, QUIET);\n"
-            "enable_log_msg(ID_SEQUENCER, QUIET);\n"
-            "-- enable_log_msg(ID_BFM, QUIET);\n"
-            "-- enable_log_msg(ID_CLOCK_GEN, QUIET);\n"
-            "-- enable_log_msg(ID_GEN_PULSE, QUIET);\n"
-            "-- enable_log_msg(ID_POS_ACK, QUIET);\n"
-            "\n"
-            "-- report_global_ctrl(VOID);\n"
-            "-- report_msg_id_panel(VOID);\n"
-        )
-        s += indent_string(par, 2)
-
-        s += "\n"
-        # Initial reset value
-        if self.bus.reset_active_low:
-            pulse_reset = "'0'"
-        else:
-            pulse_reset = "'1'"
-        par = 'gen_pulse({}_{}, {}, 500 ns, BLOCKING, "Reset for 500 ns");\n'.format(
-            self.bus.short_name, str.strip(self.bus.reset_name), pulse_reset
-        )
+            e.write("-- main testbench\n" "p_main : process\n\n")
+
+            e.write(self.get_uvvm_gen_overloads(), 1)
+            e.write(self.bus.get_uvvm_overloads(), 1)
+
+            e.write("begin\n\n")
+
+        with e.indent(2):
+            e.write(
+                "-- enable_log_msg(ALL_MESSAGES);\n"
+                "disable_log_msg(ALL_MESSAGES, QUIET);\n"
+                "enable_log_msg(ID_LOG_HDR, QUIET);\n"
+                "enable_log_msg(ID_LOG_HDR_LARGE, QUIET);\n"
+                "enable_log_msg(ID_SEQUENCER, QUIET);\n"
+                "-- enable_log_msg(ID_BFM, QUIET);\n"
+                "-- enable_log_msg(ID_CLOCK_GEN, QUIET);\n"
+                "-- enable_log_msg(ID_GEN_PULSE, QUIET);\n"
+                "-- enable_log_msg(ID_POS_ACK, QUIET);\n"
+                "\n"
+                "-- report_global_ctrl(VOID);\n"
+                "-- report_msg_id_panel(VOID);\n"
+            )
 
-        s += indent_string(par, 2)
-        s += "\n"
-        for reg in self.module.registers:
-            s += indent_string("--\n\n", 2)
+            e.write("\n")
+            # Initial reset value
+            if self.bus.reset_active_low:
+                pulse_reset = "'0'"
+            else:
+                pulse_reset = "'1'"
+            e.write(
+                'gen_pulse({}_{}, {}, 500 ns, BLOCKING, "Reset for 500 ns");\n'.format(
+                    self.bus.short_name, str.strip(self.bus.reset_name), pulse_reset
+                )
+            )
+            e.write("\n")
+            for reg in self.module.registers:
+                e.write("--\n\n")
+
+                e.write(self.reg_hdr(reg))
+                e.write("\n")
+                e.write(self.check_default_value(reg))
+                e.write("\n")
+                e.write(self.set_check_zero_value(reg))
+                e.write("\n")
+                e.write(self.check_bit_fields(reg))
+
+            readable = self.module.views.readable
+            if readable:
+                c_addr = "C_ADDR_{}".format(readable[0].name.upper())
+                if self.bus.read_mode == "streaming":
+                    e.write("--\n\n")
+                    e.write(self.bus.uvvm_read_throughput_check(c_addr))
+                elif self.bus.read_mode == "low_latency":
+                    e.write("--\n\n")
+                    e.write(self.bus.uvvm_read_latency_check(c_addr))
 
-            s += indent_string(self.reg_hdr(reg), 2)
-            s += "\n"
-            s += indent_string(self.check_default_value(reg), 2)
-            s += "\n"
-            s += indent_string(self.set_check_zero_value(reg), 2)
-            s += "\n"
-            s += indent_string(self.check_bit_fields(reg), 2)
+            if self.bus.bus_type == "ipbus":
+                e.write(
+                    "--\n\n"
+                    'log_hdr_large("Checking that invalid register returns ERR");\n\n'
+                    "ipbus_bfm_config.expected_response <= ERR;\n\n"
+                    'log_hdr("Check erroneous read");\n\n'
+                    'read(f_addr(g_ipb_baseaddr, 32x"ffff"), dummy_data, "Read from register that does not exist");\n'
+                    'check_value(dummy_data, 32X"DEADBEEF", error, "Check that the returned data is rubbish");\n\n'
+                    'log_hdr("Check erroneous write");\n\n'
+                    'write(32X"FFFFFFFF", 32X"0", "Write to register that does not exist");\n\n'
+                )
 
-        if self.bus.bus_type == "ipbus":
-            par = (
-                "--\n\n"
-                'log_hdr_large("Checking that invalid register returns ERR");\n\n'
-                "ipbus_bfm_config.expected_response <= ERR;\n\n"
-                'log_hdr("Check erroneous read");\n\n'
-                'read(f_addr(g_ipb_baseaddr, 32x"ffff"), dummy_data, "Read from register that does not exist");\n'
-                'check_value(dummy_data, 32X"DEADBEEF", error, "Check that the returned data is rubbish");\n\n'
-                'log_hdr("Check erroneous write");\n\n'
-                'write(32X"FFFFFFFF", 32X"0", "Write to register that does not exist");\n\n'
+            e.write(
+                "--==================================================================================================\n"
+                "-- Ending the simulation\n"
+                "--------------------------------------------------------------------------------------\n"
+                "wait for 100 ns;                    -- to allow some time for completion\n"
+                "report_alert_counters(FINAL);  -- Report final counters and print conclusion for simulation (Success/Fail)\n"
+                'log(ID_LOG_HDR, "SIMULATION COMPLETED", C_SCOPE);\n\n'
+                "-- Finish the simulation\n"
+                "std.env.stop;\n"
+                "wait;                               -- to stop completely\n"
             )
-            s += indent_string(par, 2)
-
-        par = (
-            "--==================================================================================================\n"
-            "-- Ending the simulation\n"
-            "--------------------------------------------------------------------------------------\n"
-            "wait for 100 ns;                    -- to allow some time for completion\n"
-            "report_alert_counters(FINAL);  -- Report final counters and print conclusion for simulation (Success/Fail)\n"
-            'log(ID_LOG_HDR, "SIMULATION COMPLETED", C_SCOPE);\n\n'
-            "-- Finish the simulation\n"
-            "std.env.stop;\n"
-            "wait;                               -- to stop completely\n"
-        )
-        s += indent_string(par, 2)
-        s += indent_string("end process p_main;\n\n")
-        s += "end architecture tb;\n"
-
-        return s
+        e.write("end process p_main;\n\n", 1)
+        e.write("end architecture tb;\n")
 
     def check_default_value(self, reg):
         s = self.log_hdr("Check Default Value")
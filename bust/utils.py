@@ -5,11 +5,21 @@
 import re
 import json
 import os
+import filecmp
+import locale
+import stat
+import sys
+import tempfile
 from functools import reduce
 import logging
 
+from bust.exceptions import OverwriteRefused
+
 spaces_in_tab = 2
 
+## What to do with an existing file that is not forced to be overwritten
+overwrite_policies = ["ask", "always", "never", "if-changed", "fail"]
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,8 +78,125 @@ def compare_JSON(json1, json2, raise_error=False):
     return True
 
 
-def write_string_to_file(string, output_file, output_dir, force_overwrite=False):
-    """! @brief Write string to file"""
+def get_overwrite_policy(policy="ask"):
+    """! @brief Returns the overwrite policy to use
+
+    ask becomes fail if stdin is not a terminal, so that an unattended run stops
+    instead of waiting for an answer.
+    """
+    if policy not in overwrite_policies:
+        raise ValueError(
+            "Overwrite policy must be one of: " + ", ".join(overwrite_policies)
+        )
+    if policy == "ask" and (sys.stdin is None or not sys.stdin.isatty()):
+        logger.debug("Cannot ask for permission to overwrite, stdin is not a terminal")
+        return "fail"
+    return policy
+
+
+def confirm_overwrite(path, force_overwrite=False, policy="ask"):
+    """! @brief Returns True if path does not exist, or may be overwritten
+
+    An existing file is overwritten if force_overwrite is True. Otherwise policy
+    decides:
+    - ask: the user is asked
+    - always: the file is overwritten
+    - if-changed: the file is overwritten. The caller leaves files that already
+      have the new content untouched.
+    - never: the file is kept
+    - fail: OverwriteRefused is raised
+    ask is resolved with get_overwrite_policy, so it fails when stdin is not a
+    terminal.
+    """
+    policy = get_overwrite_policy(policy)
+    if os.path.isfile(path) and not force_overwrite:
+        if policy == "fail":
+            raise OverwriteRefused(path)
+        if policy == "never":
+            logger.info("Did not write " + path)
+            return False
+        if policy == "ask":
+            if input("Do you want to overwrite " + path + "? (y/N):").upper() != "Y":
+                logger.warning("Did not write " + path)
+                return False
+    return True
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def create_temp_file(output_file, output_dir):
+    """! @brief Create a temporary file in output_dir, to replace output_file with
+
+    The temporary file gets the permissions of output_file if it exists, or else
+    those of a new file. Returns the file descriptor and path of the temporary
+    file, like tempfile.mkstemp.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + output_file + ".", suffix=".tmp", dir=output_dir
+    )
+    try:
+        mode = stat.S_IMODE(os.stat(os.path.join(output_dir, output_file)).st_mode)
+    except OSError:
+        mode = 0o666 & ~_umask()
+    try:
+        # mkstemp creates the file readable by the owner only
+        os.chmod(tmp_path, mode)
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    return fd, tmp_path
+
+
+def files_equal(path_a, path_b):
+    """! @brief Returns True if both files exist and have the same content
+
+    The sizes are compared first, so the contents are only read when they may be
+    equal.
+    """
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+    except OSError:
+        return False
+    return filecmp.cmp(path_a, path_b, shallow=False)
+
+
+def file_has_content(path, string, chunk_size=1 << 16):
+    """! @brief Returns True if the file at path contains exactly string"""
+    data = string.encode(locale.getpreferredencoding(False))
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            for pos in range(0, len(data), chunk_size):
+                if f.read(chunk_size) != data[pos : pos + chunk_size]:
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+def write_string_to_file(
+    string,
+    output_file,
+    output_dir,
+    force_overwrite=False,
+    if_changed=False,
+    policy="ask",
+):
+    """! @brief Write string to file
+
+    The string is written to a temporary file which then replaces the file, so the
+    file is never left half-written. If if_changed is True, or policy is
+    if-changed, an existing file that already contains string is left untouched,
+    so that its modification time is kept. See confirm_overwrite for policy.
+    Returns False if the file was not written.
+    """
 
     # Make sure output directory exists
     if not os.path.isdir(output_dir):
@@ -77,27 +204,47 @@ def write_string_to_file(string, output_file, output_dir, force_overwrite=False)
 
     joined = os.path.join(output_dir, output_file)
 
-    # Check if file exist
-    if os.path.isfile(joined):
-        if (
-            not force_overwrite
-            and input("Do you want to overwrite " + joined + "? (y/N):").upper() != "Y"
-        ):
-            logger.warning("Did not write " + joined)
-            return
+    if_changed = if_changed or policy == "if-changed"
+    if if_changed and file_has_content(joined, string):
+        logger.debug("Unchanged: " + joined)
+        return False
+
+    if not confirm_overwrite(joined, force_overwrite, policy):
+        return False
 
     logger.debug("Writing string to " + joined)
 
-    with open(joined, "w") as strfile:
-        strfile.write(string)
+    fd, tmp_path = create_temp_file(output_file, output_dir)
+    try:
+        with os.fdopen(fd, "w") as strfile:
+            strfile.write(string)
+        os.replace(tmp_path, joined)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
 
+def update_module_top_level(existing_file, new_top_level, policy="ask"):
+    """! @brief Returns new_top_level with the user edited parts of existing_file
 
-def update_module_top_level(existing_file, new_top_level):
+    Unless the result is the same as existing_file, policy decides whether it may
+    replace existing_file, see confirm_overwrite. The user is only asked with the
+    ask policy, and only from a terminal, see get_overwrite_policy. The never and
+    fail policies raise OverwriteRefused.
+    """
+    policy = get_overwrite_policy(policy)
     # Check if file exists at all...
     if os.path.isfile(existing_file):
         # Read the file and get the user edited parts...
         string_list = analyze_top_level_file(existing_file)
         string = restore_user_in_top_level(string_list, new_top_level)
+        if file_has_content(existing_file, string):
+            return string
+        if policy in ["never", "fail"]:
+            raise OverwriteRefused(existing_file)
+        if policy != "ask":
+            return string
         if (
             input("Preview updated top-level before writing to file? (y/N): ").upper()
             == "Y"
@@ -280,20 +427,15 @@ def clear_screen():
 
 def add_line_breaks(string, min_length):
     """! @brief Adds line breaks on the next space after the minimum length of a line"""
-    requirement = min_length
-    replace = False
-    positions = []
-    for i, char in enumerate(string):
-        if i > requirement:
-            replace = True
-        if replace and char == " ":
-            positions.append(i)
-            requirement = i + min_length
-            replace = False
-    for rep in positions:
-        string = string[:rep] + "\n" + string[rep + 1 :]
-
-    return string
+    lines = []
+    start = 0
+    pos = string.find(" ", min_length + 1)
+    while pos != -1:
+        lines.append(string[start:pos])
+        start = pos + 1
+        pos = string.find(" ", pos + min_length + 1)
+    lines.append(string[start:])
+    return "\n".join(lines)
 
 
 def is_mixed(string):
@@ -1,6 +1,8 @@
 import re
+from collections import namedtuple
+from contextlib import contextmanager
 
-from bust.utils import indent_string
+from bust.emitter import Emitter
 from bust.utils import is_mixed
 
 
@@ -19,111 +21,170 @@ def ieee_math():
     return s
 
 
-def sync_process(
+def _reset_level(active_low):
+    if active_low:
+        return "'0'"
+    return "'1'"
+
+
+@contextmanager
+def sync_process_block(
+    e,
     clk_name,
     reset_name,
     process_name,
     reset_string,
-    logic_string,
     active_low=True,
     variables=None,
 ):
-    s = process_name + " : process(" + clk_name + ")\n"
+    """! @brief Writes a clocked process with synchronous reset to the emitter e
+
+    The process logic is written inside the with-block.
+    """
+    e.write(process_name + " : process(" + clk_name + ")\n")
     if variables is not None:
         for var in variables:
-            s += indent_string("variable " + var + ";\n")
-    s += "begin\n"
-    s += indent_string("if rising_edge(" + clk_name + ") then\n")
-    s += indent_string("if " + reset_name + " = ", 2)
-
-    if active_low:
-        s += "'0'"
-    else:
-        s += "'1'"
-
-    s += " then\n"
-
-    s += indent_string(reset_string, 3)
-    s += "\n"
-    s += indent_string("else\n", 2)
-
-    s += indent_string(logic_string, 3)
-    s += indent_string("end if;\n", 2)
-    s += indent_string("end if;\n")
-    s += "end process " + process_name + ";\n"
-    return s
-
-
-def async_process(
+            e.write("variable " + var + ";\n", 1)
+    e.write("begin\n")
+    e.write("if rising_edge(" + clk_name + ") then\n", 1)
+    e.write("if " + reset_name + " = " + _reset_level(active_low) + " then\n", 2)
+
+    e.write(reset_string, 3)
+    e.write("\n")
+    e.write("else\n", 2)
+
+    with e.indent(3):
+        yield e
+    e.newline()
+    e.write("end if;\n", 2)
+    e.write("end if;\n", 1)
+    e.write("end process " + process_name + ";\n")
+
+
+@contextmanager
+def async_process_block(
+    e,
     clk_name,
     reset_name,
     process_name,
     reset_string,
-    logic_string,
     active_low=True,
     variables=None,
 ):
-    s = process_name + " : process(" + clk_name + ", " + reset_name + ")\n"
+    """! @brief Writes a clocked process with asynchronous reset to the emitter e
+
+    The process logic is written inside the with-block.
+    """
+    e.write(process_name + " : process(" + clk_name + ", " + reset_name + ")\n")
     if variables is not None:
         for var in variables:
-            s += indent_string("variable " + var + ";\n")
-    s += "begin\n"
-    s += indent_string("if " + reset_name + " = ")
+            e.write("variable " + var + ";\n", 1)
+    e.write("begin\n")
+    e.write("if " + reset_name + " = " + _reset_level(active_low) + " then\n", 1)
 
-    if active_low:
-        s += "'0'"
-    else:
-        s += "'1'"
+    e.write(reset_string, 2)
+    e.write("\n")
+    e.write("elsif rising_edge(" + clk_name + ") then\n", 1)
 
-    s += " then\n"
+    with e.indent(2):
+        yield e
+    e.write("\n")
+    e.write("end if;\n", 1)
+    e.write("end process " + process_name + ";\n")
 
-    s += indent_string(reset_string, 2)
-    s += "\n"
-    s += indent_string("elsif rising_edge(" + clk_name + ") then\n")
 
-    s += indent_string(logic_string, 2)
-    s += "\n"
-    s += indent_string("end if;\n")
-    s += "end process " + process_name + ";\n"
+@contextmanager
+def comb_process_block(e, process_name, variables=None):
+    """! @brief Writes a combinational process to the emitter e
 
-    return s
+    The process logic is written inside the with-block.
+    """
+    e.write(process_name + " : process(all)\n")
+    if variables is not None:
+        for var in variables:
+            e.write("variable " + var + ";\n", 1)
+    e.write("begin\n\n")
 
+    with e.indent():
+        yield e
+
+    e.write("end process " + process_name + ";\n")
 
-def comb_process(process_name, logic_string):
-    s = process_name + " : process(all)\n"
-    s += "begin\n\n"
 
-    s += indent_string(logic_string)
+@contextmanager
+def comb_process_with_reset_block(
+    e, reset_name, process_name, reset_string, active_low=True
+):
+    """! @brief Writes a combinational process with reset to the emitter e
 
-    s += "end process " + process_name + ";\n"
+    The process logic is written inside the with-block.
+    """
+    e.write(process_name + " : process(all)\n")
+    e.write("begin\n")
+    e.write("if " + reset_name + " = " + _reset_level(active_low) + " then\n", 1)
 
-    return s
+    e.write(reset_string, 2)
+    e.write("\n")
+    e.write("else\n", 1)
 
+    with e.indent(2):
+        yield e
+    e.write("\n")
+    e.write("end if;\n", 1)
 
-def comb_process_with_reset(
-    reset_name, process_name, reset_string, logic_string, active_low=True
+    e.write("end process " + process_name + ";\n")
+
+
+def sync_process(
+    clk_name,
+    reset_name,
+    process_name,
+    reset_string,
+    logic_string,
+    active_low=True,
+    variables=None,
 ):
-    s = process_name + " : process(all)\n"
-    s += "begin\n"
-    s += indent_string("if " + reset_name + " = ")
-    if active_low:
-        s += "'0'"
-    else:
-        s += "'1'"
+    e = Emitter()
+    with sync_process_block(
+        e, clk_name, reset_name, process_name, reset_string, active_low, variables
+    ):
+        e.write(logic_string)
+    return e.getvalue()
 
-    s += " then\n"
 
-    s += indent_string(reset_string, 2)
-    s += "\n"
-    s += indent_string("else\n")
+def async_process(
+    clk_name,
+    reset_name,
+    process_name,
+    reset_string,
+    logic_string,
+    active_low=True,
+    variables=None,
+):
+    e = Emitter()
+    with async_process_block(
+        e, clk_name, reset_name, process_name, reset_string, active_low, variables
+    ):
+        e.write(logic_string)
+    return e.getvalue()
+
 
-    s += indent_string(logic_string, 2)
-    s += "\n"
-    s += indent_string("end if;\n")
+def comb_process(process_name, logic_string):
+    e = Emitter()
+    with comb_process_block(e, process_name):
+        e.write(logic_string)
+    return e.getvalue()
 
-    s += "end process " + process_name + ";\n"
 
-    return s
+def comb_process_with_reset(
+    reset_name, process_name, reset_string, logic_string, active_low=True
+):
+    e = Emitter()
+    with comb_process_with_reset_block(
+        e, reset_name, process_name, reset_string, active_low
+    ):
+        e.write(logic_string)
+    return e.getvalue()
 
 
 def get_identifier(msg, ls=None):
@@ -138,8 +199,8 @@ def get_identifier(msg, ls=None):
             print(e)
 
 
-def is_VHDL_keyword(string):
-    keywords = [
+VHDL_KEYWORDS = frozenset(
+    [
         "abs",
         "access",
         "after",
@@ -256,8 +317,11 @@ def is_VHDL_keyword(string):
         "xnor",
         "xor",
     ]
+)
+
 
-    return string in keywords
+def is_VHDL_keyword(string):
+    return string in VHDL_KEYWORDS
 
 
 def contain_spaces(string):
@@ -276,52 +340,91 @@ def contain_two_successive_underscores(string):
     return "__" in string
 
 
+_NON_WORD = re.compile(r"\W")
+
+# Identifiers that pass all the checks below, except the keyword check. Anything
+# else is checked one rule at a time to tell what is wrong with it.
+_VALID_IDENTIFIER = re.compile(r"[A-Za-z](?:_?[^\W_])*\Z")
+
+# Identifier problem with its severity, "error" or "warning", and the owner of
+# the identifier, e.g. "register", used in the messages
+Diagnostic = namedtuple("Diagnostic", ["severity", "identifier", "owner", "message"])
+
+
 def is_only_alpfanum_(string):
-    regex = re.compile(r"\W")
-    return regex.search(string) is None
+    return _NON_WORD.search(string) is None
 
 
-def is_valid_VHDL(string):
+def identifier_problems(string):
+    """! @brief Returns the errors and warnings of a VHDL identifier
+
+    Returns two lists of messages, all the rules the identifier breaks and the
+    conventions it does not follow.
+    """
+    errors = []
     if len(string) < 1:
-        raise InvalidVHDLIdentifier(string + " - identifier cannot be empty.")
-    if is_VHDL_keyword(string):
-        raise InvalidVHDLIdentifier(
-            string + " - identifier cannot be identical to VHDL keyword."
-        )
-    if contain_spaces(string):
-        raise InvalidVHDLIdentifier(string + " - identifiers cannot contain spaces.")
-    if not start_with_alphabetic_letter(string):
-        raise InvalidVHDLIdentifier(
-            string + " - identifiers must start with an alphabetic letter."
-        )
-    if ends_with_underscore(string):
-        raise InvalidVHDLIdentifier(
-            string + " - identifiers cannot end with underscore."
-        )
-    if contain_two_successive_underscores(string):
-        raise InvalidVHDLIdentifier(
-            string + " - identifiers cannot contain two successive underscores."
-        )
-    if not is_only_alpfanum_(string):
-        raise InvalidVHDLIdentifier(
-            string
-            + " - identifiers may only contain \n\n- alphabetic letters "
-            + "(‘A’ to ‘Z’ and ‘a’ to ‘z’), \n- decimal digits (‘0’ to ‘9’) "
-            + "\n- the underline character (‘_’)"
-        )
+        return ["identifier cannot be empty."], []
+    if _VALID_IDENTIFIER.match(string) is None or string in VHDL_KEYWORDS:
+        if is_VHDL_keyword(string):
+            errors.append("identifier cannot be identical to VHDL keyword.")
+        if contain_spaces(string):
+            errors.append("identifiers cannot contain spaces.")
+        if not start_with_alphabetic_letter(string):
+            errors.append("identifiers must start with an alphabetic letter.")
+        if ends_with_underscore(string):
+            errors.append("identifiers cannot end with underscore.")
+        if contain_two_successive_underscores(string):
+            errors.append("identifiers cannot contain two successive underscores.")
+        if not is_only_alpfanum_(string):
+            errors.append(
+                "identifiers may only contain \n\n- alphabetic letters "
+                + "(‘A’ to ‘Z’ and ‘a’ to ‘z’), \n- decimal digits (‘0’ to ‘9’) "
+                + "\n- the underline character (‘_’)"
+            )
+    warnings = []
     if len(string) > 16:
-        print(
-            "\nWarning - "
-            + string
-            + " - identifier should probably not be longer than 16 characters."
-        )
+        warnings.append("identifier should probably not be longer than 16 characters.")
     if is_mixed(string):
-        print(
-            "\nWarning - "
-            + string
-            + " - identifier should probably not contain a mix of uppercase"
+        warnings.append(
+            "identifier should probably not contain a mix of uppercase"
             + " and lowercase letters."
         )
+    return errors, warnings
+
+
+def validate_identifiers(identifiers):
+    """! @brief Validate many identifiers in one pass
+
+    identifiers is an iterable of (identifier, owner) pairs. Returns a list of
+    Diagnostic tuples with every problem of every identifier, in the given order.
+    """
+    diagnostics = []
+    for identifier, owner in identifiers:
+        errors, warnings = identifier_problems(identifier)
+        for message in errors:
+            diagnostics.append(Diagnostic("error", identifier, owner, message))
+        for message in warnings:
+            diagnostics.append(Diagnostic("warning", identifier, owner, message))
+    return diagnostics
+
+
+def check_VHDL_identifier(string):
+    """! @brief Raises InvalidVHDLIdentifier if string is not a valid identifier
+
+    Unlike is_valid_VHDL, warnings are not printed.
+    """
+    errors = identifier_problems(string)[0]
+    if errors:
+        raise InvalidVHDLIdentifier(string + " - " + errors[0])
+    return True
+
+
+def is_valid_VHDL(string):
+    errors, warnings = identifier_problems(string)
+    if errors:
+        raise InvalidVHDLIdentifier(string + " - " + errors[0])
+    for message in warnings:
+        print("\nWarning - " + string + " - " + message)
     return True
 
 
@@ -333,12 +436,65 @@ def is_unique(string, ls):
     return True
 
 
+class Namespace(object):
+    """! @brief Set of identifiers that must be unique within one scope
+
+    VHDL identifiers are case-insensitive, so names are compared in upper case. Each
+    name may carry an owner description, which is used in the error message when a
+    later name clashes with it.
+    """
+
+    __slots__ = ("_names",)
+
+    def __init__(self, names=None):
+        self._names = {}
+        if names is not None:
+            for name, owner in names.items():
+                self.add(name, owner)
+
+    def __contains__(self, name):
+        return name.upper() in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def check(self, name):
+        """Raises NonUniqueIdentifer if name is already used"""
+        key = name.upper()
+        if key in self._names:
+            owner = self._names[key]
+            if owner is None:
+                raise NonUniqueIdentifer(
+                    name + " - identifier is already used in the same namespace."
+                )
+            raise NonUniqueIdentifer(name + " - identifier clashes with " + owner + ".")
+        return True
+
+    def add(self, name, owner=None):
+        self.check(name)
+        self._names[name.upper()] = owner
+
+    def discard(self, name):
+        self._names.pop(name.upper(), None)
+
+
 class InvalidVHDLIdentifier(Exception):
     def __init__(self, msg):
         s = "\nError in parsing identifier: " + msg
         super().__init__(s)
 
 
+class InvalidIdentifiers(InvalidVHDLIdentifier):
+    """! @brief Raised with all the invalid identifiers of a module at once"""
+
+    def __init__(self, diagnostics):
+        self.diagnostics = diagnostics
+        s = "{} invalid identifiers".format(len(diagnostics))
+        for d in diagnostics:
+            s += "\n- {} {} - {}".format(d.owner, d.identifier, d.message)
+        super().__init__(s)
+
+
 class NonUniqueIdentifer(Exception):
     def __init__(self, msg):
         s = "\nError in parsing identifier: " + msg
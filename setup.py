@@ -43,7 +43,10 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     entry_points={
-        "console_scripts": ["bust = bust.__main__:main"],
+        "console_scripts": [
+            "bust = bust.__main__:main",
+            "bust-batch = bust.batch:main",
+        ],
     },
     test_suite="tests",
     author="Ola Groettvik",
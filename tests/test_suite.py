@@ -1,12 +1,41 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from json import dumps
 import unittest
+from unittest import mock
 import logging.config
-from bust.utils import json_parser
+from bust import batch
+from bust.cache import ModelCache
+from bust.emitter import Emitter
+from bust.generation import (
+    generate_output,
+    get_gen_settings,
+    load_generators,
+    load_model,
+    write_emitted_to_file,
+)
+from bust.utils import (
+    json_parser,
+    indent_string,
+    add_line_breaks,
+    get_overwrite_policy,
+    update_module_top_level,
+    write_string_to_file,
+)
 from bust.module import Module
 from bust.bus import Bus
 from bust.settings import Settings
 from bust.testbench import Testbench
 from bust.documentation import Documentation
 from bust.header import Header
+from bust.latex import LatexRunner
+from bust.profiling import Profiler
+from bust.exceptions import InvalidAddress, InvalidBusOption, OverwriteRefused
+from bust.vhdl import InvalidIdentifiers, NonUniqueIdentifer, validate_identifiers
 
 
 class BusHolder:
@@ -95,6 +124,461 @@ class Test_Suite(unittest.TestCase):
                     "module must match manual file",
                 )
 
+    def test_streamed_output(self):
+        for holder in self.buzz:
+            with self.subTest(holder=holder), tempfile.TemporaryDirectory() as tmp:
+                # A tiny buffer makes the emitter flush to file on every write
+                write_emitted_to_file(
+                    lambda e: holder.bus.emit_bus_pif_VHDL(e, holder.mod),
+                    "pif.vhd",
+                    tmp,
+                    buffer_size=1,
+                )
+                with open(os.path.join(tmp, "pif.vhd")) as f:
+                    self.assertEqual(
+                        f.read(), holder.bus.return_bus_pif_VHDL(holder.mod)
+                    )
+                self.assertEqual(os.listdir(tmp), ["pif.vhd"])
+
+    def test_parallel_generation(self):
+        holder = BusHolder("ipbus")
+        outputs = []
+        for jobs in [1, 3]:
+            with tempfile.TemporaryDirectory() as tmp:
+                gs = get_gen_settings(
+                    {"-o": tmp, "-F": True, "-p": True}, holder.sett, holder.bus
+                )
+                gs["jobs"] = jobs
+                generate_output(
+                    holder.sett,
+                    holder.bus,
+                    holder.mod,
+                    holder.hdr,
+                    holder.doc,
+                    holder.tb,
+                    gs,
+                )
+                files = {}
+                for root, _, names in os.walk(tmp):
+                    for name in names:
+                        if name.endswith("_manifest.json"):
+                            continue
+                        with open(os.path.join(root, name)) as f:
+                            files[os.path.relpath(f.name, tmp)] = f.read()
+                outputs.append(files)
+        self.assertEqual(len(outputs[0]), 11)
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_manifest(self):
+        holder = BusHolder("axi")
+        with tempfile.TemporaryDirectory() as tmp:
+            gs = get_gen_settings(
+                {"-o": tmp, "-F": True, "-p": True}, holder.sett, holder.bus
+            )
+
+            def generate():
+                return generate_output(
+                    holder.sett,
+                    holder.bus,
+                    holder.mod,
+                    holder.hdr,
+                    holder.doc,
+                    holder.tb,
+                    gs,
+                )
+
+            summary = generate()
+            self.assertEqual(len(summary.written), 11)
+            self.assertEqual(generate().unchanged, summary.written)
+
+            # Files edited since they were written are generated again
+            with open(summary.written[0], "a") as f:
+                f.write("-- edit\n")
+            self.assertEqual(generate().written, summary.written[:1])
+
+            gs["rebuild"] = True
+            self.assertEqual(generate().written, summary.written)
+
+    def test_if_changed(self):
+        holder = BusHolder("axi")
+        with tempfile.TemporaryDirectory() as tmp:
+            gs = get_gen_settings(
+                {"-o": tmp, "-F": True, "-p": True, "-r": True, "--if-changed": True},
+                holder.sett,
+                holder.bus,
+            )
+            args = [holder.sett, holder.bus, holder.mod]
+            args += [holder.hdr, holder.doc, holder.tb, gs]
+            files = generate_output(*args).written
+            mtimes = [os.stat(f).st_mtime_ns for f in files]
+
+            summary = generate_output(*args)
+            self.assertEqual(summary.written, [])
+            self.assertEqual(summary.unchanged, files)
+            self.assertEqual([os.stat(f).st_mtime_ns for f in files], mtimes)
+
+            # Only the files that depend on the description are written
+            holder.mod.registers[0].description += " (edited)"
+            written = generate_output(*args).written
+            self.assertTrue(0 < len(written) < len(files))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertTrue(write_string_to_file("abc\n", "a.txt", tmp))
+            self.assertFalse(write_string_to_file("abc\n", "a.txt", tmp, True, True))
+            self.assertTrue(write_string_to_file("abd\n", "a.txt", tmp, True, True))
+
+    def test_profiler(self):
+        profiler = Profiler()
+        generators = load_generators("example/example_ipbus.json", profiler)
+        with tempfile.TemporaryDirectory() as tmp:
+            gs = get_gen_settings({"-o": tmp, "-p": True}, *generators[:2])
+            gs["profiler"] = profiler
+            generate_output(*generators, gs)
+        profiler.stop()
+
+        names = [stage["name"] for stage in profiler.stages]
+        self.assertEqual(names[:4], ["json_parser", "Settings", "Bus", "Module"])
+        self.assertIn("render example_ipbus_ipb_pif.vhd", names)
+        self.assertEqual(len(profiler.table().split("\n")), len(names) + 2)
+        report = dumps(profiler.report("example_ipbus"))
+        self.assertIn('"peak"', report)
+
+        disabled = Profiler(False)
+        with disabled.stage("nothing"):
+            pass
+        self.assertEqual(disabled.stages, [])
+
+    def test_model_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ModelCache(os.path.join(tmp, "cache"))
+            json_file = os.path.join(tmp, "module.json")
+            json = json_parser("example/example_axi.json")
+            with open(json_file, "w") as f:
+                f.write(dumps(json))
+
+            parsed = load_model(json_file, cache=cache)[2]
+            cached = load_model(json_file, cache=cache)[2]
+            self.assertIsNot(cached, parsed)
+            self.assertEqual(cached.return_JSON(True), parsed.return_JSON(True))
+
+            # Only the entry of the current content is kept
+            json["module"]["description"] = "Changed"
+            with open(json_file, "w") as f:
+                f.write(dumps(json))
+            self.assertEqual(
+                load_model(json_file, cache=cache)[2].description, "Changed"
+            )
+            entries = os.listdir(cache.directory)
+            self.assertEqual(entries, [os.path.basename(cache.entry(json_file))])
+
+            # A corrupt entry is parsed again
+            with open(cache.entry(json_file), "wb") as f:
+                f.write(b"corrupt")
+            self.assertIsNone(cache.load(cache.entry(json_file)))
+            self.assertEqual(
+                load_model(json_file, cache=cache)[2].description, "Changed"
+            )
+
+    def test_overwrite_policy(self):
+        with mock.patch("sys.stdin", StringIO()):
+            self.assertEqual(get_overwrite_policy("ask"), "fail")
+        with self.assertRaises(ValueError):
+            get_overwrite_policy("sometimes")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.vhd")
+            write_string_to_file("a\n", "a.vhd", tmp)
+            os.chmod(path, 0o640)
+            with self.assertRaises(OverwriteRefused):
+                write_string_to_file("b\n", "a.vhd", tmp, policy="fail")
+            self.assertFalse(write_string_to_file("b\n", "a.vhd", tmp, policy="never"))
+            self.assertTrue(write_string_to_file("b\n", "a.vhd", tmp, policy="always"))
+            # The file is replaced atomically, and keeps its permissions
+            self.assertEqual(os.listdir(tmp), ["a.vhd"])
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+            # Updating the top level only fails when it would change
+            holder = BusHolder("axi")
+            top = holder.mod.return_module_VHDL()
+            write_string_to_file(top, "a.vhd", tmp, policy="always")
+            self.assertEqual(update_module_top_level(path, top, "fail"), top)
+            with self.assertRaises(OverwriteRefused):
+                update_module_top_level(path, top + "\n", "fail")
+
+            # ask never waits for an answer when stdin is not a terminal
+            with mock.patch("sys.stdin", StringIO()), mock.patch(
+                "builtins.input"
+            ) as input_:
+                with self.assertRaises(OverwriteRefused):
+                    write_string_to_file("c\n", "a.vhd", tmp)
+                with self.assertRaises(OverwriteRefused):
+                    update_module_top_level(path, top + "\n")
+                input_.assert_not_called()
+
+        # -u -F updates the top level without asking
+        with tempfile.TemporaryDirectory() as tmp:
+            holder = BusHolder("axi")
+            args = {"-o": tmp, "-F": True, "-u": True, "-p": True, "-r": True}
+            gs = get_gen_settings(args, holder.sett, holder.bus)
+            generators = [holder.sett, holder.bus, holder.mod]
+            generators += [holder.hdr, holder.doc, holder.tb]
+            files = generate_output(*generators, gs).written
+            top = [f for f in files if f.endswith(holder.mod.name + ".vhd")][0]
+            with open(top) as f:
+                edited = f.read().replace("architecture", "architecture  ", 1)
+            with open(top, "w") as f:
+                f.write(edited)
+            with mock.patch("sys.stdin", StringIO()):
+                self.assertIn(top, generate_output(*generators, gs).written)
+
+            # -u alone asks, and keeps the top level when the answer is no
+            with open(top, "w") as f:
+                f.write(edited)
+            tty = mock.Mock()
+            tty.isatty.return_value = True
+            with mock.patch("sys.stdin", tty), mock.patch(
+                "builtins.input", return_value="n"
+            ) as input_, self.assertRaises(SystemExit):
+                gs = get_gen_settings(
+                    {"-o": tmp, "-u": True, "-p": True, "-r": True},
+                    holder.sett,
+                    holder.bus,
+                )
+                generate_output(*generators, gs)
+            prompts = [call.args[0] for call in input_.call_args_list]
+            self.assertTrue(any(p.startswith("Are you sure") for p in prompts))
+            with open(top) as f:
+                self.assertEqual(f.read(), edited)
+
+    def test_latex_runner(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Stands in for pdflatex, and fails for files named fail*.tex
+            script = os.path.join(tmp, "pdflatex")
+            with open(script, "w") as f:
+                f.write('#!/bin/sh\ncase "$3" in *fail*) exit 1;; esac\n')
+            os.chmod(script, 0o755)
+            files = [os.path.join(tmp, name) for name in ["a.tex", "fail.tex", "b.tex"]]
+
+            with mock.patch.dict(os.environ, {"PATH": tmp}):
+                latex = LatexRunner(2)
+                for tex_file in files:
+                    latex.start(tex_file)
+                failures = latex.wait()
+            self.assertEqual([tex_file for tex_file, _ in failures], files[1:2])
+            self.assertIn("status 1", failures[0][1])
+
+            with mock.patch.dict(os.environ, {"PATH": os.path.join(tmp, "none")}):
+                latex = LatexRunner()
+                latex.start(files[0])
+                self.assertEqual(
+                    latex.wait(), [(files[0], "pdflatex is not installed")]
+                )
+
+    def test_pdf_up_to_date(self):
+        holder = BusHolder("ipbus")
+        holder.sett.doc_timestamp = False
+        self.assertNotIn(r"\today", holder.doc.return_tex_documentation())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Stands in for pdflatex, and logs each run
+            runs = os.path.join(tmp, "runs")
+            script = os.path.join(tmp, "pdflatex")
+            with open(script, "w") as f:
+                f.write('#!/bin/sh\necho "$3" >> {}\n'.format(runs))
+                f.write('touch "${2#--output-directory=}/$(basename "$3" .tex).pdf"\n')
+            os.chmod(script, 0o755)
+            gs = get_gen_settings({"-o": tmp, "-F": True}, holder.sett, holder.bus)
+            args = [holder.sett, holder.bus, holder.mod]
+            args += [holder.hdr, holder.doc, holder.tb, gs]
+
+            path = tmp + os.pathsep + os.environ["PATH"]
+            with mock.patch.dict(os.environ, {"PATH": path}):
+                generate_output(*args)
+                # The regenerated LaTeX file is the same
+                gs["rebuild"] = True
+                generate_output(*args)
+                gs["rebuild"] = False
+                generate_output(*args)
+                # Unless the PDF has been modified
+                pdf = os.path.join(tmp, "example_ipbus", "doc", "example_ipbus.pdf")
+                with open(pdf, "w") as f:
+                    f.write("edited")
+                generate_output(*args)
+            with open(runs) as f:
+                self.assertEqual(len(f.readlines()), 2)
+
+    def test_batch(self):
+        json = json_parser("example/example_axi.json")
+        json["settings"]["mod_subdir"] = False
+        args = {"-o": None, "-d": True, "-t": True, "--no-cache": True}
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["mod_a", "mod_b"]:
+                json["module"]["name"] = name
+                with open(os.path.join(tmp, name + ".json"), "w") as f:
+                    f.write(dumps(json))
+            files = batch.expand_files([os.path.join(tmp, "*.json")] * 2)
+            self.assertEqual(len(files), 2)
+
+            results = [batch.generate_module(f, args) for f in files]
+            packages = batch.write_bus_packages(results, False)
+            self.assertEqual([r.error for r in results + packages], [None] * 3)
+            self.assertEqual(len(packages), 1)
+            self.assertEqual(len(results[0].written), 6)
+
+            # Existing files are kept, nothing is asked
+            args["-r"] = True
+            results = [batch.generate_module(f, args) for f in files]
+            packages = batch.write_bus_packages(results, False)
+            self.assertEqual(sum(len(r.written) for r in results + packages), 0)
+            self.assertEqual(len(results[1].skipped), 6)
+
+    def test_import_time(self):
+        # bust is run from build scripts, so starting it must stay cheap. The editor,
+        # LaTeX encoding and process pool are only to be loaded when used.
+        code = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import bust.__main__\n"
+            "print(time.perf_counter() - start)\n"
+            "lazy = ['cursesmenu', 'prettytable', 'pylatexenc', 'multiprocessing']\n"
+            "print(' '.join(m for m in lazy if m in sys.modules))\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split("\n")
+        self.assertEqual(out[1], "", "modules loaded at startup")
+        self.assertLess(float(out[0]), 1.0, "import time budget in seconds")
+
+    def test_read_decode(self):
+        for bus_type in ["axi", "ipbus"]:
+            with self.subTest(bus=bus_type):
+                json = json_parser("example/example_{}.json".format(bus_type))
+                json["bus"]["read_decode"] = "onehot"
+                bus = Bus(json["bus"])
+                mod = Module(json["module"], bus, None)
+                pif = bus.return_bus_pif_VHDL(mod)
+                self.assertEqual(pif.count(":= v_data(0) or"), 5)
+                self.assertEqual(pif.count("C_MODULE_ADDR_WIDTH) then\n\n"), 8)
+                self.assertEqual(bus.return_JSON()["read_decode"], "onehot")
+
+        # auto picks the one-hot decode for large modules only
+        json = json_parser("example/example_axi.json")
+        regs = [
+            {"name": "r{}".format(i), "mode": "ro", "type": "sl", "description": ""}
+            for i in range(33)
+        ]
+        json["module"]["register"] = regs[:32]
+        bus = Bus(json["bus"])
+        self.assertNotIn(
+            "v_data", bus.return_bus_pif_VHDL(Module(json["module"], bus, None))
+        )
+        json["module"]["register"] = regs
+        bus = Bus(json["bus"])
+        self.assertIn(
+            "v_data", bus.return_bus_pif_VHDL(Module(json["module"], bus, None))
+        )
+
+        json["bus"]["read_decode"] = "case"
+        with self.assertRaises(InvalidBusOption):
+            Bus(json["bus"])
+
+    def test_read_pipeline(self):
+        for bus_type in ["axi", "ipbus"]:
+            with self.subTest(bus=bus_type):
+                json = json_parser("example/example_{}.json".format(bus_type))
+                json["bus"]["read_pipeline_stages"] = 2
+                bus = Bus(json["bus"])
+                mod = Module(json["module"], bus, None)
+                pif = bus.return_bus_pif_VHDL(mod)
+                self.assertIn("p_read_pipeline", pif)
+                self.assertIn("rd_stage2(0) <=", pif)
+                self.assertIn("rd_pipe(2)", pif)
+                self.assertNotIn("p_mm_select_read", pif)
+                self.assertEqual(bus.return_JSON()["read_pipeline_stages"], 2)
+
+        json["bus"]["read_pipeline_stages"] = 9
+        with self.assertRaises(InvalidBusOption):
+            Bus(json["bus"])
+
+    def test_write_mode(self):
+        json = json_parser("example/example_axi.json")
+        json["bus"]["write_mode"] = "throughput"
+        bus = Bus(json["bus"])
+        mod = Module(json["module"], bus, None)
+        pif = bus.return_bus_pif_VHDL(mod)
+        self.assertIn("p_aw_skid", pif)
+        self.assertIn("p_w_skid", pif)
+        self.assertNotIn("p_awready", pif)
+        self.assertIn("axi_rw_regs_i.reg0 <= wdata_i(0);", pif)
+        self.assertEqual(bus.return_JSON()["write_mode"], "throughput")
+
+        # Only AXI has a throughput write mode
+        json = json_parser("example/example_ipbus.json")
+        json["bus"]["write_mode"] = "throughput"
+        with self.assertRaises(InvalidBusOption):
+            Bus(json["bus"])
+
+    def test_read_mode(self):
+        json = json_parser("example/example_axi.json")
+        json["bus"]["read_mode"] = "streaming"
+        sett = Settings("example/example_axi.json", json["settings"])
+        bus = Bus(json["bus"])
+        mod = Module(json["module"], bus, sett)
+        pif = bus.return_bus_pif_VHDL(mod)
+        self.assertIn("p_ar_skid", pif)
+        self.assertIn("p_r_skid", pif)
+        self.assertNotIn("p_arready", pif)
+        self.assertNotIn("p_output", pif)
+        self.assertEqual(bus.return_JSON()["read_mode"], "streaming")
+
+        tb = Testbench(mod, bus.get_VHDL_generator(), sett).return_vhdl_tb()
+        self.assertIn("Checking streaming read throughput", tb)
+        self.assertIn("C_ADDR_REG0), addr_width)", tb)
+        # A PIF that never sets rvalid must fail the check, not hang the testbench
+        self.assertIn(
+            "while v_beats < C_STREAM_READS and v_cycles < 4*C_STREAM_READS loop", tb
+        )
+        self.assertIn("check_value(v_beats, C_STREAM_READS, error", tb)
+
+        # The streaming read path can not be pipelined
+        json["bus"]["read_pipeline_stages"] = 1
+        with self.assertRaises(InvalidBusOption):
+            Bus(json["bus"])
+
+    def test_low_latency_read(self):
+        for bus_type in ["axi", "ipbus"]:
+            with self.subTest(bus=bus_type):
+                json_file = "example/example_{}.json".format(bus_type)
+                json = json_parser(json_file)
+                json["bus"]["read_mode"] = "low_latency"
+                sett = Settings(json_file, json["settings"])
+                bus = Bus(json["bus"])
+                if bus_type == "ipbus":
+                    # Stall registers would delay the ack
+                    with self.assertRaises(NotImplementedError):
+                        Module(json["module"], bus, sett)
+                    json["module"]["register"] = [
+                        reg
+                        for reg in json["module"]["register"]
+                        if "stall_cycles" not in reg
+                    ]
+                mod = Module(json["module"], bus, sett)
+                pif = bus.return_bus_pif_VHDL(mod)
+                if bus_type == "axi":
+                    # arready comes from a flip-flop, not from rready
+                    self.assertIn("arready_i <= not r_skid_valid;", pif)
+                    self.assertIn("slv_reg_rden <= arvalid and arready_i;", pif)
+                    self.assertNotIn("rready;", pif)
+                    self.assertNotIn("p_arready", pif)
+                else:
+                    self.assertIn("p_read : process(all)", pif)
+                    self.assertNotIn("ack_d", pif)
+
+                tb = Testbench(mod, bus.get_VHDL_generator(), sett).return_vhdl_tb()
+                self.assertIn("Checking read latency", tb)
+                doc = Documentation(mod).return_tex_documentation()
+                self.assertIn(r"\section{Read Timing}", doc)
+
     def test_buspkg(self):
         holder = BusHolder("axi")
         # Only for AXI
@@ -105,6 +589,171 @@ class Test_Suite(unittest.TestCase):
             holder.bus.return_bus_pkg_VHDL(), string, "bus pkg must match manual file"
         )
 
+    def test_address_allocation(self):
+        holder = BusHolder("axi")
+        mod = holder.mod
+        self.assertEqual(mod.addresses, sorted(reg.address for reg in mod.registers))
+        self.assertFalse(mod.is_address_free(mod.registers[0].address))
+
+        # Free slots are reused lowest first, also after a removal
+        last = mod.registers[-1].address
+        self.assertEqual(mod.get_next_address(), last + 4)
+        mod.remove_register(1)
+        self.assertEqual(mod.get_next_address(), 0x4)
+        mod.add_register(
+            {"name": "extra", "mode": "rw", "type": "sl", "description": ""}
+        )
+        self.assertEqual(mod.registers[-1].address, 0x4)
+        self.assertEqual(mod.address_index.max_address(), last)
+
+        with self.assertRaises(InvalidAddress):
+            mod.add_register(
+                {
+                    "name": "clash",
+                    "mode": "rw",
+                    "type": "sl",
+                    "address": hex(last),
+                    "description": "",
+                }
+            )
+
+        mod.update_addresses()
+        self.assertEqual(
+            [reg.address for reg in mod.registers],
+            [i * 4 for i in range(len(mod.registers))],
+        )
+
+    def test_identifier_namespace(self):
+        holder = BusHolder("axi")
+        mod = holder.mod
+        clashes = [
+            # C_ADDR_<NAME> is case-insensitive in VHDL
+            {"name": "REG0", "mode": "rw", "type": "sl", "description": ""},
+            # Clashes with the generated C_ADDR_MAX constant
+            {"name": "max", "mode": "rw", "type": "sl", "description": ""},
+            # REG7_FIELD0_* header macros already exist for reg7.field0
+            {"name": "reg7_field0", "mode": "rw", "type": "sl", "description": ""},
+        ]
+        for reg in clashes:
+            with self.subTest(reg=reg["name"]):
+                with self.assertRaises(NonUniqueIdentifer):
+                    mod.add_register(reg)
+
+        n_regs = len(mod.registers)
+        mod.remove_register(0)
+        mod.add_register(
+            {"name": "REG0", "mode": "rw", "type": "sl", "description": ""}
+        )
+        self.assertEqual(len(mod.registers), n_regs)
+
+    def test_compact_registers(self):
+        holder = BusHolder("axi")
+        reg = holder.mod.registers[7]
+        # Slotted, without a per-instance dictionary
+        self.assertFalse(hasattr(reg, "__dict__"))
+        self.assertFalse(hasattr(reg.fields[0], "__dict__"))
+        self.assertIs(reg.mode, holder.mod.registers[0].mode)
+        # The field names are kept, not rebuilt from the fields on each use
+        self.assertIs(reg.field_names, reg.field_names)
+        self.assertIn(reg.fields[0].name, pickle.loads(pickle.dumps(reg)).field_names)
+
+        fields = [
+            {"name": "a", "type": "sl"},
+            {"name": "A", "type": "slv", "width": 2},
+        ]
+        with self.assertRaises(NonUniqueIdentifer):
+            holder.mod.add_register(
+                {"name": "dup", "mode": "rw", "fields": fields, "description": ""}
+            )
+
+    def test_register_views(self):
+        mod = BusHolder("axi").mod
+        views = mod.views
+        self.assertIs(mod.views, views)
+        self.assertEqual(
+            views.readable, [r for r in mod.registers if r.mode in ("ro", "rw")]
+        )
+        self.assertEqual(
+            views.writable, [r for r in mod.registers if r.mode in ("rw", "pulse")]
+        )
+        n_pulse = mod.count_pulse_regs()
+
+        # The views are rebuilt after the registers change
+        mod.add_register(
+            {"name": "extra", "mode": "pulse", "type": "sl", "description": ""}
+        )
+        self.assertIsNot(mod.views, views)
+        self.assertEqual(mod.count_pulse_regs(), n_pulse + 1)
+        mod.remove_register(len(mod.registers) - 1)
+        self.assertEqual(mod.count_pulse_regs(), n_pulse)
+
+    def test_generator_memoization(self):
+        mod = BusHolder("axi").mod
+        gen = mod._get_vhdl_gen_obj()
+        self.assertIs(mod._get_vhdl_gen_obj(), gen)
+        self.assertIs(mod.bus.get_VHDL_generator(), gen.bus)
+        inst = mod.get_instantiation("DUT", False)
+        self.assertEqual(mod.get_instantiation("DUT", False), inst)
+        self.assertIn(("instantiation", "DUT", False), gen._renders)
+
+        # Renaming or changing the registers creates a new generator
+        mod.name = "renamed"
+        self.assertIsNot(mod._get_vhdl_gen_obj(), gen)
+        self.assertIn("entity work.renamed_axi_pif", mod.get_instantiation("DUT"))
+        gen = mod._get_vhdl_gen_obj()
+        mod.add_register(
+            {"name": "extra", "mode": "rw", "type": "sl", "description": ""}
+        )
+        self.assertIsNot(mod._get_vhdl_gen_obj(), gen)
+        self.assertIn("C_ADDR_EXTRA", mod.return_module_pkg_VHDL())
+
+    def test_line_breaks(self):
+        self.assertEqual(add_line_breaks("", 25), "")
+        self.assertEqual(add_line_breaks("ab cd ef gh", 3), "ab cd\nef gh")
+        self.assertEqual(add_line_breaks("abcdef ghij klm", 4), "abcdef\nghij\nklm")
+
+        reg = BusHolder("axi").mod.registers[7]
+        self.assertIsNone(reg._description_with_breaks)
+        self.assertEqual(
+            reg.description_with_breaks, add_line_breaks(reg.description, 25)
+        )
+
+    def test_identifier_validation(self):
+        diagnostics = validate_identifiers(
+            [("reg_0", "register"), ("", "module"), ("1_a__", "register")]
+        )
+        self.assertEqual(
+            [(d.severity, d.identifier) for d in diagnostics],
+            [("error", ""), ("error", "1_a__"), ("error", "1_a__"), ("error", "1_a__")],
+        )
+        warnings = validate_identifiers([("MixedCase", "field in register r")])
+        self.assertEqual([d.severity for d in warnings], ["warning"])
+
+        # Every invalid identifier of a module is reported at once
+        json = json_parser("example/example_axi.json")
+        json["module"]["register"][0]["name"] = "signal"
+        json["module"]["register"][7]["fields"][0]["name"] = "a b"
+        with self.assertRaises(InvalidIdentifiers) as cm:
+            Module(json["module"], Bus(json["bus"]), None)
+        self.assertEqual(
+            sorted({d.identifier for d in cm.exception.diagnostics}), ["a b", "signal"]
+        )
+
+    def test_emitter(self):
+        e = Emitter()
+        e.write("a\n\nb", 1)
+        with e.indent(2):
+            e.write("c\n")
+            e.write("d\n", 1)
+        e.write("e\n")
+        self.assertEqual(
+            e.getvalue(),
+            indent_string("a\n\nb")
+            + indent_string("c\n", 2)
+            + indent_string("d\n", 3)
+            + "e\n",
+        )
+
     ############## Testbench Testing ##################
 
     def test_bench_scripts(self):